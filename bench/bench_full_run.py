@@ -0,0 +1,88 @@
+"""
+End-to-end benchmark of full_run against the fake upstream server, fully offline.
+
+Starts bench/fake_upstream.py in-process, points every upstream at it through
+UPSTREAM_BASE_URL, and runs the pipeline in a scratch directory so no real
+artifacts are touched. Prints the stage timings from the run's run_report.json.
+
+Run from the repo root:
+    python bench/bench_full_run.py --shows 4200 --latency-ms 50 --error-rate 0.01
+    python bench/bench_full_run.py --no-golden --no-higham   # without a Playwright browser
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import uvicorn
+
+BENCH = Path(__file__).resolve().parent
+ROOT = BENCH.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(BENCH))
+
+from fake_upstream import REAL_SHOW_VOLUME, FakeConfig, create_app  # noqa: E402
+
+
+def start_fake_upstream(config, shows, port):
+    server = uvicorn.Server(uvicorn.Config(create_app(config, shows), host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end full_run benchmark")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--shows", type=int, default=REAL_SHOW_VOLUME * 10)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-golden", action="store_true", help="Skip the golden results scrape")
+    parser.add_argument("--no-higham", action="store_true", help="Skip the Higham listing (needs a Playwright browser)")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory and print its path")
+    args = parser.parse_args()
+
+    config = FakeConfig(args.latency_ms, args.jitter_ms, args.error_rate, seed=args.seed)
+    server = start_fake_upstream(config, args.shows, args.port)
+
+    # Everything below reads its configuration at import time
+    os.environ.update({
+        "UPSTREAM_BASE_URL": f"http://127.0.0.1:{args.port}",
+        "GDRIVE_FOLDER_ID": "fake-folder",
+        "GOOGLE_MAPS_API_KEY": "fake-key",
+    })
+    os.environ.pop("GOOGLE_SERVICE_ACCOUNT_BASE64", None)
+    workdir = tempfile.mkdtemp(prefix="fossedata-bench-")
+    os.chdir(workdir)
+
+    import fossedata_core
+
+    start = time.perf_counter()
+    results = asyncio.run(fossedata_core.full_run(
+        force=True, include_golden=not args.no_golden, include_higham=not args.no_higham))
+    elapsed = time.perf_counter() - start
+    server.should_exit = True
+
+    report = json.loads(Path(fossedata_core.run_report.RUN_REPORT_FILE).read_text())
+    print(f"\nfull_run: {len(results)} shows in {elapsed:.1f}s ({args.shows} on the listing)")
+    print(f"{'stage':<20}{'seconds':>10}")
+    for stage, seconds in sorted(report["stages"].items(), key=lambda s: -s[1]):
+        print(f"{stage:<20}{seconds:>10.2f}")
+    print(f"{'endpoint':<64}{'calls':>8}{'retries':>9}")
+    for endpoint, calls in report["api_calls"].items():
+        print(f"{endpoint:<64}{calls:>8}{report['retries'].get(endpoint, 0):>9}")
+    if args.keep:
+        print(f"Artifacts kept in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Microbenchmark: full html.parser trees vs the strained lxml parses used for the
+Shows-To-Enter listing and the show detail pages.
+
+Run from the repo root:  python bench/bench_html_parsing.py
+"""
+import sys
+import timeit
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fossedata_core import (  # noqa: E402
+    SHOW_LIST_ROWS,
+    parse_show_detail_page,
+    parse_postal_close_date_from_html,
+)
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+ROW_SELECTOR = "tr.tableRow, tr.alternateRow, tr.tableRow.redBg, tr.alternateRow.redBg"
+
+
+# === Baselines: the previous full-tree approach ===
+def listing_full_tree(html):
+    return BeautifulSoup(html, "html.parser").select(ROW_SELECTOR)
+
+def detail_full_tree(html):
+    soup = BeautifulSoup(html, "html.parser")
+    heading = soup.find("h3", string="Location")
+    p_tag = heading.find_next_sibling("p") if heading else None
+    venue = p_tag.text.replace("Address:", "").strip() if p_tag else ""
+    return venue, soup.find("input", {"id": "__VIEWSTATE"}).get("value", "")
+
+def close_date_full_tree(html):
+    return BeautifulSoup(html, "html.parser").find_all("td")
+
+
+# === Current strained parses ===
+def listing_strained(html):
+    return BeautifulSoup(html, "lxml", parse_only=SHOW_LIST_ROWS).select(ROW_SELECTOR)
+
+
+def best_ms(fn, arg, number=5, repeat=5):
+    return min(timeit.repeat(lambda: fn(arg), number=number, repeat=repeat)) / number * 1000
+
+
+def main():
+    listing = (FIXTURES / "shows_to_enter.html").read_text(encoding="utf-8")
+    detail = (FIXTURES / "show_detail.html").read_text(encoding="utf-8")
+
+    # Sanity: the strained parses must see the same data as the full trees
+    assert len(listing_strained(listing)) == len(listing_full_tree(listing))
+    assert parse_show_detail_page(detail)[0] == detail_full_tree(detail)[0]
+    assert parse_postal_close_date_from_html(detail) is not None
+
+    cases = [
+        ("listing rows", listing_full_tree, listing_strained, listing),
+        ("detail page fields", detail_full_tree, parse_show_detail_page, detail),
+        ("close-date cells", close_date_full_tree, parse_postal_close_date_from_html, detail),
+    ]
+    print(f"{'case':<22}{'full tree ms':>14}{'strained ms':>14}{'speedup':>10}")
+    for name, before, after, html in cases:
+        before_ms = best_ms(before, html)
+        after_ms = best_ms(after, html)
+        print(f"{name:<22}{before_ms:>14.2f}{after_ms:>14.2f}{before_ms / after_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
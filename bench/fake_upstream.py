@@ -0,0 +1,336 @@
+"""
+Local stand-in for every upstream the pipeline talks to, for offline end-to-end
+and load testing. Each service lives under its own path prefix, matching
+upstreams.PATH_PREFIXES, so pointing UPSTREAM_BASE_URL at this server redirects
+the whole pipeline:
+
+    /fossedata  Shows-To-Enter listing, show pages, schedule and results postbacks
+    /higham     Higham Press show listing
+    /maps       Distance Matrix and Directions JSON
+    /gov        weekly road fuel prices CSV
+    /drive      an in-memory Drive v3 (list, download, create, update)
+
+Pages are replayed from bench/fixtures. The ASP.NET postbacks behave like the
+real site: each page issues its own __VIEWSTATE, and a postback without a valid
+one fails with the same 500 error. Latency and error injection apply to every
+upstream request and can be changed at runtime with POST /_fake/config.
+
+Run from the repo root:
+    python bench/fake_upstream.py --port 8765 --shows 4200 --latency-ms 80 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import datetime
+import email
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+from collections import Counter
+from urllib.parse import parse_qsl
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+REAL_SHOW_VOLUME = 420      # Rows on a typical Shows-To-Enter listing
+SHOWS_PER_RESULTS_YEAR = 40
+
+PLACES = ("Selby", "Ripon", "Harrogate", "Malton", "Whitby", "Kendal", "Penrith", "Carlisle", "Durham", "Goole",
+          "Thirsk", "Skipton", "Beverley", "Pickering", "Richmond", "Barnard Castle")
+KINDS = ("Open Show", "Championship Show", "Premier Open Show", "Limited Show")
+POSTCODE_AREAS = ("YO", "LS", "HG", "DL", "CA", "LA", "HU", "DN", "BD", "NE", "S", "WF")
+SCHEDULES = ("schedule_all_breed.pdf",) * 6 + ("schedule_single_breed.pdf",) * 3 + ("schedule_large.pdf",)
+VIEWSTATE_ERROR = "<html><body><h2>Server Error in '/' Application.</h2><p>Validation of viewstate MAC failed.</p></body></html>"
+
+
+def byte_range_response(body: bytes, range_header, media_type: str) -> Response:
+    # Honours a single "bytes=a-b", "bytes=a-" or "bytes=-n" range, as the GOV.UK asset host does
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header or "")
+    if not match or match.groups() == ("", ""):
+        return Response(body, media_type=media_type, headers={"Accept-Ranges": "bytes"})
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last) if last else len(body) - 1, len(body) - 1)
+    else:
+        start, end = max(len(body) - int(last), 0), len(body) - 1
+    if start >= len(body):
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{len(body)}"})
+    headers = {"Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{len(body)}"}
+    return Response(body[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+
+
+class FakeConfig:
+    """Latency and error injection, settable per upstream prefix."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.per_upstream = {}  # prefix -> {"latency_ms": .., "error_rate": ..}
+        self.random = random.Random(seed)
+
+    def setting(self, prefix, name):
+        return self.per_upstream.get(prefix, {}).get(name, getattr(self, name))
+
+    def update(self, values: dict):
+        for name in ("latency_ms", "jitter_ms", "error_rate", "error_status"):
+            if name in values:
+                setattr(self, name, values[name])
+        for prefix, settings in values.get("per_upstream", {}).items():
+            self.per_upstream.setdefault(prefix, {}).update(settings)
+
+    def to_dict(self):
+        return {"latency_ms": self.latency_ms, "jitter_ms": self.jitter_ms, "error_rate": self.error_rate,
+                "error_status": self.error_status, "per_upstream": self.per_upstream}
+
+
+def viewstate_token(page: str) -> str:
+    return hashlib.sha1(f"fake-upstream:{page}".encode()).hexdigest()
+
+
+def with_viewstate(html: str, page: str) -> str:
+    # Prefixes the fixture's ViewState with a token tied to this page, keeping its size
+    return re.sub(r'(id="__VIEWSTATE" value=")', rf"\g<1>{viewstate_token(page)}", html, count=1)
+
+
+async def read_form(request: Request) -> dict:
+    # ASP.NET postbacks are urlencoded; parsed here so the server needs no multipart support
+    return dict(parse_qsl((await request.body()).decode("utf-8"), keep_blank_values=True))
+
+
+def valid_postback(form, page: str) -> bool:
+    return str(form.get("__VIEWSTATE", "")).startswith(viewstate_token(page))
+
+
+def fake_postcode(seed: str) -> str:
+    rnd = random.Random(seed)
+    return f"{rnd.choice(POSTCODE_AREAS)}{rnd.randint(1, 30)} {rnd.randint(1, 9)}{rnd.choice('ABDEFGHJLNPQRSTUWXYZ')}{rnd.choice('ABDEFGHJLNPQRSTUWXYZ')}"
+
+
+def fake_drive(origin: str, destination: str):
+    # Deterministic distance and drive time for a pair of places
+    rnd = random.Random(f"{origin}|{destination}")
+    miles = round(rnd.uniform(5, 260), 1)
+    return miles, int(miles * rnd.uniform(70, 95))
+
+
+def listing_html(count: int, today: datetime.date) -> str:
+    rows = []
+    for i in range(count):
+        place = PLACES[i % len(PLACES)]
+        name = f"{place} Canine Society {KINDS[i % len(KINDS)]} {i}"
+        date = today + datetime.timedelta(days=14 + i % 180)
+        css = "tableRow" if i % 2 == 0 else "alternateRow"
+        rows.append(f'<tr class="{css}"><td><div class="showName">{name}</div></td><td>{date:%d %b %Y}</td>'
+                    f'<td>{place} Showground</td><td></td><td><a href="shows/Fake-Show-{i}.aspx">Details</a></td></tr>')
+    return ('<!DOCTYPE html><html><head><title>Shows To Enter</title></head><body><form method="post" id="form1">'
+            f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate_token("listing")}" />'
+            '<table class="showTable"><tr class="headerRow"><th>Show</th><th>Date</th></tr>'
+            + "".join(rows) + "</table></form></body></html>")
+
+
+def year_listing_html(year: int) -> str:
+    rows = "".join(f'<tr><td>Fake {PLACES[i % len(PLACES)]} Championship Show {year}</td><td>{year}-06-{i % 28 + 1:02d}</td>'
+                   f'<td><a href="/show-results/Fake-{year}-{i}.aspx">Details</a></td></tr>'
+                   for i in range(SHOWS_PER_RESULTS_YEAR))
+    return f"<html><body><table>{rows}</table></body></html>"
+
+
+def create_app(config: FakeConfig, show_count: int) -> FastAPI:
+    app = FastAPI(title="fake upstream")
+    stats = Counter()
+    stats_lock = threading.Lock()
+    fixtures = {name: (FIXTURES / name).read_text(encoding="utf-8") for name in (
+        "show_detail.html", "results_before_postback.html", "results_golden.html", "higham_shows.html")}
+    pdfs = {name: (FIXTURES / name).read_bytes() for name in set(SCHEDULES)}
+    listing = listing_html(show_count, datetime.date.today())
+    listing_etag = f'"{hashlib.sha1(listing.encode()).hexdigest()[:16]}"'
+    results_form = with_viewstate(
+        '<html><body><form method="post"><input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="" />'
+        '<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="C0FFEE00" />'
+        '<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="fake" />'
+        '<select name="ctl00$ContentPlaceHolder$ddlYear">'
+        + "".join(f"<option>{y}</option>" for y in range(2007, datetime.date.today().year + 1))
+        + "</select></form></body></html>", "results")
+    drive_files = {}
+    drive_ids = itertools.count(1)
+
+    @app.middleware("http")
+    async def inject(request: Request, call_next):
+        prefix = request.url.path.strip("/").split("/", 1)[0]
+        if prefix == "_fake":
+            return await call_next(request)
+        with stats_lock:
+            stats[f"{request.method} /{prefix}"] += 1
+        delay = config.setting(prefix, "latency_ms") + config.random.uniform(0, config.setting(prefix, "jitter_ms"))
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if config.random.random() < config.setting(prefix, "error_rate"):
+            with stats_lock:
+                stats[f"injected_error /{prefix}"] += 1
+            return PlainTextResponse("Injected upstream error", status_code=config.setting(prefix, "error_status"))
+        return await call_next(request)
+
+    # === Control ===
+    @app.get("/_fake/config")
+    async def get_config():
+        return config.to_dict()
+
+    @app.post("/_fake/config")
+    async def set_config(request: Request):
+        config.update(await request.json())
+        return config.to_dict()
+
+    @app.get("/_fake/stats")
+    async def get_stats():
+        with stats_lock:
+            return dict(stats)
+
+    # === Fosse Data ===
+    @app.get("/fossedata/shows/Shows-To-Enter.aspx")
+    async def shows_to_enter(request: Request):
+        if request.headers.get("if-none-match") == listing_etag:
+            return Response(status_code=304)
+        return HTMLResponse(listing, headers={"ETag": listing_etag})
+
+    @app.get("/fossedata/shows/{page}")
+    async def show_detail(page: str):
+        html = fixtures["show_detail.html"].replace("YO8 9NA", fake_postcode(page))
+        return HTMLResponse(with_viewstate(html, page))
+
+    @app.post("/fossedata/shows/{page}")
+    async def show_postback(page: str, request: Request):
+        form = await read_form(request)
+        if not valid_postback(form, page) or "ctl00$ContentPlaceHolder$btnDownloadSchedule" not in form:
+            return HTMLResponse(VIEWSTATE_ERROR, status_code=500)
+        schedule = SCHEDULES[int(hashlib.sha1(page.encode()).hexdigest(), 16) % len(SCHEDULES)]
+        return Response(pdfs[schedule], media_type="application/pdf")
+
+    @app.get("/fossedata/show-results/")
+    async def results_form_page():
+        return HTMLResponse(results_form)
+
+    @app.post("/fossedata/show-results/")
+    async def results_year(request: Request):
+        form = await read_form(request)
+        if not valid_postback(form, "results") or not form.get("ctl00$ContentPlaceHolder$ddlYear"):
+            return HTMLResponse(VIEWSTATE_ERROR, status_code=500)
+        return HTMLResponse(year_listing_html(int(form["ctl00$ContentPlaceHolder$ddlYear"])))
+
+    @app.get("/fossedata/show-results/{page}")
+    async def results_page(page: str):
+        return HTMLResponse(with_viewstate(fixtures["results_before_postback.html"], page))
+
+    @app.post("/fossedata/show-results/{page}")
+    async def results_breed_postback(page: str, request: Request):
+        form = await read_form(request)
+        if not valid_postback(form, page) or not form.get("ctl00$ContentPlaceHolder$ddlBreed"):
+            return HTMLResponse(VIEWSTATE_ERROR, status_code=500)
+        return HTMLResponse(with_viewstate(fixtures["results_golden.html"], page))
+
+    # === Higham Press ===
+    @app.get("/higham/shows")
+    async def higham_shows():
+        return HTMLResponse(fixtures["higham_shows.html"])
+
+    # === Google Maps ===
+    @app.get("/maps/maps/api/distancematrix/json")
+    async def distance_matrix(origins: str = "", destinations: str = "", key: str = ""):
+        if not key:
+            return JSONResponse({"status": "REQUEST_DENIED", "rows": []})
+        miles, seconds = fake_drive(origins, destinations)
+        element = {"status": "OK", "distance": {"text": f"{miles} mi", "value": int(miles * 1609)},
+                   "duration": {"text": f"{seconds // 60} mins", "value": seconds}}
+        return {"status": "OK", "origin_addresses": [origins], "destination_addresses": [destinations],
+                "rows": [{"elements": [element]}]}
+
+    @app.get("/maps/maps/api/directions/json")
+    async def directions(origin: str = "", destination: str = "", key: str = ""):
+        if not key:
+            return JSONResponse({"status": "REQUEST_DENIED", "routes": []})
+        miles, seconds = fake_drive(origin, destination)
+        leg = {"distance": {"text": f"{miles} mi", "value": int(miles * 1609)},
+               "duration": {"text": f"{seconds // 60} mins", "value": seconds}}
+        return {"status": "OK", "routes": [{"legs": [leg]}]}
+
+    # === GOV.UK fuel prices ===
+    @app.get("/gov/{path:path}")
+    async def fuel_prices(path: str, request: Request):
+        if not path.endswith(".csv"):
+            return PlainTextResponse("Not found", status_code=404)
+        start = datetime.date.today() - datetime.timedelta(weeks=52 * 20)
+        rows = [f"{start + datetime.timedelta(weeks=w):%d/%m/%Y},{135 + w % 7}.{w % 10},{142 + w % 5}.{w % 10}"
+                for w in range(52 * 20 + 1)]
+        body = ("Date,ULSP,Diesel\n" + "\n".join(rows) + "\n").encode()
+        return byte_range_response(body, request.headers.get("range"), "text/csv")
+
+    # === Google Drive v3 ===
+    def drive_metadata(file_id):
+        f = drive_files[file_id]
+        return {"kind": "drive#file", "id": file_id, "name": f["name"], "mimeType": f["mimeType"]}
+
+    def read_upload(body: bytes, content_type: str):
+        # multipart/related uploads carry JSON metadata then the media; plain uploads are media only
+        if not content_type.startswith("multipart/"):
+            return {}, body, content_type
+        message = email.message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        parts = message.get_payload()
+        metadata = json.loads(parts[0].get_payload(decode=True) or b"{}")
+        return metadata, parts[1].get_payload(decode=True) or b"", parts[1].get_content_type()
+
+    @app.get("/drive/drive/v3/files")
+    async def drive_list(q: str = ""):
+        name = re.search(r"name\s*=\s*'([^']*)'", q)
+        matches = [file_id for file_id, f in drive_files.items() if not name or f["name"] == name.group(1)]
+        return {"files": [drive_metadata(file_id) for file_id in matches]}
+
+    @app.get("/drive/drive/v3/files/{file_id}")
+    async def drive_get(file_id: str, alt: str = ""):
+        if file_id not in drive_files:
+            return JSONResponse({"error": {"code": 404, "message": "File not found"}}, status_code=404)
+        if alt == "media":
+            return Response(drive_files[file_id]["content"], media_type=drive_files[file_id]["mimeType"])
+        return drive_metadata(file_id)
+
+    @app.post("/drive/upload/drive/v3/files")
+    async def drive_create(request: Request):
+        metadata, content, mime_type = read_upload(await request.body(), request.headers.get("content-type", ""))
+        file_id = f"fake{next(drive_ids)}"
+        drive_files[file_id] = {"name": metadata.get("name", file_id), "mimeType": mime_type, "content": content}
+        return drive_metadata(file_id)
+
+    @app.patch("/drive/upload/drive/v3/files/{file_id}")
+    async def drive_update(file_id: str, request: Request):
+        if file_id not in drive_files:
+            return JSONResponse({"error": {"code": 404, "message": "File not found"}}, status_code=404)
+        metadata, content, mime_type = read_upload(await request.body(), request.headers.get("content-type", ""))
+        drive_files[file_id].update(content=content, mimeType=mime_type, **({"name": metadata["name"]} if "name" in metadata else {}))
+        return drive_metadata(file_id)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake upstream server for offline pipeline runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--shows", type=int, default=REAL_SHOW_VOLUME * 10, help="Rows on the fake listing (default 10x real volume)")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = FakeConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.error_status, args.seed)
+    uvicorn.run(create_app(config, args.shows), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Where each file in bench/fixtures came from, kept in fixtures/SOURCES.json: "synthetic"
+(make_fixtures.py, or markup written by hand) or "recorded <date> from <url>"
+(record_fixtures.py). Timings on synthetic inputs are indicative only, so the
+benchmark suite only gates on cases whose fixtures were all recorded.
+"""
+import datetime
+import json
+from pathlib import Path
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+SOURCES_FILE = FIXTURES / "SOURCES.json"
+
+
+def sources() -> dict:
+    if SOURCES_FILE.exists():
+        return json.loads(SOURCES_FILE.read_text())
+    return {}
+
+
+def mark(name, url=None):
+    # Records name as captured from url, or as synthetic when url is None
+    entries = sources()
+    entries[name] = f"recorded {datetime.date.today().isoformat()} from {url}" if url else "synthetic"
+    SOURCES_FILE.write_text(json.dumps(entries, indent=2, sort_keys=True) + "\n")
+
+
+def is_recorded(name) -> bool:
+    return sources().get(name, "synthetic").startswith("recorded")
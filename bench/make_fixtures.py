@@ -0,0 +1,171 @@
+"""
+Builds the synthetic fixtures the benchmark suite falls back on: results pages
+before and after the breed postback, a Higham listing page and three schedule
+PDFs (single-breed, all-breed, and a 120-page all-breed schedule). They mirror
+the markup and layout the parsers rely on, so throughput is comparable to real
+pages. Real captures from bench/record_fixtures.py overwrite them.
+
+Run from the repo root:  python bench/make_fixtures.py
+"""
+import base64
+import datetime
+import random
+import sys
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+import fixture_sources
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+PLACES = ("Selby", "Ripon", "Harrogate", "Malton", "Whitby", "Kendal", "Penrith", "Carlisle", "Durham", "Goole")
+FORENAMES = ("Anne", "Brian", "Carol", "David", "Elaine", "Frank", "Gillian", "Harry", "Janet", "Keith")
+SURNAMES = ("Smith", "Jones", "Taylor", "Brown", "Wilson", "Evans", "Thomas", "Walker", "Wright", "Hughes")
+GUNDOG_BREEDS = (
+    "Retriever (Flat Coated)", "Retriever (Golden)", "Retriever (Labrador)", "Spaniel (Cocker)",
+    "Spaniel (English Springer)", "Pointer", "Setter (Irish)", "Weimaraner",
+)
+ALL_BREEDS = (
+    "Beagle", "Whippet", "Border Collie", "Rough Collie", "Bulldog", "Dalmatian", "Boxer",
+    "Dobermann", "Border Terrier", "Cairn Terrier", "Pug", "Cavalier King Charles Spaniel",
+    "Golden Retriever", "Labrador Retriever", "Cocker Spaniel", "Irish Setter", "Pointer",
+    "Shih Tzu", "Lhasa Apso", "Samoyed", "Siberian Husky", "Newfoundland", "Great Dane",
+)
+CLASSES = ("Minor Puppy", "Puppy", "Junior", "Yearling", "Novice", "Graduate", "Post Graduate", "Limit", "Open", "Veteran")
+PLACINGS = ("1st Place", "2nd Place", "3rd Place", "Reserve (4th Place)", "VHC (5th Place)")
+
+
+def person():
+    return f"{random.choice(('Mr', 'Mrs', 'Ms', 'Miss'))} {random.choice(FORENAMES)} {random.choice(SURNAMES)}"
+
+
+def dog():
+    return f"{random.choice(PLACES)}{random.choice(('gold', 'mist', 'dawn', 'brook'))} {random.choice(('Star', 'Echo', 'Magic', 'Legend'))} At {random.choice(PLACES)}"
+
+
+def hidden_fields(nbytes):
+    viewstate = base64.b64encode(random.randbytes(nbytes)).decode()
+    validation = base64.b64encode(random.randbytes(nbytes // 20)).decode()
+    return (f'<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />'
+            f'<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />'
+            f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />'
+            f'<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="B1D2A3C4" />'
+            f'<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{validation}" />')
+
+
+def breed_results(breed):
+    lines = [f"<h4>{breed} - Judge: {person()}</h4>"]
+    for n, name in enumerate(CLASSES, 800):
+        for sex in ("Dog", "Bitch"):
+            entries = random.randint(3, 14)
+            lines.append(f"<p>Class {n}. {name} {sex} (Entries: {entries} Absentees: {random.randint(0, 3)})</p>")
+            for placing in PLACINGS[:min(entries, len(PLACINGS))]:
+                lines.append(f"<p>{placing}: {random.randint(1000, 3999)} - {dog()} ({person()})</p>")
+    lines.append(f"<p>{random.randint(1000, 3999)} - {dog()} ({person()}) for Dog CC</p>")
+    lines.append(f"<p>{random.randint(1000, 3999)} - {dog()} ({person()}) for Bitch CC</p>")
+    lines.append(f"<p>Best of Breed: {random.randint(1000, 3999)} - {dog()} ({person()})</p>")
+    lines.append(f"<p>Best Puppy: {random.randint(1000, 3999)} - {dog()} ({person()})</p>")
+    return "\n".join(lines)
+
+
+def results_page(body):
+    return (f'<!DOCTYPE html><html><head><title>Show Results - Fosse Data</title></head><body>'
+            f'<form method="post" action="./results.aspx" id="form1">{hidden_fields(40000)}'
+            f'<div class="container">{body}</div></form></body></html>')
+
+
+def make_results_pages():
+    options = "".join(f'<option value="{i}">{b}</option>' for i, b in enumerate(GUNDOG_BREEDS, 1))
+    select = (f'<select name="ctl00$ContentPlaceHolder$ddlBreed" id="ContentPlaceHolder_ddlBreed">'
+              f'<option value="">(All Breeds)</option>{options}</select>')
+    summary = "".join(f"<tr><td>{b}</td><td>{random.randint(10, 90)} entries</td></tr>" for b in GUNDOG_BREEDS)
+    before = results_page(f"<h1>Selby Canine Society Championship Show</h1>{select}<table>{summary}</table>")
+    (FIXTURES / "results_before_postback.html").write_text(before, encoding="utf-8")
+
+    sections = [breed_results(b) for b in GUNDOG_BREEDS]
+    groups = "".join(f"<p>Group - {p}: {random.randint(1000, 3999)} - {dog()}, Breed: {random.choice(GUNDOG_BREEDS)} ({person()})</p>"
+                     for p in PLACINGS[:4])
+    after = results_page(f"<h1>Selby Canine Society Championship Show</h1>{select}<h3>Gundog Group</h3>"
+                         + "\n".join(sections) + f"<h3>Gundog Group Results</h3>{groups}<h3>Hound Group</h3>")
+    (FIXTURES / "results_golden.html").write_text(after, encoding="utf-8")
+
+
+def make_higham_page(count=60):
+    start = datetime.date(2025, 8, 1)
+    cards = []
+    for i in range(count):
+        day = start + datetime.timedelta(days=i)
+        closed = "<p>Entries are now closed</p>" if i % 7 == 0 else ""
+        end = f'<span>to</span><time datetime="{day + datetime.timedelta(days=1)}">+1</time>' if i % 5 == 0 else ""
+        cards.append(f"""<div class="grid grid-cols-3 gap-4">
+<a class="text-lg font-bold" href="/shows/{random.choice(PLACES).lower()}-canine-society-{i}">{random.choice(PLACES)} Canine Society Open Show</a>
+<div><span>Show date</span><time datetime="{day}">{day:%d %b %Y}</time>{end}</div>
+<div><span>Entry closing date</span><time datetime="{day - datetime.timedelta(days=28)}">closes</time></div>
+{closed}</div>""")
+    pagination = "".join(f'<button aria-label="Go to page {n}">{n}</button>' for n in range(1, 6))
+    html = f'<!DOCTYPE html><html><head><title>Shows - Higham Press</title></head><body><main>{"".join(cards)}</main><nav>{pagination}</nav></body></html>'
+    (FIXTURES / "higham_shows.html").write_text(html, encoding="utf-8")
+
+
+def write_pdf(path, pages):
+    # pages: list of lists of text lines, laid out top to bottom like a printed schedule
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        y = 50
+        for line in lines:
+            page.insert_text((50, y), line, fontsize=9)
+            y += 12
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def schedule_front(name, show_type):
+    return [
+        name, f"{show_type}", f"To be held at {random.choice(PLACES)} Showground", f"Secretary: {person()}",
+        "First Entry per dog £4.50", "Subsequent Entries per dog £3.00", "Catalogue £3.50 pre-paid",
+        "Rules and regulations of The Royal Kennel Club apply.",
+    ]
+
+
+def make_schedule_pdfs():
+    single = schedule_front("Golden Retriever Club of Scotland Championship Show", "Championship Show")
+    single += [f"Dogs: {person()}", f"Bitches: {person()}"]
+    single += [f"{n}. {c} {s}" for n, (c, s) in enumerate(((c, s) for c in CLASSES for s in ("Dog", "Bitch")), 1)]
+    write_pdf(FIXTURES / "schedule_single_breed.pdf", [single, single[8:]])
+
+    def breed_page(breeds):
+        lines = []
+        for breed in breeds:
+            lines.append(f"{breed} Judge: {person()}")
+            lines.extend(f"{random.randint(1, 400)}. {c}" for c in CLASSES[:4])
+        return lines
+
+    front = schedule_front("Selby Canine Society Open Show", "Open Show")
+    write_pdf(FIXTURES / "schedule_all_breed.pdf",
+              [front] + [breed_page(ALL_BREEDS[i:i + 3]) for i in range(0, len(ALL_BREEDS), 3)])
+
+    pages = [schedule_front("Northern Counties Championship Show", "Championship Show")]
+    for n in range(120):
+        breeds = [f"{random.choice(ALL_BREEDS)} (Section {n})" for _ in range(3)]
+        if n == 97:
+            breeds[1] = "Golden Retriever"
+        pages.append(breed_page(breeds))
+    write_pdf(FIXTURES / "schedule_large.pdf", pages)
+
+
+def main():
+    random.seed(int(sys.argv[1]) if len(sys.argv) > 1 else 2025)
+    FIXTURES.mkdir(exist_ok=True)
+    make_results_pages()
+    make_higham_page()
+    make_schedule_pdfs()
+    for name in ("results_before_postback.html", "results_golden.html", "higham_shows.html",
+                 "schedule_single_breed.pdf", "schedule_all_breed.pdf", "schedule_large.pdf"):
+        fixture_sources.mark(name)
+    print(f"Fixtures written to {FIXTURES}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Captures live pages and schedules into bench/fixtures so the benchmark suite runs
+on real inputs. Needs network access; everything after that runs offline.
+
+Run from the repo root, e.g.:
+
+    python bench/record_fixtures.py \
+        --detail https://www.fossedata.co.uk/shows/Some-Show.aspx \
+        --results https://www.fossedata.co.uk/show-results/Some-Show.aspx \
+        --schedule single_breed=https://www.fossedata.co.uk/shows/Golden-Club.aspx \
+        --schedule all_breed=https://www.fossedata.co.uk/shows/All-Breed-Open.aspx \
+        --schedule large=https://www.fossedata.co.uk/shows/Championship.aspx
+
+The Shows-To-Enter listing and the first Higham listing page are always captured.
+Each capture is marked recorded in fixtures/SOURCES.json, which lets run_benchmarks.py
+gate on the cases that use it.
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import fixture_sources  # noqa: E402
+import http_client  # noqa: E402
+from fossedata_core import SHOWS_TO_ENTER_URL, download_schedule_via_post  # noqa: E402
+from fossedata_results import fetch_show_results_html  # noqa: E402
+from higham_links import HIGHAM_BASE_URL  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+def save(name, text, url):
+    (FIXTURES / name).write_text(text, encoding="utf-8")
+    fixture_sources.mark(name, url)
+    print(f"[INFO] Recorded {name} ({len(text)} chars)")
+
+
+async def record_higham():
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await http_client.goto(page, f"{HIGHAM_BASE_URL}/shows")
+        await page.wait_for_selector("button[aria-label^='Go to page']")
+        html = await page.content()
+        await browser.close()
+    save("higham_shows.html", html, f"{HIGHAM_BASE_URL}/shows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--detail", help="Show detail page to save as show_detail.html")
+    parser.add_argument("--results", help="Multi-breed results page, saved before and after the breed postback")
+    parser.add_argument("--schedule", action="append", default=[], metavar="KIND=SHOW_URL",
+                        help="Schedule PDF to save as schedule_KIND.pdf (single_breed, all_breed, large)")
+    parser.add_argument("--skip-higham", action="store_true", help="Do not launch a browser for the Higham listing")
+    args = parser.parse_args()
+
+    FIXTURES.mkdir(exist_ok=True)
+    save("shows_to_enter.html", http_client.get(SHOWS_TO_ENTER_URL, timeout=30).text, SHOWS_TO_ENTER_URL)
+
+    if args.detail:
+        save("show_detail.html", http_client.get(args.detail, timeout=30).text, args.detail)
+
+    if args.results:
+        session = http_client.new_session()
+        save("results_before_postback.html", session.get(args.results, timeout=30).text, args.results)
+        after = fetch_show_results_html(session, args.results)
+        if after is None:
+            print("[WARN] Results page has no Golden Retriever results; results_golden.html not updated.")
+        else:
+            save("results_golden.html", after, args.results)
+
+    for spec in args.schedule:
+        kind, _, show_url = spec.partition("=")
+        path = FIXTURES / f"schedule_{kind}.pdf"
+        pdf_path, _ = download_schedule_via_post(show_url, str(path))
+        if pdf_path:
+            fixture_sources.mark(path.name, show_url)
+            print(f"[INFO] Recorded {path.name}")
+        else:
+            print(f"[WARN] No schedule downloaded for {show_url}")
+
+    if not args.skip_higham:
+        asyncio.run(record_higham())
+
+
+if __name__ == "__main__":
+    main()
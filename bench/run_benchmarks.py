@@ -0,0 +1,187 @@
+"""
+Offline throughput benchmarks for every parser, run against bench/fixtures.
+
+Each case is timed best-of-N and compared with bench/baseline.json; a case slower
+than its baseline by more than the threshold is flagged, and the run exits 1 if the
+case's fixtures were recorded from the live sites (fixtures/SOURCES.json). On the
+synthetic fixtures regressions are reported but do not fail the run; capture real
+pages with bench/record_fixtures.py to make them gate. Baselines are machine-specific:
+save one on the reference branch first.
+
+Run from the repo root:
+    python bench/run_benchmarks.py --save-baseline     # on the reference branch
+    python bench/run_benchmarks.py                     # after a change
+    python bench/run_benchmarks.py --case pdf --threshold 0.1
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fossedata_core import (  # noqa: E402
+    extract_judges,
+    parse_pdf_for_info,
+    parse_postal_close_date_from_html,
+    parse_show_detail_page,
+    parse_show_list,
+    read_schedule_lines,
+)
+from fossedata_results import parse_show_results, scrape_show_results  # noqa: E402
+from higham_links import parse_higham_page  # noqa: E402
+import fixture_sources  # noqa: E402
+
+BENCH = Path(__file__).resolve().parent
+FIXTURES = BENCH / "fixtures"
+BASELINE_FILE = BENCH / "baseline.json"
+DEFAULT_THRESHOLD = 0.20  # Flag anything more than 20% slower than its baseline
+
+SCHEDULES = {
+    "single_breed": "Golden Retriever Club of Scotland Championship Show",
+    "all_breed": "Selby Canine Society Open Show",
+    "large": "Northern Counties Championship Show",
+}
+
+
+class FixtureResponse:
+    def __init__(self, text):
+        self.text = text
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+class FixtureSession:
+    """Stands in for a requests session: GET serves the results page, POST the breed postback."""
+
+    def __init__(self, before, after):
+        self.before = FixtureResponse(before)
+        self.after = FixtureResponse(after)
+
+    def get(self, url, **kwargs):
+        return self.before
+
+    def post(self, url, data=None, **kwargs):
+        return self.after
+
+
+def read(name):
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def build_cases():
+    # name -> zero-argument callable; fixtures are loaded once, outside the timings
+    listing = read("shows_to_enter.html")
+    detail = read("show_detail.html")
+    before = read("results_before_postback.html")
+    golden = read("results_golden.html")
+    higham = read("higham_shows.html")
+    session = FixtureSession(before, golden)
+
+    cases = {
+        "listing: parse_show_list": lambda: parse_show_list(listing),
+        "detail: parse_show_detail_page": lambda: parse_show_detail_page(detail),
+        "detail: parse_postal_close_date_from_html": lambda: parse_postal_close_date_from_html(detail),
+        "results: parse_show_results": lambda: parse_show_results(golden, "Bench Show", "1 Jan 2025"),
+        "results: scrape_show_results (with postback)":
+            lambda: scrape_show_results(session, "Bench Show", "1 Jan 2025", "https://bench.invalid/results.aspx"),
+        "higham: parse_higham_page": lambda: parse_higham_page(higham),
+    }
+    for kind, show_name in SCHEDULES.items():
+        path = str(FIXTURES / f"schedule_{kind}.pdf")
+        lines = read_schedule_lines(path)
+        cases[f"pdf {kind}: parse_pdf_for_info"] = lambda p=path, n=show_name: parse_pdf_for_info(p, n)
+        cases[f"pdf {kind}: extract_judges"] = lambda l=lines, n=show_name: extract_judges(l, n)
+    return cases
+
+
+def case_fixtures(name):
+    # The fixture files a case reads
+    if name.startswith("listing"):
+        return ["shows_to_enter.html"]
+    if name.startswith("detail"):
+        return ["show_detail.html"]
+    if name.startswith("results"):
+        return ["results_before_postback.html", "results_golden.html"]
+    if name.startswith("higham"):
+        return ["higham_shows.html"]
+    kind = name.split(":")[0].removeprefix("pdf ")
+    return [f"schedule_{kind}.pdf"]
+
+
+def time_case(fn, min_seconds=0.2, repeat=5):
+    # Scales the loop count so each repeat runs for at least min_seconds, then keeps the best
+    number = 1
+    while True:
+        elapsed = timeit.timeit(fn, number=number)
+        if elapsed >= min_seconds or number >= 10000:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_seconds / elapsed) + 1)
+    best = min(timeit.repeat(fn, number=number, repeat=repeat))
+    return best / number * 1000
+
+
+def load_baseline():
+    if BASELINE_FILE.exists():
+        return json.loads(BASELINE_FILE.read_text())
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline parser benchmarks")
+    parser.add_argument("--case", help="Only run cases whose name contains this text")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown against the baseline, as a fraction (default 0.20)")
+    parser.add_argument("--save-baseline", action="store_true", help="Record these timings as the new baseline")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = build_cases()
+    if args.case:
+        cases = {name: fn for name, fn in cases.items() if args.case in name}
+    baseline = load_baseline()
+
+    timings = {}
+    regressions = []
+    indicative = []     # Regressions on synthetic fixtures, reported without failing the run
+    print(f"{'case':<48}{'ms/op':>10}{'ops/s':>10}{'baseline':>10}{'change':>9}")
+    for name, fn in cases.items():
+        # The parsers log skipped rows and fallbacks; keep them out of the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            ms = time_case(fn, repeat=args.repeat)
+        timings[name] = round(ms, 4)
+        base = baseline.get(name)
+        if base:
+            change = ms / base - 1
+            flag = ""
+            if change > args.threshold:
+                if all(fixture_sources.is_recorded(f) for f in case_fixtures(name)):
+                    flag = "  REGRESSION"
+                    regressions.append(name)
+                else:
+                    flag = "  REGRESSION (synthetic fixtures)"
+                    indicative.append(name)
+            print(f"{name:<48}{ms:>10.3f}{1000 / ms:>10.1f}{base:>10.3f}{change:>+8.0%}{flag}")
+        else:
+            print(f"{name:<48}{ms:>10.3f}{1000 / ms:>10.1f}{'-':>10}{'-':>9}")
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps({**baseline, **timings}, indent=2, sort_keys=True))
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return
+    if indicative:
+        print(f"{len(indicative)} case(s) on synthetic fixtures slower than baseline by more than "
+              f"{args.threshold:.0%}; not failing the run until real pages are recorded")
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
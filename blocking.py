@@ -0,0 +1,123 @@
+# blocking.py
+
+import os
+import sys
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from profiling import frame_label
+
+BLOCKING_WORKERS = int(os.getenv("BLOCKING_WORKERS", 4))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD_MS", 250)) / 1000
+LOOP_LAG_INTERVAL = 0.05   # Heartbeat period of the lag monitor
+STALL_STACK_DEPTH = 12     # Innermost frames logged for a stalled loop
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> ThreadPoolExecutor:
+    # Shared pool for blocking pipeline steps, created on first use
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=BLOCKING_WORKERS, thread_name_prefix="blocking")
+        return _executor
+
+
+def shutdown(wait: bool = True):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+async def run_blocking(fn, *args, **kwargs):
+    # Runs a synchronous step on the shared pool. The caller's context goes with it,
+    # so the run report and progress events still see the step's requests and stages.
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor(), call)
+
+
+class LoopLagMonitor:
+    """
+    Watches an event loop for callbacks that hold it too long. A heartbeat task on
+    the loop records how late each wake-up is; a watchdog thread notices when the
+    heartbeat stops and logs the loop thread's stack while it is still stuck, which
+    names the blocking callback.
+    """
+
+    def __init__(self, name: str, threshold: float = LOOP_LAG_THRESHOLD, interval: float = LOOP_LAG_INTERVAL):
+        self.name = name
+        self.threshold = threshold
+        self.interval = interval
+        self._last_beat = time.monotonic()
+        self._reported = False
+        self._task = None
+        self._stop = threading.Event()
+        self._watchdog = None
+        self._loop_thread_id = None
+
+    def start(self):
+        # Must be called from the loop being watched
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name=f"loop-watchdog-{self.name}", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join()
+
+    async def _beat(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - before - self.interval)
+            metrics.LOOP_LAG_SECONDS.observe(lag, loop=self.name)
+            if lag > self.threshold:
+                print(f"[WARN] Event loop '{self.name}' was blocked for {lag * 1000:.0f} ms.")
+            self._last_beat = now
+            self._reported = False
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            stalled = time.monotonic() - self._last_beat - self.interval
+            if stalled > self.threshold and not self._reported:
+                self._reported = True
+                metrics.LOOP_STALLS.inc(loop=self.name)
+                print(f"[WARN] Event loop '{self.name}' stalled for over {stalled * 1000:.0f} ms in:\n{self._loop_stack()}")
+
+    def _loop_stack(self) -> str:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = []
+        while frame is not None and len(stack) < STALL_STACK_DEPTH:
+            stack.append(f"    {frame_label(frame.f_code)} line {frame.f_lineno}")
+            frame = frame.f_back
+        return "\n".join(stack)
+
+
+@asynccontextmanager
+async def monitored_loop(name: str):
+    # Watches the running loop for the duration of the block
+    monitor = LoopLagMonitor(name)
+    monitor.start()
+    try:
+        yield monitor
+    finally:
+        await monitor.stop()
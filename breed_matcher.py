@@ -0,0 +1,143 @@
+# breed_matcher.py
+
+import re
+from pathlib import Path
+from typing import Iterable, Optional
+from kc_breeds import KC_BREEDS, LISTING_KEYWORDS
+
+KC_BREEDS_FILE = "kc_breeds.txt"  # Written by kc_scraper.fetch_kc_breeds()
+
+# FosseData results pages name breeds type-first, e.g. "Retriever (Labrador)", "Spaniel (Cocker)"
+BREED_TYPE_WORDS = {"retriever", "spaniel", "setter", "terrier", "pointer", "hound", "collie", "poodle", "schnauzer"}
+
+
+def _breed_variants(name: str) -> Iterable[str]:
+    # Yields the lowercased breed name plus its type-first form when it has one
+    words = name.lower().split()
+    if not words:
+        return
+    yield " ".join(words)
+    if len(words) > 1 and words[-1] in BREED_TYPE_WORDS:
+        yield f"{words[-1]} ({' '.join(words[:-1])})"
+
+
+def _trie_regex(names: Iterable[str]) -> str:
+    # Builds one regex from a character trie of the names, so shared prefixes are
+    # tested once instead of once per breed. Spaces match any run of whitespace.
+    trie = {}
+    for name in names:
+        node = trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node) -> str:
+        end = "" in node
+        branches = []
+        for char in sorted(k for k in node if k):
+            atom = r"\s+" if char == " " else re.escape(char)
+            branches.append(atom + render(node[char]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            return "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+class BreedMatcher:
+    """
+    Case-insensitive matcher for a set of breed names, compiled once into a single
+    regex. Names only match as whole words, so "toy" does not match "Stoyle", though
+    plurals do ("Cocker Spaniels Association", "Setters Club").
+    """
+
+    def __init__(self, breeds: Iterable[str]):
+        names = {variant for breed in breeds for variant in _breed_variants(breed)}
+        self.breeds = frozenset(names)
+        # The trie regex is greedy, so the longest breed name at a position wins; the name
+        # itself (without any plural ending) is the "breed" group
+        self._pattern = re.compile(r"(?<!\w)(?P<breed>" + _trie_regex(names) + r")(?:e?s)?(?!\w)", re.IGNORECASE)
+
+    def search(self, text: str) -> Optional[str]:
+        # Returns the first breed name found in text (normalised), or None
+        match = self._pattern.search(text)
+        return self._normalise(match.group("breed")) if match else None
+
+    def match_start(self, text: str) -> Optional[str]:
+        # Returns the breed name text starts with, or None
+        match = self._pattern.match(text.lstrip())
+        return self._normalise(match.group("breed")) if match else None
+
+    def findall(self, text: str) -> set:
+        return {self._normalise(m.group("breed")) for m in self._pattern.finditer(text)}
+
+    def contains_any(self, text: str, exclude: Iterable[str] = ()) -> bool:
+        # True if text names any breed other than those in exclude
+        excluded = {e.lower() for e in exclude}
+        return any(self._normalise(m.group("breed")) not in excluded for m in self._pattern.finditer(text))
+
+    @staticmethod
+    def _normalise(found: str) -> str:
+        return " ".join(found.lower().split())
+
+
+def load_breed_matcher(path: str = KC_BREEDS_FILE, keywords: Iterable[str] = ()) -> BreedMatcher:
+    # Builds a matcher from kc_breeds.KC_BREEDS plus the scraped breed list, if present,
+    # and any extra keywords
+    breeds = list(KC_BREEDS) + list(keywords)
+    if Path(path).exists():
+        try:
+            with open(path, "r") as f:
+                breeds.extend(line.strip() for line in f if line.strip())
+        except Exception as e:
+            print(f"[WARN] Failed to read {path}: {e}")
+    return BreedMatcher(breeds)
+
+
+_breed_matcher = None
+_listing_matcher = None
+
+def get_breed_matcher() -> BreedMatcher:
+    # Shared matcher for real breed names, built on first use
+    global _breed_matcher
+    if _breed_matcher is None:
+        _breed_matcher = load_breed_matcher()
+    return _breed_matcher
+
+def get_listing_matcher() -> BreedMatcher:
+    # Shared matcher for filtering show names: breed names plus the group and catch-all
+    # keywords, which are too broad to find breeds in schedule text
+    global _listing_matcher
+    if _listing_matcher is None:
+        _listing_matcher = load_breed_matcher(keywords=LISTING_KEYWORDS)
+    return _listing_matcher
+
+def refresh_breed_matcher(path: str = KC_BREEDS_FILE) -> BreedMatcher:
+    # Rebuilds the shared matchers, e.g. after kc_scraper has written a new breed list
+    global _breed_matcher, _listing_matcher
+    _breed_matcher = load_breed_matcher(path)
+    _listing_matcher = load_breed_matcher(path, keywords=LISTING_KEYWORDS)
+    return _breed_matcher
+
+
+if __name__ == "__main__":
+    # Regression check: show names the listing must exclude, and ones it must keep
+    matcher = load_breed_matcher(keywords=LISTING_KEYWORDS)
+    for name in ("Cocker Spaniels Association", "Bulldogs Club Open Show", "Setters Club",
+                 "Border Terriers Championship Show", "Labrador Retrievers of the North",
+                 "Working & Pastoral Breeds Association"):
+        assert matcher.search(name), f"{name!r} should name a breed"
+    for name in ("Stoyle Canine Society Open Show", "Malton Canine Society Championship Show"):
+        assert not matcher.search(name), f"{name!r} names {matcher.search(name)!r}"
+    assert matcher.search("Cocker Spaniels Association") == "cocker spaniel"
+
+    # Schedule text: only real breed names count, not the listing keywords
+    breeds = load_breed_matcher()
+    assert not breeds.contains_any("Labrador Retrievers", exclude=("labrador retriever",))
+    golden_club = "Northern Golden Retriever Association\nOpen Show (Limited to members)\nDogs: Mr A Smith"
+    assert not breeds.contains_any(golden_club, exclude=("golden retriever",)), breeds.findall(golden_club)
+    assert breeds.contains_any("Golden Retriever\nBorder Collie", exclude=("golden retriever",))
+    print("[INFO] Breed matcher checks passed.")
@@ -0,0 +1,134 @@
+# columnar.py
+
+import os
+import json
+import shutil
+import zipfile
+import tempfile
+from typing import Iterable, List, Optional
+from golden_store import BREED, PLACEMENT_COLUMNS
+from store import RESULT_FIELDS, JSON_FIELDS, atomic_write
+
+# Typed Parquet copies of the CSV exports, for loading into pandas. The results are one
+# file; the golden history is a dataset partitioned by show year (year=2007/..., ...).
+PARQUET_ENGINE = "pyarrow"
+
+RESULT_DATES = ["show_date", "entry_close"]
+RESULT_FLOATS = ["first_entry_fee", "subsequent_entry_fee", "catalogue_fee", "distance_miles",
+                 "duration_hours", "estimated_cost", "overnight_cost"]
+RESULT_CATEGORIES = ["type"]
+
+HISTORY_COLUMNS = ["show", "show_date", "year", "breed", "judge", "class", "placement", "dog", "owners",
+                   "entries", "absentees"]
+HISTORY_CATEGORIES = ["show", "breed", "judge", "class", "placement"]
+
+
+def parquet_path(csv_path: str) -> str:
+    # results.csv -> results.parquet, golden_results.csv -> golden_results.parquet (a directory)
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def _pandas():
+    try:
+        import pandas
+        import pyarrow  # noqa: F401 - the Parquet engine
+    except ImportError as e:
+        print(f"[WARN] Parquet exports need pandas and pyarrow: {e}")
+        return None
+    return pandas
+
+
+def results_frame(results: Iterable[dict]):
+    pd = _pandas()
+    if pd is None:
+        return None
+    df = pd.DataFrame(list(results), columns=RESULT_FIELDS)
+    for column in RESULT_DATES:
+        df[column] = pd.to_datetime(df[column], errors="coerce")
+    for column in RESULT_FLOATS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    for column in RESULT_CATEGORIES:
+        df[column] = df[column].astype("category")
+    df["drive_time_minutes"] = pd.to_numeric(df["drive_time_minutes"], errors="coerce").astype("Int64")
+    df["overnight_required"] = df["overnight_required"].astype("boolean")
+    for column in JSON_FIELDS:
+        df[column] = df[column].map(lambda v: None if v is None else json.dumps(v, sort_keys=True)).astype("string")
+    for column in ("show_url", "show_name", "judge_dogs", "judge_bitches", "venue", "postcode"):
+        df[column] = df[column].astype("string")
+    return df
+
+
+def history_frame(placements: Iterable[tuple]):
+    # placements are GoldenStore.iter_placements() tuples
+    pd = _pandas()
+    if pd is None:
+        return None
+    df = pd.DataFrame.from_records(placements, columns=PLACEMENT_COLUMNS)
+    df["show_date"] = pd.to_datetime(df["show_date"], errors="coerce")
+    # Partition values cannot be null: an unparsed date falls back to the year in its text, else 0
+    text_year = pd.to_numeric(df["date"].str.extract(r"(\d{4})")[0], errors="coerce")
+    df["year"] = df["show_date"].dt.year.fillna(text_year).fillna(0).astype("int64")
+    df["breed"] = BREED
+    for column in ("entries", "absentees"):
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int32")
+    for column in ("dog", "owners"):
+        df[column] = df[column].astype("string")
+    for column in HISTORY_CATEGORIES:
+        df[column] = df[column].astype("category")
+    return df[HISTORY_COLUMNS]
+
+
+def write_results(results: Iterable[dict], path: str):
+    df = results_frame(results)
+    if df is None:
+        return
+    atomic_write(path, lambda f: df.to_parquet(f, engine=PARQUET_ENGINE, index=False), "wb")
+
+
+def write_history(placements: Iterable[tuple], directory: str):
+    # Rewrites the partitioned dataset beside the old one, then swaps the directories. A
+    # directory cannot be renamed over a non-empty one, so the swap is two renames; a reader
+    # that lands between them finds no dataset for that moment and should retry.
+    df = history_frame(placements)
+    if df is None:
+        return
+    parent, name = os.path.split(os.path.abspath(directory))
+    tmp = tempfile.mkdtemp(prefix=name + ".", suffix=".tmp", dir=parent)
+    old = tmp + ".old"
+    try:
+        df.to_parquet(tmp, engine=PARQUET_ENGINE, index=False, partition_cols=["year"])
+        if os.path.isdir(directory):
+            os.replace(directory, old)
+        os.replace(tmp, directory)
+    finally:
+        for leftover in (tmp, old):
+            shutil.rmtree(leftover, ignore_errors=True)
+
+
+def zip_dataset(directory: str) -> str:
+    # Packs a partitioned dataset into one file beside it (golden_results.parquet.zip) for
+    # uploading; unzipping it restores the year=... tree
+    path = directory + ".zip"
+
+    def write(f):
+        with zipfile.ZipFile(f, "w", zipfile.ZIP_STORED) as archive:  # Parquet is compressed already
+            for root, _, files in os.walk(directory):
+                for file in sorted(files):
+                    full = os.path.join(root, file)
+                    archive.write(full, os.path.relpath(full, directory))
+
+    atomic_write(path, write, "wb")
+    return path
+
+
+def read_results(path: str = "results.parquet", columns: Optional[List[str]] = None):
+    import pandas as pd
+    return pd.read_parquet(path, engine=PARQUET_ENGINE, columns=columns)
+
+
+def read_history(directory: str = "golden_results.parquet", columns: Optional[List[str]] = None,
+                 years: Optional[Iterable[int]] = None):
+    # Only the requested columns and year partitions are read from disk
+    import pandas as pd
+    filters = [("year", "in", list(years))] if years is not None else None
+    return pd.read_parquet(directory, engine=PARQUET_ENGINE, columns=columns, filters=filters)
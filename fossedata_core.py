@@ -1,35 +1,49 @@
 # Introducing attempt number ? fossedata_core.py
 
 import os
-import io
 import re
 import csv
 import json
 import base64
-import requests
+import hashlib
 import datetime
-import pdfplumber
 import asyncio
+import itertools
+import threading
 from pathlib import Path
-from bs4 import BeautifulSoup
+from urllib.parse import urlsplit
+from bs4 import BeautifulSoup, SoupStrainer
 from dotenv import load_dotenv
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 from dateutil.parser import parse as date_parse
 from playwright.async_api import async_playwright
 from typing import List, Tuple, Optional
 from collections import defaultdict
-from kc_breeds import KC_BREEDS
-from fossedata_results import scrape_all_results
+from concurrent.futures import ThreadPoolExecutor
+from breed_matcher import get_breed_matcher, get_listing_matcher
+from fossedata_results import scrape_all_results, fetch_show_results_html, parse_show_results
 from higham_links import fetch_higham_show_links
+from blocking import run_blocking
+from progress import emit
+from show_index import SHOW_INDEX, show_key
+from fuel_price import FUEL_PRICES, FUEL_PRICE_FILE
+from store import STORE, STORE_DB, atomic_write, file_lock
+from golden_store import GOLDEN_STORE, GOLDEN_DB
+from judge_index import JUDGE_INDEX
+from work_queue import WORK_QUEUE, Task, worker_id
+from jobs import LOCK_DIR
+import http_client
+import blocking
+import metrics
+import profiling
+import run_report
+import upstreams
+import columnar
 
 load_dotenv()
 
 # ===== Load Environment Variables Correctly =====
 google_service_account_key = os.getenv("GOOGLE_SERVICE_ACCOUNT_BASE64")
 gdrive_folder_id = os.getenv("GDRIVE_FOLDER_ID")
-BREED_KEYWORDS = [b.lower() for b in KC_BREEDS]
 GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 HOME_POSTCODE = os.getenv("HOME_POSTCODE")
 MPG = os.getenv("MPG")
@@ -37,37 +51,76 @@ OVERNIGHT_THRESHOLD_HOURS = os.getenv("OVERNIGHT_THRESHOLD_HOURS")
 OVERNIGHT_COST = os.getenv("OVERNIGHT_COST")
 MAX_PAIR_GAP_MINUTES = os.getenv("MAX_PAIR_GAP_MINUTES")
 
-# Build Drive client exactly as before
+# Drive client, built on first use so importing this module does no network or disk I/O.
+# httplib2 connections are not thread-safe, so each thread builds its own client.
 SCOPES = ["https://www.googleapis.com/auth/drive.file"]
+_drive_credentials = None
+_drive_credentials_lock = threading.Lock()
+_drive_local = threading.local()
+
+def _load_drive_credentials():
+    # The Google client libraries are slow to import, so they load with the first Drive call
+    from google.oauth2 import service_account
+    from google.auth.credentials import AnonymousCredentials
+
+    if http_client.archive_mode() == "replay":
+        # A replay must not touch the network, and must not overwrite the real Drive files
+        print("[INFO] Replaying from an HTTP archive; Google Drive is disabled.")
+        return None
+    if google_service_account_key:
+        try:
+            # Decode the base64 string into bytes
+            decoded_key = base64.b64decode(google_service_account_key)
 
-if google_service_account_key:
-    try:
-        # Decode the base64 string into bytes
-        decoded_key = base64.b64decode(google_service_account_key)
-
-        # Convert bytes to a JSON string and then load it into a dictionary
-        service_account_info = json.loads(decoded_key.decode("utf-8"))
-
-        # Authenticate with the Google API using the decoded key
-        credentials = service_account.Credentials.from_service_account_info(
-            service_account_info,
-            scopes=["https://www.googleapis.com/auth/drive.file"]
-        )
+            # Convert bytes to a JSON string and then load it into a dictionary
+            service_account_info = json.loads(decoded_key.decode("utf-8"))
 
-        # Build the drive service client
-        drive_service = build("drive", "v3", credentials=credentials)
-        print("[INFO] Google Drive client connected.")
+            # Authenticate with the Google API using the decoded key
+            credentials = service_account.Credentials.from_service_account_info(
+                service_account_info,
+                scopes=SCOPES
+            )
+            print("[INFO] Google Drive client connected.")
+            return credentials
 
-    except Exception as e:
-        print(f"[ERROR] Failed to decode or authenticate with service account: {e}")
-else:
+        except Exception as e:
+            print(f"[ERROR] Failed to decode or authenticate with service account: {e}")
+            return None
+    if upstreams.is_overridden("GOOGLE_DRIVE"):
+        # A stand-in Drive (bench/fake_upstream.py) accepts unauthenticated requests
+        print(f"[INFO] Google Drive client pointed at {upstreams.GOOGLE_DRIVE}.")
+        return AnonymousCredentials()
     print("[ERROR] GOOGLE_SERVICE_ACCOUNT_BASE64 environment variable is not set.")
+    return None
+
+def drive_credentials():
+    # None when Drive is not configured; decided once per process
+    global _drive_credentials
+    with _drive_credentials_lock:
+        if _drive_credentials is None:
+            _drive_credentials = _load_drive_credentials() or False
+        return _drive_credentials or None
+
+def get_drive_service():
+    # This thread's Drive client, or None when Drive is not configured
+    credentials = drive_credentials()
+    if credentials is None:
+        return None
+    service = getattr(_drive_local, "service", None)
+    if service is None:
+        service = _drive_local.service = upstreams.build_drive_service(credentials)
+    return service
 
-def download_from_drive(filename, mime_type="application/json"):
+def download_from_drive(filename, mime_type="application/json", dest=None):
+    if http_client.archive_mode() == "replay":
+        return
     try:
         if not gdrive_folder_id:
             print("[ERROR] GDRIVE_FOLDER_ID not set for download.")
             return
+        drive_service = get_drive_service()
+        if not drive_service:
+            return
 
         res = drive_service.files().list(
             q=f"name='{filename}' and trashed=false and '{gdrive_folder_id}' in parents",
@@ -81,8 +134,9 @@ def download_from_drive(filename, mime_type="application/json"):
 
         file_id = res["files"][0]["id"]
         request = drive_service.files().get_media(fileId=file_id)
-        with open(filename, "wb") as fh:
-            fh.write(request.execute())
+        content = request.execute()
+        atomic_write(dest or filename, lambda fh: fh.write(content), "wb")
+        metrics.BYTES_DOWNLOADED.inc(len(content), host=urlsplit(upstreams.GOOGLE_DRIVE).hostname)
         print(f"[INFO] Downloaded {filename} from Drive.")
 
     except Exception as e:
@@ -93,14 +147,24 @@ PROCESSED_SHOWS_FILE = "processed_shows.json"
 STORAGE_STATE_FILE = "storage_state.json"
 RESULTS_CSV = "results.csv"
 RESULTS_JSON = "results.json"
+RESULTS_PARQUET = columnar.parquet_path(RESULTS_CSV)
 ASPX_LINKS = "aspx_links.txt"
 TRAVEL_CACHE_FILE = "travel_cache.json"
 CLASH_OVERNIGHT_CSV = "clashes_overnight.csv"
 WINS_LOG_FILE = "wins.json"
 GOLDEN_RESULTS_FILE="golden_results.csv"
+GOLDEN_RESULTS_PARQUET = columnar.parquet_path(GOLDEN_RESULTS_FILE)  # A dataset directory, uploaded zipped
 HIGHAM_LINKS_FILE="higham_links.txt"
+LISTING_STATE_FILE = "listing_state.json"
+STARTUP_LOCK = os.path.join(LOCK_DIR, "startup.lock")
+SHOWS_TO_ENTER_URL = f"{upstreams.FOSSEDATA}/shows/Shows-To-Enter.aspx"
 
 LITERS_PER_GALLON = 4.54609
+
+# Partial-tree strainers: lxml builds only the elements each page parser reads
+SHOW_LIST_ROWS = SoupStrainer("tr", class_=re.compile(r"\b(?:tableRow|alternateRow)\b"))
+DETAIL_PAGE_FIELDS = SoupStrainer(["h3", "p", "input"])  # Location block + ASP.NET hidden inputs
+CLOSE_DATE_CELLS = SoupStrainer("td")
 HOME_POSTCODE = os.environ.get("HOME_POSTCODE", "YO8 9NA")
 GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY")
 DOG_DOB = datetime.datetime.strptime(os.environ.get("DOG_DOB", "2024-05-15"), "%Y-%m-%d").date()
@@ -108,15 +172,30 @@ MPG = float(os.environ.get("MPG", 40))
 OVERNIGHT_THRESHOLD_HOURS = float(os.environ.get("OVERNIGHT_THRESHOLD_HOURS", 3))
 OVERNIGHT_COST = float(os.environ.get("OVERNIGHT_COST", 100))
 
-download_from_drive("processed_shows.json")
-download_from_drive("storage_state.json")
-download_from_drive("aspx_links.txt")
-download_from_drive("travel_cache.json")
-download_from_drive("wins.json")
-download_from_drive("clashes_overnight.csv")
-download_from_drive("golden_results.csv")
-
-import re
+# State a run starts from, restored from Drive: (file name, MIME type). The results,
+# processed-shows and golden results exports are only read to seed new, empty stores.
+STORE_DB_MIME_TYPE = "application/vnd.sqlite3"
+SQLITE_STORES = (STORE, GOLDEN_STORE)   # Each is swapped in whole once its download is complete
+DRIVE_STATE_FILES = [
+    (RESULTS_JSON, "application/json"),
+    (PROCESSED_SHOWS_FILE, "application/json"),
+    (STORAGE_STATE_FILE, "application/json"),
+    (ASPX_LINKS, "text/plain"),
+    (TRAVEL_CACHE_FILE, "application/json"),
+    (WINS_LOG_FILE, "application/json"),
+    (CLASH_OVERNIGHT_CSV, "text/csv"),
+    (GOLDEN_RESULTS_FILE, "text/csv"),
+    (LISTING_STATE_FILE, "application/json"),
+    (FUEL_PRICE_FILE, "application/json"),
+    ("kc_breeds.txt", "text/plain"),
+    (HIGHAM_LINKS_FILE, "text/plain"),
+]
+
+# An HTTP archive keeps a copy of these so its replay starts from the same state
+RUN_INPUT_FILES = [
+    STORE_DB, GOLDEN_DB, PROCESSED_SHOWS_FILE, STORAGE_STATE_FILE, ASPX_LINKS, TRAVEL_CACHE_FILE,
+    WINS_LOG_FILE, LISTING_STATE_FILE, FUEL_PRICE_FILE, "kc_breeds.txt",
+]
 
 def extract_postcode(text):
     """
@@ -133,59 +212,74 @@ def extract_postcode(text):
     # Return the last match, which is usually the relevant one
     return matches[-1] if matches else ""
 
-# ===== Travel Cache Configuration =====
-travel_updated = False  # Global flag to track if travel cache was changed
-
+# ===== Travel Cache =====
+# Lookups live in the store, shared by every worker and written as they are made;
+# travel_cache.json is an export of them. A run keeps the lookups it has used in a
+# dict, consulting the store on a miss before going to the Maps API.
 def load_travel_cache():
-    #Loads the travel cache from travel_cache.json.
-    if Path(TRAVEL_CACHE_FILE).exists():
-        try:
-            with open(TRAVEL_CACHE_FILE, "r") as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"[WARN] Failed to load travel cache: {e}")
-    return {}
-
-def save_travel_cache(cache):
-    #Saves the travel cache to travel_cache.json.
-    try:
-        with open(TRAVEL_CACHE_FILE, "w") as f:
-            json.dump(cache, f, indent=2)
-        print("[INFO] Travel cache saved.")
-    except Exception as e:
-        print(f"[ERROR] Failed to save travel cache: {e}")
-
-# ===== Load Cache =====
-processed_shows = set()  # <- Always define it, even if the file is missing
-
-if os.path.isfile(PROCESSED_SHOWS_FILE):
-    try:
-        with open(PROCESSED_SHOWS_FILE, "r") as f:
-            data = json.load(f)
-            processed_shows = set(data if isinstance(data, list) else data.keys())
-    except Exception as e:
-        print(f"Warning: Could not load {PROCESSED_SHOWS_FILE}: {e}")
-        {}
-
-# ===== Diesel Price =====
-def fetch_gov_diesel_price():
-    url = "https://assets.publishing.service.gov.uk/government/uploads/system/uploads/attachment_data/file/1254009/weekly-road-fuel-prices.csv"
+    #Snapshot of every known drive, as {postcode: info, "between": {"origin||destination": info}}.
     try:
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            csv_text = resp.content.decode('utf-8')
-            reader = csv.DictReader(io.StringIO(csv_text))
-            rows = list(reader)
-            latest_row = rows[-1]
-            diesel_price_ppl = latest_row.get('Diesel', '').replace('p', '').strip()
-            if diesel_price_ppl:
-                return float(diesel_price_ppl) / 100.0
+        return STORE.travel_cache()
     except Exception as e:
-        print(f"Warning: Gov fuel price fetch failed: {e}")
-    return 1.57
+        print(f"[WARN] Failed to load travel cache: {e}")
+    return {}
 
-diesel_price_per_litre = fetch_gov_diesel_price()
-print(f"Gov diesel price: £{diesel_price_per_litre:.2f} per litre")
+# ===== Startup =====
+_startup_lock = threading.Lock()
+_started = False
+
+def restore_drive_state():
+    # Downloads the state files missing locally, and the databases that are missing or still
+    # empty; the downloads are independent, so they run side by side. State already here is
+    # never replaced: another process (a sibling worker, a CLI run, a container on a shared
+    # volume) may be using it, and it is at least as new as Drive's copy, which every run
+    # uploads from local state.
+    missing_stores = [store for store in SQLITE_STORES if store.is_empty()]
+    missing_files = [(name, mime_type) for name, mime_type in DRIVE_STATE_FILES if not os.path.exists(name)]
+    if not missing_stores and not missing_files:
+        return
+    with ThreadPoolExecutor(max_workers=len(missing_files) + len(missing_stores), thread_name_prefix="startup") as pool:
+        for store in missing_stores:
+            pool.submit(download_from_drive, os.path.basename(store.path), STORE_DB_MIME_TYPE, store.path + ".download")
+        for name, mime_type in missing_files:
+            pool.submit(download_from_drive, name, mime_type)
+    for store in missing_stores:
+        if os.path.exists(store.path + ".download"):
+            store.restore(store.path + ".download")
+
+def ensure_started(restore: bool = True):
+    # Restores run state from Drive and loads the caches built on it, once per process and
+    # only when something needs them. Processes start up one at a time, under a file lock.
+    # restore=False attaches to the stores already here as they are (standalone queue workers).
+    global _started
+    with _startup_lock:
+        if _started:
+            return
+        with file_lock(STARTUP_LOCK):
+            if restore:
+                _restore_state()
+            _load_caches()
+        _started = True
+
+def _restore_state():
+    # Restores what is missing from Drive (decided under the lock) and seeds new stores
+    restore_drive_state()
+    if http_client.archive_mode() == "record":
+        for store in SQLITE_STORES:
+            store.checkpoint()
+        http_client.archive().save_inputs(RUN_INPUT_FILES)
+    elif http_client.archive_mode() == "replay":
+        for store in SQLITE_STORES:
+            store.close()
+        http_client.archive().restore_inputs()
+    STORE.import_legacy(RESULTS_JSON, PROCESSED_SHOWS_FILE)
+    STORE.import_travel_cache(TRAVEL_CACHE_FILE)
+    GOLDEN_STORE.import_csv(GOLDEN_RESULTS_FILE)
+
+def _load_caches():
+    SHOW_INDEX.load()
+    JUDGE_INDEX.load()
+    FUEL_PRICES.load()
 
 def read_existing_links() -> List[str]:
     #Read show URLs from aspx_links.txt if present
@@ -200,20 +294,93 @@ def save_links(links: set):
     if not links:
         print("[WARNING] save_links() called with empty set.")
         return
-    with open("aspx_links.txt", "w") as f:
-        for link in sorted(links):
-            f.write(f"{link}\n")
+    atomic_write(ASPX_LINKS, lambda f: f.writelines(f"{link}\n" for link in sorted(links)))
     print(f"[INFO] Wrote {len(links)} links to aspx_links.txt")
     
-async def fetch_show_list(page) -> List[dict]:
-    # Scrape the FosseData 'Shows to Enter' page for all .aspx links and show details.
-    await page.goto("https://fossedata.co.uk/shows/Shows-To-Enter.aspx", timeout=60000)
-    html = await page.content()
-    soup = BeautifulSoup(html, "html.parser")
+# ===== Shows-To-Enter Listing =====
+# ASP.NET hidden inputs change on every request, so they are left out of the content hash
+ASPNET_HIDDEN_INPUT = re.compile(r"<input[^>]*type=\"hidden\"[^>]*>", re.IGNORECASE)
+pending_listing_state = None  # Validators for the listing fetched by this run, saved once the run completes
+
+def load_listing_state() -> dict:
+    #Loads the ETag/Last-Modified/content hash of the last processed listing.
+    if Path(LISTING_STATE_FILE).exists():
+        try:
+            with open(LISTING_STATE_FILE, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[WARN] Failed to load listing state: {e}")
+    return {}
+
+def discard_listing_state():
+    #Keeps this run's listing from counting as processed, so the next run goes through it again.
+    global pending_listing_state
+    pending_listing_state = None
+
+def save_listing_state():
+    #Persists the validators of the listing this run processed, so the next poll can short-circuit.
+    global pending_listing_state
+    if not pending_listing_state:
+        return
+    try:
+        atomic_write(LISTING_STATE_FILE, lambda f: json.dump(pending_listing_state, f, indent=2))
+        pending_listing_state = None
+    except Exception as e:
+        print(f"[ERROR] Failed to save listing state: {e}")
+
+def fetch_listing_html(force: bool = False) -> Optional[str]:
+    # Fetch the server-rendered Shows-To-Enter page over plain HTTP.
+    # Sends the previous ETag/Last-Modified and compares a content hash;
+    # returns None when the listing has not changed since the last completed run.
+    global pending_listing_state
+    state = {} if force else load_listing_state()
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
+    resp = http_client.get(SHOWS_TO_ENTER_URL, headers=headers, timeout=60)
+    if resp.status_code == 304:
+        print("[INFO] Shows-To-Enter not modified (304).")
+        return None
+    resp.raise_for_status()
+
+    html = resp.text
+    content_hash = hashlib.sha256(ASPNET_HIDDEN_INPUT.sub("", html).encode("utf-8")).hexdigest()
+    if state.get("content_hash") == content_hash:
+        print("[INFO] Shows-To-Enter content unchanged since last run.")
+        return None
+
+    pending_listing_state = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "content_hash": content_hash,
+        "fetched_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    return html
+
+def fetch_show_list(force: bool = False) -> Optional[List[dict]]:
+    # Fetch the FosseData 'Shows to Enter' listing and return every show on it; which of
+    # them still need processing is decided by the store, so a show that failed or had no
+    # schedule yet is picked up again. Returns None when the listing is unchanged, so callers can skip the run.
+    html = fetch_listing_html(force)
+    if html is None:
+        return None
 
-    rows = soup.select("tr.tableRow, tr.alternateRow, tr.tableRow.redBg, tr.alternateRow.redBg")
     existing_links = set(read_existing_links())
-    new_links = set(existing_links)
+    shows = parse_show_list(html)
+    links = {show["url"] for show in shows}
+    save_links(existing_links | links)
+    print(f"[INFO] Collected {len(shows)} shows ({len(links - existing_links)} new)")
+    return shows
+
+def parse_show_list(html: str) -> List[dict]:
+    # Parse the listing for all .aspx links and show details, skipping breed-specific shows.
+    breed_matcher = get_listing_matcher()
+    soup = BeautifulSoup(html, "lxml", parse_only=SHOW_LIST_ROWS)
+
+    rows = soup.select("tr.tableRow, tr.alternateRow, tr.tableRow.redBg, tr.alternateRow.redBg")
     shows = []
 
     for row in rows:
@@ -230,11 +397,11 @@ async def fetch_show_list(page) -> List[dict]:
                 show_name = show_name[3:].strip()
 
             # Skip any show with a breed/group keyword in the name
-            if any(keyword in show_name.lower() for keyword in BREED_KEYWORDS):
+            if breed_matcher.search(show_name):
                 print(f"[SKIP] Excluding breed-specific show: {show_name}")
                 continue
 
-            show_url = f"https://www.fossedata.co.uk/{link_tag['href']}"
+            show_url = f"{upstreams.FOSSEDATA}/{link_tag['href']}"
             date_text = date_td.get_text(strip=True)
 
             # Handle date range
@@ -251,9 +418,6 @@ async def fetch_show_list(page) -> List[dict]:
                 except ValueError:
                     continue
 
-            if show_url in existing_links:
-                continue
-
             name_lower = show_name.lower()
             if "championship" in name_lower:
                 show_type = "Championship"
@@ -274,60 +438,56 @@ async def fetch_show_list(page) -> List[dict]:
             }
 
             shows.append(show_info)
-            new_links.add(show_url)
 
         except Exception as e:
             print(f"[WARN] Skipped one row due to error: {e}")
             continue
 
-    save_links(new_links)
-    print(f"[INFO] Collected {len(shows)} new shows")
     return shows
 
+def parse_show_detail_page(html: str) -> Tuple[str, dict]:
+    # Read the venue from the Location section and the ASP.NET hidden fields needed
+    # for the schedule postback. Returns (venue, form_data).
+    soup = BeautifulSoup(html, "lxml", parse_only=DETAIL_PAGE_FIELDS)
+
+    # === Extract venue from the actual Location section ===
+    venue = ""
+    location_heading = soup.find("h3", string="Location")
+    if location_heading:
+        p_tag = location_heading.find_next_sibling("p")
+        if p_tag and "Address:" in p_tag.text:
+            venue = p_tag.text.replace("Address:", "").strip()
+
+    # === Extract hidden form fields ===
+    viewstate = soup.find("input", {"id": "__VIEWSTATE"}).get("value", "")
+    viewstategen = soup.find("input", {"id": "__VIEWSTATEGENERATOR"}).get("value", "")
+    event_validation_tag = soup.find("input", {"id": "__EVENTVALIDATION"})
+    event_validation = event_validation_tag.get("value", "") if event_validation_tag else ""
+
+    form_data = {
+        "__VIEWSTATE": viewstate,
+        "__VIEWSTATEGENERATOR": viewstategen,
+        "__EVENTVALIDATION": event_validation,
+        "ctl00$ContentPlaceHolder$btnDownloadSchedule": "Schedule",
+    }
+    return venue, form_data
+
+def schedule_pdf_path_for(show_url: str) -> str:
+    safe_id = re.sub(r"[^\w\-]", "_", show_url.split("/")[-1])
+    return f"schedule_{safe_id}.pdf"
+
 def download_schedule_via_post(show_url: str, schedule_pdf_path: str) -> Optional[Tuple[str, str]]:
     try:
-        session = requests.Session()
-        session.headers.update({"User-Agent": "Mozilla/5.0"})
+        session = http_client.new_session()
 
-        # Step 1: Get the form page to extract hidden fields
+        # Step 1: Get the form page to extract venue and hidden fields
         resp = session.get(show_url)
-        soup = BeautifulSoup(resp.text, "html.parser")
-
-        # === Extract venue and postcode from the actual Location section ===
-        venue = ""
-        postcode = ""
-
-        location_heading = soup.find("h3", string="Location")
-        if location_heading:
-                p_tag = location_heading.find_next_sibling("p")
-                if p_tag and "Address:" in p_tag.text:
-                        venue_text = p_tag.text.replace("Address:", "").strip()
-                        venue = venue_text
-
-                        # Extract postcode from venue text
-                        postcode_match = re.search(r"\b[A-Z]{1,2}\d{1,2}[A-Z]?\s*\d[A-Z]{2}\b", venue_text)
-                        if postcode_match:
-                                postcode = postcode_match.group(0).upper()
-
-
-        # === Extract hidden form fields ===
-        viewstate = soup.find("input", {"id": "__VIEWSTATE"}).get("value", "")
-        viewstategen = soup.find("input", {"id": "__VIEWSTATEGENERATOR"}).get("value", "")
-        event_validation_tag = soup.find("input", {"id": "__EVENTVALIDATION"})
-        event_validation = event_validation_tag.get("value", "") if event_validation_tag else ""
-
-        form_data = {
-            "__VIEWSTATE": viewstate,
-            "__VIEWSTATEGENERATOR": viewstategen,
-            "__EVENTVALIDATION": event_validation,
-            "ctl00$ContentPlaceHolder$btnDownloadSchedule": "Schedule",
-        }
+        venue, form_data = parse_show_detail_page(resp.text)
 
         # === Download the PDF via POST ===
         post_resp = session.post(show_url, data=form_data)
         if post_resp.status_code == 200 and b"%PDF" in post_resp.content[:1024]:
-            with open(schedule_pdf_path, "wb") as f:
-                f.write(post_resp.content)
+            atomic_write(schedule_pdf_path, lambda f: f.write(post_resp.content), "wb")
             print(f"[INFO] Downloaded schedule via POST: {schedule_pdf_path}")
             return schedule_pdf_path, venue
         else:
@@ -339,16 +499,20 @@ def download_schedule_via_post(show_url: str, schedule_pdf_path: str) -> Optiona
         return None, ""
     
 def get_travel_info(destination: str, travel_cache: dict) -> dict:
-        global travel_updated
-
         if not destination:
                 print("[WARN] No destination provided for travel lookup.")
                 return {}
 
         destination = destination.strip().upper()
 
+        if destination not in travel_cache:
+                known = STORE.travel(destination)  # Looked up by another run or worker
+                if known:
+                        travel_cache[destination] = known
         if destination in travel_cache:
+                metrics.cache_lookup("travel", hit=True)
                 return travel_cache[destination]
+        metrics.cache_lookup("travel", hit=False)
 
         if not GOOGLE_MAPS_API_KEY:
                 print("[ERROR] No Google Maps API key configured.")
@@ -356,7 +520,7 @@ def get_travel_info(destination: str, travel_cache: dict) -> dict:
 
         print(f"[INFO] Fetching travel info for postcode: {destination}")
 
-        base_url = "https://maps.googleapis.com/maps/api/distancematrix/json"
+        base_url = f"{upstreams.GOOGLE_MAPS}/maps/api/distancematrix/json"
         params = {
                 "origins": HOME_POSTCODE,
                 "destinations": destination,
@@ -365,7 +529,7 @@ def get_travel_info(destination: str, travel_cache: dict) -> dict:
         }
 
         try:
-                response = requests.get(base_url, params=params, timeout=10)
+                response = http_client.get(base_url, params=params, timeout=10)
                 data = response.json()
 
                 if data["status"] == "OK" and data["rows"][0]["elements"][0]["status"] == "OK":
@@ -375,7 +539,7 @@ def get_travel_info(destination: str, travel_cache: dict) -> dict:
                         distance_miles = float(distance_text.replace(" mi", "").replace(",", ""))
                         duration_hours = float(duration_value) / 3600
 
-                        estimated_cost = calculate_diesel_cost(distance_miles, diesel_price_per_litre, MPG)
+                        estimated_cost = calculate_diesel_cost(distance_miles, FUEL_PRICES.price(), MPG)
                         overnight = duration_hours > OVERNIGHT_THRESHOLD_HOURS
 
                         travel_info = {
@@ -387,7 +551,7 @@ def get_travel_info(destination: str, travel_cache: dict) -> dict:
                         }
 
                         travel_cache[destination] = travel_info
-                        travel_updated = True
+                        STORE.save_travel(destination, travel_info)
                         return travel_info
 
                 else:
@@ -407,8 +571,14 @@ def get_between_travel_info(origin: str, destination: str, cache: dict) -> dict:
     if 'between' not in cache:
         cache['between'] = {}
 
+    if key not in cache['between']:
+        known = STORE.between(origin, destination)
+        if known:
+            cache['between'][key] = known
     if key in cache['between']:
+        metrics.cache_lookup("travel_between", hit=True)
         return cache['between'][key]
+    metrics.cache_lookup("travel_between", hit=False)
 
     try:
         api_key = os.getenv("GOOGLE_MAPS_API_KEY")
@@ -418,7 +588,7 @@ def get_between_travel_info(origin: str, destination: str, cache: dict) -> dict:
             "key": api_key,
             "units": "imperial",
         }
-        resp = requests.get("https://maps.googleapis.com/maps/api/directions/json", params=params, timeout=10)
+        resp = http_client.get(f"{upstreams.GOOGLE_MAPS}/maps/api/directions/json", params=params, timeout=10)
         data = resp.json()
         if data["status"] == "OK":
             leg = data["routes"][0]["legs"][0]
@@ -426,6 +596,7 @@ def get_between_travel_info(origin: str, destination: str, cache: dict) -> dict:
             minutes = leg["duration"]["value"] // 60
             result = {"distance_miles": miles, "drive_time_minutes": minutes}
             cache['between'][key] = result
+            STORE.save_between(origin, destination, result)
             return result
         else:
             print(f"Google Maps API error between {origin} and {destination}: {data['status']}")
@@ -434,6 +605,7 @@ def get_between_travel_info(origin: str, destination: str, cache: dict) -> dict:
 
     # Cache the failure so it doesn't retry repeatedly
     cache['between'][key] = {"distance_miles": 0, "drive_time_minutes": 9999}
+    STORE.save_between(origin, destination, cache['between'][key])
     return cache['between'][key]
 
 def calculate_diesel_cost(distance_miles: float, price_per_litre: float, mpg: float) -> float:
@@ -444,7 +616,8 @@ def calculate_diesel_cost(distance_miles: float, price_per_litre: float, mpg: fl
     litres_needed = gallons_needed * LITERS_PER_GALLON
     return round(litres_needed * price_per_litre, 2)
 
-def parse_pdf_for_info(pdf_path: str, show_name: str) -> Optional[dict]:
+def read_schedule_lines(pdf_path: str) -> Optional[List[str]]:
+    # Reads a schedule PDF's text blocks in reading order (top to bottom, then left to right)
     import fitz  # PyMuPDF
 
     blocks = []
@@ -452,6 +625,9 @@ def parse_pdf_for_info(pdf_path: str, show_name: str) -> Optional[dict]:
         doc = fitz.open(pdf_path)
         for page in doc:
             blocks.extend(page.get_text("blocks"))  # (x0, y0, x1, y1, text, block_no, block_type)
+        report = run_report.current_report()
+        if report:
+            report.record_pdf(pdf_path, len(doc))
         doc.close()
     except Exception as e:
         print(f"[ERROR] Failed to read PDF layout for {pdf_path}: {e}")
@@ -461,7 +637,12 @@ def parse_pdf_for_info(pdf_path: str, show_name: str) -> Optional[dict]:
     text_blocks = [b for b in blocks if b[4].strip()]
     sorted_blocks = sorted(text_blocks, key=lambda b: (round(b[1]), b[0]))  # Y then X
 
-    lines = [b[4].strip() for b in sorted_blocks if b[4].strip()]
+    return [b[4].strip() for b in sorted_blocks if b[4].strip()]
+
+def parse_pdf_for_info(pdf_path: str, show_name: str) -> Optional[dict]:
+    lines = read_schedule_lines(pdf_path)
+    if lines is None:
+        return None
     full_text = "\n".join(lines).lower()
 
     if "golden" not in full_text:
@@ -515,22 +696,16 @@ def extract_fee(pattern: str, text: str) -> Optional[float]:
             return None
     return None
 
-import re
-from typing import Tuple, Optional
+GOLDEN_BREED_NAMES = ("golden retriever", "retriever (golden)")
 
 def extract_judges(lines: List[str], show_name: str = "") -> Tuple[Optional[str], Optional[str]]:
     text = "\n".join(lines)
-    text_lower = text.lower()
 
     is_single_breed = (
         "golden retriever club" in show_name.lower()
         or (
             "golden retriever" in show_name.lower()
-            and not any(
-                breed in text_lower
-                for breed in KC_BREEDS
-                if breed != "golden retriever"
-            )
+            and not get_breed_matcher().contains_any(text, exclude=GOLDEN_BREED_NAMES)
         )
     )
 
@@ -722,83 +897,88 @@ def load_wins_log() -> list:
         print(f"Error loading {WINS_LOG_FILE}: {e}")
         return []
     
-def save_results(results, processed_shows):
-    #Save results and caches to local files
-    # Sort results by date
-    for r in results:
-        if r.get('date'):
-            try:
-                r['_date_obj'] = datetime.datetime.strptime(r['date'], "%Y-%m-%d").date()
-            except Exception:
-                r['_date_obj'] = None
-        else:
-            r['_date_obj'] = None
-    results.sort(key=lambda x: (x.get('_date_obj') or datetime.date.max))
-
-    # Write JSON and CSV
-    with open(RESULTS_JSON, "w") as jf:
-        json.dump(results, jf, indent=2, default=str)
-    with open(RESULTS_CSV, "w", newline='') as cf:
-        writer = csv.writer(cf)
-        if results:
-            header = [k for k in results[0].keys() if k != '_date_obj']
-            writer.writerow(header)
-            for r in results:
-                row = [r.get(col, "") for col in header]
-                writer.writerow(row)
-
-    # Save processed shows cache
+def save_results(results):
+    # Results live in the store; results.json, results.csv and processed_shows.json are exports of it
+    STORE.save_shows(results)
+    SHOW_INDEX.update(results)
+    export_results()
+
+def export_results():
+    results = STORE.export_views(RESULTS_JSON, RESULTS_CSV, PROCESSED_SHOWS_FILE, TRAVEL_CACHE_FILE)
     try:
-        with open(PROCESSED_SHOWS_FILE, "w") as pf:
-            json.dump(sorted(list(processed_shows)), pf, indent=2)
+        columnar.write_results(results, RESULTS_PARQUET)
     except Exception as e:
-        print(f"Warning: Could not save {PROCESSED_SHOWS_FILE}: {e}")
+        print(f"[WARN] Could not write {RESULTS_PARQUET}: {e}")
+
+def upload_file_to_drive(file_path, mime_type):
+    #Uploads a file to Google Drive in the specified folder
+    from googleapiclient.http import MediaFileUpload
+
+    drive_service = get_drive_service()
+    name = os.path.basename(file_path)
+    media = MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
+
+    # Check if the file already exists in the folder
+    query = f"'{gdrive_folder_id}' in parents and name='{name}'"
+    result = drive_service.files().list(q=query, fields="files(id,name)").execute()
+
+    if result.get("files"):
+        # If the file exists, update it
+        file_id = result['files'][0]['id']
+        drive_service.files().update(fileId=file_id, media_body=media).execute()
+        print(f"[INFO] Updated {name} on Drive.")
+    else:
+        # If the file doesn't exist, create it
+        file_metadata = {
+            'name': name,
+            'parents': [gdrive_folder_id]
+        }
+        drive_service.files().create(body=file_metadata, media_body=media).execute()
+        print(f"[INFO] Uploaded {name} to Drive.")
+    metrics.BYTES_UPLOADED.inc(os.path.getsize(file_path), destination="google_drive")
 
 def upload_to_google_drive():
     #Upload output and cache files to Google Drive using the already-initialised service account
-    if not drive_service:
+    if not get_drive_service():
         print("[ERROR] Google Drive client not initialised.")
         return
     if not gdrive_folder_id:
         print("[ERROR] GDRIVE_FOLDER_ID environment variable is not set.")
         return
 
-    def upload_file(file_path, mime_type):
-        #Uploads a file to Google Drive in the specified folder
-        name = os.path.basename(file_path)
-        media = MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
-
-        # Check if the file already exists in the folder
-        query = f"'{gdrive_folder_id}' in parents and name='{name}'"
-        result = drive_service.files().list(q=query, fields="files(id,name)").execute()
-        
-        if result.get("files"):
-            # If the file exists, update it
-            file_id = result['files'][0]['id']
-            drive_service.files().update(fileId=file_id, media_body=media).execute()
-            print(f"[INFO] Updated {name} on Drive.")
-        else:
-            # If the file doesn't exist, create it
-            file_metadata = {
-                'name': name,
-                'parents': [gdrive_folder_id]
-            }
-            drive_service.files().create(body=file_metadata, media_body=media).execute()
-            print(f"[INFO] Uploaded {name} to Drive.")
-
     try:
+        # Bring the exports up to date and fold the WAL into the database files
+        export_results()
+        for store in SQLITE_STORES:
+            store.checkpoint()
+
         # Upload the files
-        upload_file(RESULTS_JSON, "application/json")
-        upload_file(RESULTS_CSV, "text/csv")
-        upload_file(PROCESSED_SHOWS_FILE, "application/json")
-        upload_file(TRAVEL_CACHE_FILE,"application/json")
-        upload_file(GOLDEN_RESULTS_FILE, "text/csv")
-        upload_file(HIGHAM_LINKS_FILE,"text/plain")
+        for store in SQLITE_STORES:
+            if os.path.exists(store.path):
+                upload_file_to_drive(store.path, STORE_DB_MIME_TYPE)
+        upload_file_to_drive(RESULTS_JSON, "application/json")
+        upload_file_to_drive(RESULTS_CSV, "text/csv")
+        if os.path.exists(RESULTS_PARQUET):
+            upload_file_to_drive(RESULTS_PARQUET, "application/vnd.apache.parquet")
+        upload_file_to_drive(PROCESSED_SHOWS_FILE, "application/json")
+        upload_file_to_drive(TRAVEL_CACHE_FILE,"application/json")
+        if not os.path.exists(GOLDEN_RESULTS_FILE) and GOLDEN_STORE.count():
+            GOLDEN_STORE.export_csv(GOLDEN_RESULTS_FILE)
+        if os.path.exists(GOLDEN_RESULTS_FILE):
+            upload_file_to_drive(GOLDEN_RESULTS_FILE, "text/csv")
+        if os.path.isdir(GOLDEN_RESULTS_PARQUET):
+            upload_file_to_drive(columnar.zip_dataset(GOLDEN_RESULTS_PARQUET), "application/zip")
+        if os.path.exists(HIGHAM_LINKS_FILE):
+            upload_file_to_drive(HIGHAM_LINKS_FILE, "text/plain")
         for pdf_file in Path(".").glob("schedule_*.pdf"):
-            upload_file(str(pdf_file), "application/pdf")
-        upload_file(ASPX_LINKS, "text/plain")
+            upload_file_to_drive(str(pdf_file), "application/pdf")
+        upload_file_to_drive(ASPX_LINKS, "text/plain")
+        if os.path.exists(LISTING_STATE_FILE):
+            upload_file_to_drive(LISTING_STATE_FILE, "application/json")
+        if os.path.exists(FUEL_PRICE_FILE):
+            upload_file_to_drive(FUEL_PRICE_FILE, "application/json")
         if os.path.exists(STORAGE_STATE_FILE):
-            upload_file(STORAGE_STATE_FILE, "application/json")
+            upload_file_to_drive(STORAGE_STATE_FILE, "application/json")
 
     except Exception as e:
         print(f"[ERROR] Google Drive upload failed: {e}")
@@ -809,12 +989,13 @@ async def fetch_postal_close_date(show_url: str) -> Optional[datetime.date]:
     try:
         async with async_playwright() as pw:
             browser = await pw.chromium.launch()
-            context = await browser.new_context(storage_state=STORAGE_STATE_FILE if os.path.exists(STORAGE_STATE_FILE) else None)
+            context = await http_client.new_context(browser, storage_state=STORAGE_STATE_FILE if os.path.exists(STORAGE_STATE_FILE) else None)
             page = await context.new_page()
-            await page.goto(show_url, timeout=30000)
+            await http_client.goto(page, show_url, timeout=30000)
             html = await page.content()
-            await context.storage_state(path=STORAGE_STATE_FILE)
+            storage_state = await context.storage_state()
             await browser.close()
+        atomic_write(STORAGE_STATE_FILE, lambda f: json.dump(storage_state, f))
 
         return parse_postal_close_date_from_html(html)
 
@@ -825,7 +1006,7 @@ async def fetch_postal_close_date(show_url: str) -> Optional[datetime.date]:
 def parse_postal_close_date_from_html(html: str) -> Optional[datetime.date]:
     # Extract postal or online close date from a modern FosseData show page.
     # Looks for keywords in TDs and parses the following sibling's text as a date.
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, "lxml", parse_only=CLOSE_DATE_CELLS)
     td_elements = soup.find_all("td")
     
     postal_date = None
@@ -859,146 +1040,385 @@ def parse_postal_close_date_from_html(html: str) -> Optional[datetime.date]:
         return None
         
 def run_golden_scrape():
-    scrape_all_results(start_year=2007, output_csv="golden_results.csv")
+    ensure_started()  # picks up the results history from Drive
+    scrape_all_results(start_year=2007, output_csv=GOLDEN_RESULTS_FILE)
+    JUDGE_INDEX.load()
     
+async def save_higham_links():
+    links = await fetch_higham_show_links()
+    atomic_write(HIGHAM_LINKS_FILE, lambda f: f.writelines(f"{url}\t{start}\t{end}\t{close}\n"
+                                                         for url, start, end, close in links))
+    print(f"[INFO] Saved {len(links)} Higham show links.")
+    return len(links)
+
 def run_higham_links():
-    async def _inner():
-        links = await fetch_higham_show_links()
-        with open(HIGHAM_LINKS_FILE, "w") as f:
-            for url, start, end, close in links:
-                f.write(f"{url}\t{start}\t{end}\t{close}\n")
-        print(f"[INFO] Saved {len(links)} Higham show links.")
-    asyncio.run(_inner())
+    # Synchronous entry point; must not be called from a running event loop
+    return asyncio.run(save_higham_links())
         
-async def main_processing_loop(show_list: list):
-    global processed_shows
-    results = []
-    travel_cache = load_travel_cache()  # Load cache at start
-    global travel_updated
-
-    for show in show_list:
-        show_url = show.get("url")
-        if not show_url or show_url in processed_shows:
-            continue
-
-        print(f"Processing show: {show.get('show_name')} on {show.get('date')}")
-
-        # === Fetch postal close date ===
+async def process_show(show: dict, travel_cache: dict, n: int = 1, total: int = 1) -> Optional[dict]:
+    # Detail page, schedule download and parse, and travel for one show; the result is
+    # saved to the store and returned, or None when the show is not one for us
+    show_url = show.get("url")
+    print(f"Processing show: {show.get('show_name')} on {show.get('date')}")
+    emit("show_started", n=n, total=total, show=show.get("show_name"))
+
+    # === Fetch postal close date ===
+    with metrics.timed("close_date", show=show_url):
         postal_close_date = await fetch_postal_close_date(show_url)
+    emit("close_date_fetched", n=n, entry_close=postal_close_date)
+
+    # === Download schedule via POST to .aspx ===
+    schedule_pdf_path = schedule_pdf_path_for(show_url)
+    with metrics.timed("pdf_download", show=show_url):
+        pdf_path, venue = await run_blocking(download_schedule_via_post, show_url, schedule_pdf_path)
+    emit("pdf_downloaded", n=n, ok=bool(pdf_path))
+    report = run_report.current_report()
+    if report:
+        report.note_show(show_url, name=show.get("show_name"), pdf=pdf_path)
+
+    # === Extract postcode from venue ===
+    postcode = extract_postcode(venue) if venue else None
+
+    if not pdf_path:
+        print(f"Skipping {show.get('show_name')} (no schedule PDF)")
+        return None
 
-        # === Download schedule via POST to .aspx ===
-        safe_id = re.sub(r"[^\w\-]", "_", show_url.split("/")[-1])
-        schedule_pdf_path = f"schedule_{safe_id}.pdf"
-        pdf_path, venue = download_schedule_via_post(show_url, schedule_pdf_path)
+    # === Parse the PDF for Golden info ===
+    with metrics.timed("parse", show=show_url):
+        info = await run_blocking(parse_pdf_for_info, pdf_path, show.get("show_name", ""))
+    emit("parsed", n=n, golden=bool(info))
+    if not info:
+        # Final: the schedule is in and has no Golden classes, so later runs skip the show.
+        # A missing PDF above is left unmarked and retried.
+        await run_blocking(STORE.mark_processed, [show_url])
+        print(f"Skipping {show.get('show_name')} (Golden Retriever not mentioned)")
+        return None
 
-        # === Extract postcode from venue ===
-        postcode = extract_postcode(venue) if venue else None
+    # === Trust title show type unless it's Unknown ===
+    if show.get("type", "Unknown") == "Unknown" and "type" in info:
+        show["type"] = info["type"]
+
+    # === Travel data ===
+    with metrics.timed("travel", show=show_url):
+        travel_info = await run_blocking(get_travel_info, postcode, travel_cache) if postcode else {}
+    emit("travel_resolved", n=n, postcode=postcode)
+
+    result = {
+        "show_url": show_url,
+        "show_name": show.get("show_name"),
+        "show_date": show.get("date").isoformat() if isinstance(show.get("date"), datetime.date) else show.get("date"),
+        "type": show.get("type"),
+        "judge_dogs": info.get("judge_dogs"),
+        "judge_bitches": info.get("judge_bitches"),
+        "venue": venue,
+        "postcode": postcode,
+        "first_entry_fee": info.get("first_entry_fee"),
+        "subsequent_entry_fee": info.get("subsequent_entry_fee"),
+        "catalogue_fee": info.get("catalogue_price"),
+        "entry_close": postal_close_date.isoformat() if postal_close_date else None,
+        "distance_miles": travel_info.get("distance_miles"),
+        "duration_hours": travel_info.get("duration_hours"),
+        "estimated_cost": travel_info.get("estimated_cost"),
+        "overnight_required": travel_info.get("overnight_required"),
+        "overnight_cost": travel_info.get("overnight_cost"),
+    }
+    if travel_info.get("duration_hours") is not None:
+        result["drive_time_minutes"] = round(travel_info["duration_hours"] * 60)
+    result["judge_history"] = JUDGE_INDEX.annotate(result)
+
+    # One show's rows per write, so the cost of saving does not grow with history
+    with metrics.timed("save", show=show_url):
+        await run_blocking(STORE.save_show, result)
+    return result
+
+# ===== Show Work Queue =====
+# Per-show work goes through WORK_QUEUE: each pipeline run queues its new shows and
+# works through them with SHOW_WORKERS in-process workers, alongside any standalone
+# workers (python fossedata_core.py --worker) pulling from the same queue and store.
+SHOW_WORKERS = int(os.getenv("SHOW_WORKERS", 1))
+QUEUE_POLL_SECONDS = 5  # How often an idle worker looks for tasks again
+INDEX_BATCH = 5         # Results per show index update
+
+def show_payload(show: dict) -> dict:
+    return {k: v.isoformat() if isinstance(v, datetime.date) else v for k, v in show.items()}
+
+async def _keep_lease(task: Task):
+    while True:
+        await asyncio.sleep(WORK_QUEUE.lease_seconds / 3)
+        if not await run_blocking(WORK_QUEUE.heartbeat, task):
+            print(f"[WARN] Lost the lease on {task.key}; another worker may process it too.")
+            return
 
-        if not pdf_path:
-            print(f"Skipping {show.get('show_name')} (no schedule PDF)")
+async def run_show_task(task: Task, travel_cache: dict, n: int, total: int) -> Optional[dict]:
+    heartbeat = asyncio.create_task(_keep_lease(task))
+    try:
+        result = await process_show(task.payload, travel_cache, n, total)
+    except Exception as e:
+        print(f"[ERROR] Processing {task.key} failed (attempt {task.attempts}): {e}")
+        await run_blocking(WORK_QUEUE.fail, task, str(e))
+        return None
+    finally:
+        heartbeat.cancel()
+    if not await run_blocking(WORK_QUEUE.complete, task, result):
+        print(f"[WARN] {task.key} was processed after its lease ran out.")
+    return result
+
+async def show_worker(owner: str, keys: Optional[List[str]] = None, travel_cache: Optional[dict] = None,
+                      counter=None, total: int = 0, forever: bool = False):
+    # Leases and processes show tasks until none of keys (or, with keys=None, none at all)
+    # are outstanding; tasks leased by other workers are waited for, in case their lease runs out
+    travel_cache = load_travel_cache() if travel_cache is None else travel_cache
+    counter = counter or itertools.count(1)
+    unindexed, saved = [], 0
+    while True:
+        task = await run_blocking(WORK_QUEUE.lease, owner)
+        if task is None:
+            if not forever and not await run_blocking(WORK_QUEUE.outstanding, keys):
+                break
+            await asyncio.sleep(QUEUE_POLL_SECONDS)
             continue
+        result = await run_show_task(task, travel_cache, next(counter), total)
+        if result:
+            unindexed.append(result)
+            saved += 1
+        if len(unindexed) >= INDEX_BATCH:
+            SHOW_INDEX.update(unindexed)
+            emit("saved", results=saved)
+            unindexed = []
+    if unindexed:
+        SHOW_INDEX.update(unindexed)
+
+async def run_show_worker(forever: bool = True):
+    # Standalone worker process: pulls shows queued by any pipeline run into the shared store.
+    # The coordinating run owns the Drive state, so the worker attaches without restoring any.
+    await run_blocking(ensure_started, False)
+    name = worker_id("show")
+    print(f"[INFO] Show worker {name} pulling from {WORK_QUEUE.path}.")
+    await show_worker(name, forever=forever)
 
-        # === Parse the PDF for Golden info ===
-        info = parse_pdf_for_info(pdf_path, show.get("show_name", ""))
-        if not info:
-            print(f"Skipping {show.get('show_name')} (Golden Retriever not mentioned)")
+async def main_processing_loop(show_list: list):
+    # Queues the shows not processed yet, works through the queue until none of them is
+    # outstanding, then collects what each came to
+    tasks = []
+    for show in show_list:
+        show_url = show.get("url")
+        if not show_url:
             continue
-
-        # === Trust title show type unless it's Unknown ===
-        if show.get("type", "Unknown") == "Unknown" and "type" in info:
-            show["type"] = info["type"]
-
-        # === Travel data ===
-        travel_info = get_travel_info(postcode, travel_cache) if postcode else {}
-
-        result = {
-            "show_url": show_url,
-            "show_name": show.get("show_name"),
-            "show_date": show.get("date").isoformat() if isinstance(show.get("date"), datetime.date) else show.get("date"),
-            "type": show.get("type"),
-            "judge_dogs": info.get("judge_dogs"),
-            "judge_bitches": info.get("judge_bitches"),
-            "venue": venue,
-            "postcode": postcode,
-            "first_entry_fee": info.get("first_entry_fee"),
-            "subsequent_entry_fee": info.get("subsequent_entry_fee"),
-            "catalogue_fee": info.get("catalogue_price"),
-            "entry_close": postal_close_date.isoformat() if postal_close_date else None,
-            "distance_miles": travel_info.get("distance_miles"),
-            "duration_hours": travel_info.get("duration_hours"),
-            "estimated_cost": travel_info.get("estimated_cost"),
-            "overnight_required": travel_info.get("overnight_required"),
-            "overnight_cost": travel_info.get("overnight_cost"),
-        }
-
-        results.append(result)
-        processed_shows.add(show_url)
-
-        if len(results) % 5 == 0:
-            # Patch in missing drive time from cache before saving
-            for r in results:
-                postcode = r.get("postcode")
-                if postcode and "drive_time_minutes" not in r:
-                    cached = travel_cache.get(postcode)
-                    if cached and "duration_hours" in cached:
-                        r["drive_time_minutes"] = round(cached["duration_hours"] * 60)
-
-            save_results(results, processed_shows)
-
-    # Final patch before last save
-    for r in results:
-        postcode = r.get("postcode")
-        if postcode and "drive_time_minutes" not in r:
-            cached = travel_cache.get(postcode)
-            if cached and "duration_hours" in cached:
-                r["drive_time_minutes"] = round(cached["duration_hours"] * 60)
-
-    if travel_updated:
-        save_travel_cache(travel_cache)
-
-    upload_to_google_drive()
+        if await run_blocking(STORE.is_processed, show_url):
+            metrics.cache_lookup("processed_shows", hit=True)
+            continue
+        metrics.cache_lookup("processed_shows", hit=False)
+        tasks.append((show_url, show_payload(show)))
+    keys = [key for key, _ in tasks]
+    queued = await run_blocking(WORK_QUEUE.enqueue, tasks)
+    emit("queued", shows=len(keys), new=queued)
+
+    travel_cache = load_travel_cache()  # This run's lookups; new ones are saved as they are made
+    counter = itertools.count(1)
+    await asyncio.gather(*(show_worker(worker_id(f"show-{i}"), keys, travel_cache, counter, len(keys))
+                           for i in range(SHOW_WORKERS)))
+
+    # Every worker delivered to the store; the queue holds what each show came to
+    outcomes = await run_blocking(WORK_QUEUE.results, keys)
+    results = [result for _, status, result in outcomes if status == "done" and result]
+    failed = sum(1 for _, status, _ in outcomes if status == "failed")
+    if failed:
+        # Unprocessed shows are queued again whenever the listing is next gone through
+        discard_listing_state()
+        print(f"[WARN] {failed} shows failed after {WORK_QUEUE.max_attempts} attempts; "
+              "the listing will be processed again next run to retry them.")
+
+    with metrics.timed("upload"):
+        await run_blocking(upload_to_google_drive)
+    emit("uploaded")
     print("Processing loop complete.")
     return results
-    
-async def full_run():
-    run_golden_scrape()
-    await run_higham_links()  # <-- Fix: Await the async function
 
-    # Fetch the list of shows
-    async with async_playwright() as pw:
-        browser = await pw.chromium.launch()
-        page = await browser.new_page()
-        show_list = await fetch_show_list(page)
-        await browser.close()
+# ===== Profiling =====
+PROFILE_STAGES = ("listing", "schedule", "overnight", "results")
+PROFILE_INPUT_DIR = "profile_inputs"
+
+def load_profile_input(name: str, source: str, fetch) -> str:
+    # "live" fetches the input now and keeps a copy; "cached" reuses the last kept copy
+    path = os.path.join(PROFILE_INPUT_DIR, name)
+    if source == "live":
+        text = fetch()
+        os.makedirs(PROFILE_INPUT_DIR, exist_ok=True)
+        atomic_write(path, lambda f: f.write(text.encode("utf-8")), "wb")
+        return text
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No cached input {path}; profile once with source=live first")
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def profile_stage_call(stage: str, target: Optional[str] = None, source: str = "cached"):
+    # Loads the stage's input up front and returns a callable running just the stage on it
+    if source not in ("live", "cached"):
+        raise ValueError("source must be 'live' or 'cached'")
+    if stage == "listing":
+        html = load_profile_input("shows_to_enter.html", source,
+                                  lambda: http_client.get(SHOWS_TO_ENTER_URL, timeout=60).text)
+        return lambda: parse_show_list(html)
+    if stage == "schedule":
+        # target is a show URL, or the path of a schedule PDF already on disk
+        if not target:
+            raise ValueError("schedule needs target=<show URL or schedule PDF path>")
+        pdf_path = target if os.path.isfile(target) else schedule_pdf_path_for(target)
+        if source == "live" and not os.path.isfile(target):
+            pdf_path, _ = download_schedule_via_post(target, pdf_path)
+        if not pdf_path or not os.path.isfile(pdf_path):
+            raise FileNotFoundError(f"No schedule PDF for {target}")
+        return lambda: parse_pdf_for_info(pdf_path, "")
+    if stage == "overnight":
+        # Always runs on the stored results and travel cache; source=live lets cache misses hit the API
+        results = STORE.results()
+        travel_cache = load_travel_cache()
+        if source == "cached":
+            # Next-day pairs missing from the cache count as unreachable instead of being looked up
+            postcodes_by_date = defaultdict(set)
+            for r in results:
+                if r.get("postcode") and (r.get("show_date") or r.get("date")):
+                    postcodes_by_date[date_parse(r.get("show_date") or r.get("date")).date()].add(r["postcode"])
+            between = travel_cache.setdefault("between", {})
+            for day, origins in postcodes_by_date.items():
+                for origin in origins:
+                    for dest in postcodes_by_date.get(day + datetime.timedelta(days=1), ()):
+                        between.setdefault(f"{origin}||{dest}", {"distance_miles": 0, "drive_time_minutes": 9999})
+        return lambda: detect_overnight_pairs(results, travel_cache)
+    if stage == "results":
+        if not target:
+            raise ValueError("results needs target=<show results page URL>")
+        html = load_profile_input(f"results_{show_key(target)}.html", source,
+                                  lambda: fetch_show_results_html(http_client.new_session(), target) or "")
+        return lambda: parse_show_results(html, "", "")
+    raise ValueError(f"Unknown stage {stage!r}; expected one of {PROFILE_STAGES}")
+
+def profile_stage(stage: str, target: Optional[str] = None, source: str = "cached", seconds: float = 2.0) -> dict:
+    # Runs one pipeline stage repeatedly under the sampling profiler; "collapsed" holds
+    # flamegraph-compatible folded stacks
+    call = profile_stage_call(stage, target, source)
+    return {"stage": stage, "target": target, "source": source, **profiling.profile_call(call, seconds)}
+
+async def full_run(force: bool = False, include_golden: bool = True, include_higham: bool = True):
+    # Runs the pipeline with a run report collecting its timings, written and uploaded however it ends
+    report = run_report.start_report()
+    status = "failed"
+    try:
+        async with blocking.monitored_loop("pipeline"):
+            results = await run_pipeline(force, include_golden, include_higham)
+        status = "succeeded"
+        return results
+    finally:
+        report.finish(status)
+        report.write()
+        if drive_credentials() and gdrive_folder_id:
+            try:
+                await run_blocking(upload_file_to_drive, run_report.RUN_REPORT_FILE, "application/json")
+            except Exception as e:
+                print(f"[ERROR] Run report upload failed: {e}")
+
+
+async def run_pipeline(force: bool = False, include_golden: bool = True, include_higham: bool = True):
+    await run_blocking(ensure_started)
+
+    # Fetch the list of shows first: an unchanged listing means there are no shows to process
+    with metrics.timed("listing"):
+        show_list = await run_blocking(fetch_show_list, force)
+    emit("listing_fetched", changed=show_list is not None, shows=len(show_list or []))
+
+    # The results history and Higham links do not depend on the listing
+    if include_golden:
+        with metrics.timed("golden_scrape"):
+            await run_blocking(run_golden_scrape)
+        emit("golden_scraped")
+    if include_higham:
+        with metrics.timed("higham_links"):
+            await save_higham_links()
+        emit("higham_links_saved")
+
+    if show_list is None:
+        print("[INFO] Listing unchanged; skipping show processing.")
+        if include_golden or include_higham:
+            with metrics.timed("upload"):
+                await run_blocking(upload_to_google_drive)
+            emit("uploaded")
+        return []
 
     # Process each show
     results = await main_processing_loop(show_list)
 
     # Save results after all processing
-    save_results(results, processed_shows)
+    with metrics.timed("save"):
+        await run_blocking(save_results, results)
+    emit("saved", results=len(results))
 
-    # Detect and write clashes and overnights
+    # Detect and write clashes and overnights; between-venue lookups go to the Maps API
     clashes = detect_clashes(results)
-    overnights = detect_overnight_pairs(results, load_travel_cache())
-
-    with open(CLASH_OVERNIGHT_CSV, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Type", "Date", "Show 1", "Show 2", "Chain Length", "Between Travel Times"])
-        for c in clashes:
-            writer.writerow([c["type"], c["date"], c["show1"], c["show2"], "", ""])
-        for o in overnights:
-            writer.writerow([
-                o["type"],
-                ", ".join(o["dates"]),
-                o["shows"][0],
-                o["shows"][-1],
-                o["chain_length"],
-                ", ".join(str(t) for t in o["between_travel_times"])
-            ])
+    with metrics.timed("overnight_detection"):
+        overnights = await run_blocking(detect_overnight_pairs, results, load_travel_cache())
+    await run_blocking(write_clashes_csv, clashes, overnights)
 
+    save_listing_state()
+    emit("clashes_written", clashes=len(clashes), overnights=len(overnights))
     return results
 
+def write_clashes_csv(clashes: List[dict], overnights: List[dict]):
+    atomic_write(CLASH_OVERNIGHT_CSV, lambda f: _write_clashes(f, clashes, overnights))
+
+def _write_clashes(f, clashes: List[dict], overnights: List[dict]):
+    writer = csv.writer(f)
+    writer.writerow(["Type", "Date", "Show 1", "Show 2", "Chain Length", "Between Travel Times"])
+    for c in clashes:
+        writer.writerow([c["type"], c["date"], c["show1"], c["show2"], "", ""])
+    for o in overnights:
+        writer.writerow([
+            o["type"],
+            ", ".join(o["dates"]),
+            o["shows"][0],
+            o["shows"][-1],
+            o["chain_length"],
+            ", ".join(str(t) for t in o["between_travel_times"])
+        ])
+
 
 if __name__ == "__main__":
-    final = asyncio.run(full_run())  # Execute full_run() asynchronously
-    print(f"Processed {len(final)} shows.")
+    import sys
+    import argparse
+    from jobs import ResourceLock, RUN_SCOPES
+
+    parser = argparse.ArgumentParser(description="Run the FosseData pipeline")
+    parser.add_argument("--profile", choices=PROFILE_STAGES, help="Profile one stage instead of running the pipeline")
+    parser.add_argument("--target", help="Show URL or schedule PDF (schedule), results page URL (results)")
+    parser.add_argument("--source", choices=("live", "cached"), default="cached")
+    parser.add_argument("--seconds", type=float, default=2.0, help="How long to keep re-running the stage")
+    parser.add_argument("--out", help="Write the folded stacks here instead of stdout")
+    parser.add_argument("--worker", action="store_true", help="Process queued shows instead of running the pipeline")
+    parser.add_argument("--drain", action="store_true", help="With --worker, exit once the queue is empty")
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(run_show_worker(forever=not args.drain))
+        sys.exit(0)
+
+    if args.profile:
+        profile = profile_stage(args.profile, args.target, args.source, args.seconds)
+        print(f"[INFO] {profile['runs']} runs of {args.profile} in {profile['elapsed']}s "
+              f"({profile['ms_per_run']} ms each), {profile['samples']} samples", file=sys.stderr)
+        if args.out:
+            with open(args.out, "w") as f:
+                f.write(profile["collapsed"])
+        else:
+            sys.stdout.write(profile["collapsed"])
+        sys.exit(0)
+
+    # Share the API's run locks so a CLI run never overlaps a server-triggered one
+    lock = ResourceLock(RUN_SCOPES["full"])
+    holder = lock.acquire("cli")
+    if holder:
+        print(f"[INFO] A run is already in progress (job {holder}); not starting another.")
+    else:
+        try:
+            final = asyncio.run(full_run())  # Execute full_run() asynchronously
+            print(f"Processed {len(final)} shows.")
+        finally:
+            lock.release()
@@ -1,11 +1,21 @@
-import requests
-from bs4 import BeautifulSoup
-import csv
+import os
+import datetime
+import threading
+import multiprocessing
+import contextvars
+import http_client
+import upstreams
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from breed_matcher import get_breed_matcher
+from golden_store import GOLDEN_STORE, CSV_FIELDS, SETTLE_DAYS, ResultRow, iso_date
+import columnar
 
 def get_year_show_list(session, year, base_viewstate, base_eventvalidation, base_viewstategen):
     """
     Retrieve the list of shows for a given year from the Fosse Data results page.
-    Returns a list of tuples (show_name, show_date, show_url).
+    Returns a list of tuples (show_name, show_date, show_url), and whether the
+    listing came from the response cache.
     """
     # Prepare POST data to filter results by the specified year
     data = {
@@ -31,7 +41,7 @@ def get_year_show_list(session, year, base_viewstate, base_eventvalidation, base
         # Construct full URL if needed
         show_url = href
         if show_url.startswith("/"):
-            show_url = "https://www.fossedata.co.uk" + show_url
+            show_url = upstreams.FOSSEDATA + show_url
         # The link cell is in the same row as show name and date
         # Traverse to the parent row (tr) and get text from the first two cells
         row = link.find_parent('tr')
@@ -51,31 +61,58 @@ def get_year_show_list(session, year, base_viewstate, base_eventvalidation, base
             show_name = show_name.strip() if show_name else ""
             show_date = show_date.strip() if show_date else ""
         show_list.append((show_name, show_date, show_url))
-    return show_list
+    return show_list, http_client.from_cache(response)
 
-def scrape_show_results(session, show_name, show_date, show_url):
+def _results_form(session, cache_control=None):
+    # Hidden form fields of the results listing, for the year postbacks, and whether the
+    # page came from the response cache
+    resp = session.get(RESULTS_URL, headers={"Cache-Control": cache_control} if cache_control else None)
+    resp.raise_for_status()
+    soup = BeautifulSoup(resp.text, "html.parser", parse_only=SoupStrainer("input"))
+    fields = []
+    for field in ("__VIEWSTATE", "__EVENTVALIDATION", "__VIEWSTATEGENERATOR"):
+        tag = soup.find("input", {"id": field})
+        fields.append(tag["value"] if tag else "")
+    return tuple(fields), http_client.from_cache(resp)
+
+def results_max_age(show_date):
+    # Published results are cached indefinitely, but a recent show's may still change
+    iso = iso_date(show_date)
+    if iso and (datetime.date.today() - datetime.date.fromisoformat(iso)).days >= SETTLE_DAYS:
+        return None
+    return RECENT_RESULTS_MAX_AGE
+
+def fetch_show_results_html(session, show_url, max_age=None):
     """
-    Scrape Golden Retriever results from a single show results page.
-    Returns a list of result rows (each a dict) for the given show.
+    Fetch the raw HTML for a single show results page (the I/O half of a scrape).
+    If the page lists several breeds, posts back the breed filter so the returned
+    HTML holds the Golden Retriever results. Returns None when there is nothing to parse.
+    max_age (seconds) caps how old a cached copy of the page may be.
     """
-    results = []
+    html, stale_form = _fetch_show_results(session, show_url, f"max-age={max_age}" if max_age is not None else None)
+    if stale_form:
+        # The postback went upstream with a cached page's form state; start again from a live page
+        html, _ = _fetch_show_results(session, show_url, "no-cache")
+    return html
+
+def _fetch_show_results(session, show_url, cache_control=None):
+    # (html, stale_form): stale_form when the page came from the cache but its postback did not
+    headers = {"Cache-Control": cache_control} if cache_control else None
     # Fetch the show results page
-    res = session.get(show_url)
+    res = session.get(show_url, headers=headers)
     res.raise_for_status()
-    soup = BeautifulSoup(res.text, "html.parser")
-    page_text = soup.get_text(separator="\n")  # full text for quick checks
-    # Skip if no results available or Golden not listed
-    if "Show Results are not yet available" in page_text:
-        return results  # no results to scrape
-    if "Retriever (Golden)" not in page_text:
-        return results  # skip shows with no Golden Retriever in breed list
-    
+    html = res.text
+    # Cheap pre-checks on the raw HTML; the parse stage re-checks the page text
+    if "Show Results are not yet available" in html or "Golden" not in html:
+        return None, False
+
     # If multiple breeds, we may need to trigger the Golden Retriever breed filter.
-    # Identify the breed dropdown control and Golden's option value.
+    # Only the form controls are needed here, so skip building the rest of the tree.
+    soup = BeautifulSoup(html, "lxml", parse_only=SoupStrainer(["select", "input"]))
     breed_option = None
     # Find the option for Retriever (Golden) in the HTML
     for option in soup.find_all('option'):
-        if option.get_text(strip=True) == "Retriever (Golden)":
+        if option.get_text(strip=True) == GOLDEN_BREED:
             breed_option = option
             break
     if breed_option and breed_option.get("value"):
@@ -104,14 +141,32 @@ def scrape_show_results(session, show_name, show_date, show_url):
                 select_name: breed_value
             }
             # Send POST to show page to get Golden Retriever results
-            res2 = session.post(show_url, data=post_data)
+            res2 = session.post(show_url, data=post_data, headers=headers)
             res2.raise_for_status()
-            soup = BeautifulSoup(res2.text, "html.parser")
-            page_text = soup.get_text(separator="\n")
-    # Now parse Golden Retriever results from the soup
+            return res2.text, http_client.from_cache(res) and not http_client.from_cache(res2)
+    return html, False
+
+def parse_show_results(html, show_name, show_date):
+    """
+    Parse Golden Retriever results out of a fetched show results page (the CPU half
+    of a scrape). Safe to run in a worker process: returns a list of ResultRow
+    records, which iterate in RESULT_FIELDS order.
+    """
+    results = []
+    soup = BeautifulSoup(html, "html.parser")
+    page_text = soup.get_text(separator="\n")  # full text for quick checks
+    # Skip if no results available or Golden not listed
+    if "Show Results are not yet available" in page_text:
+        return results  # no results to scrape
+    if GOLDEN_BREED not in page_text:
+        return results  # skip shows with no Golden Retriever in breed list
+
+    # Now parse Golden Retriever results from the page text
     # Narrow down to the Golden Retriever section by finding the breed heading
+    breed_matcher = get_breed_matcher()
     breed_section = []
     start_found = False
+    judge = ""
     for line in page_text.splitlines():
         line = line.strip()
         if not line:
@@ -121,6 +176,7 @@ def scrape_show_results(session, show_name, show_date, show_url):
             # The breed section typically starts with "Retriever (Golden) - Judge:"
             if line.startswith("Retriever (Golden)") and "Judge:" in line:
                 start_found = True
+                judge = line.split("Judge:", 1)[1].strip()
                 continue  # don't include this heading line itself in results
         if start_found:
             # Break when we reach the next group or breed heading (i.e., another group name)
@@ -131,6 +187,8 @@ def scrape_show_results(session, show_name, show_date, show_url):
             if line.startswith("Retriever (Golden)"):
                 # If somehow repeated breed heading appears, skip it
                 continue
+            if "Judge:" in line and breed_matcher.match_start(line):
+                break  # another breed's heading
             breed_section.append(line)
     # Parse lines in breed_section to extract classes and awards
     current_class = None
@@ -210,18 +268,12 @@ def scrape_show_results(session, show_name, show_date, show_url):
             else:
                 dog_name = doginfo
                 owners = ""
-            result = {
-                "Show": show_name,
-                "Date": show_date,
-                "Breed": "Retriever (Golden)",
-                "Class/Award": award,  # e.g. "Dog CC"
-                "Placement": "",      # no numeric placement for awards
-                "Dog": dog_name,
-                "Owner(s)": owners,
-                "Entries": "",
-                "Absentees": ""
-            }
-            results.append(result)
+            results.append(ResultRow(
+                show_name, show_date, GOLDEN_BREED,
+                award, "",
+                dog_name, owners,
+                "", "", judge,
+            ))
             continue
         if line.lower().startswith("best"):
             # Lines like "Best of Breed: 1234 - DogName (Owner)" or "Best Puppy:" etc.
@@ -245,18 +297,12 @@ def scrape_show_results(session, show_name, show_date, show_url):
             else:
                 dog_name = doginfo or ""
                 owners = ""
-            result = {
-                "Show": show_name,
-                "Date": show_date,
-                "Breed": "Retriever (Golden)",
-                "Class/Award": award,  # e.g. "Best of Breed"
-                "Placement": "",
-                "Dog": dog_name,
-                "Owner(s)": owners,
-                "Entries": "",
-                "Absentees": ""
-            }
-            results.append(result)
+            results.append(ResultRow(
+                show_name, show_date, GOLDEN_BREED,
+                award, "",
+                dog_name, owners,
+                "", "", judge,
+            ))
             continue
         # Check for group placements within Golden section (if any Golden in group was listed here)
         # They might appear as lines starting with "Group - 1st Place: ..." if included.
@@ -306,18 +352,12 @@ def scrape_show_results(session, show_name, show_date, show_url):
             prev_idx = breed_section.index(line) - 1
             if prev_idx >= 0 and "Special Beginners" in breed_section[prev_idx]:
                 group_name = "Gundog Group (Special Beginners)"
-            result = {
-                "Show": show_name,
-                "Date": show_date,
-                "Breed": "Retriever (Golden)",
-                "Class/Award": group_name,
-                "Placement": place_label,
-                "Dog": dog_name,
-                "Owner(s)": owners,
-                "Entries": "",
-                "Absentees": ""
-            }
-            results.append(result)
+            results.append(ResultRow(
+                show_name, show_date, GOLDEN_BREED,
+                group_name, place_label,
+                dog_name, owners,
+                "", "", judge,
+            ))
             continue
         # Otherwise, handle regular class placements (1st, 2nd, 3rd, Reserve, VHC in classes)
         # These lines typically start with "1st", "2nd", "Reserve", etc.
@@ -342,63 +382,128 @@ def scrape_show_results(session, show_name, show_date, show_url):
                 owners = ""
             # Use current_class as class name (if available)
             class_name = current_class if current_class else ""
-            result = {
-                "Show": show_name,
-                "Date": show_date,
-                "Breed": "Retriever (Golden)",
-                "Class/Award": class_name,
-                "Placement": placement_label,
-                "Dog": dog_name,
-                "Owner(s)": owners,
-                "Entries": class_entries or "",
-                "Absentees": class_absentees or ""
-            }
-            results.append(result)
+            results.append(ResultRow(
+                show_name, show_date, GOLDEN_BREED,
+                class_name, placement_label,
+                dog_name, owners,
+                class_entries or "", class_absentees or "", judge,
+            ))
             continue
     return results
 
-def scrape_all_results(start_year=2007, end_year=None, output_csv="golden_retriever_results.csv"):
+def scrape_show_results(session, show_name, show_date, show_url):
+    """
+    Scrape Golden Retriever results from a single show results page.
+    Returns a list of ResultRow records for the given show (row.as_dict() gives the
+    RESULT_FIELDS dict).
+    """
+    html = fetch_show_results_html(session, show_url)
+    if html is None:
+        return []
+    return parse_show_results(html, show_name, show_date)
+
+_thread_local = threading.local()
+
+def _thread_session():
+    # requests.Session is not guaranteed thread-safe, so each fetch thread gets its own
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = http_client.new_session()
+    return session
+
+def _fetch_in_thread(show_url, max_age=None):
+    return fetch_show_results_html(_thread_session(), show_url, max_age)
+
+def _parse_context():
+    # Forked workers would hold copies of every socket open in this process (the API
+    # server's connections among them), keeping connections the server has closed alive
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return None
+
+def _store_parsed(parse_jobs, store, wait=False):
+    # Writes each finished parse to the store, one show per transaction; returns the jobs still running
+    pending = []
+    for show_name, show_date, show_url, parse_job in parse_jobs:
+        if not wait and not parse_job.done():
+            pending.append((show_name, show_date, show_url, parse_job))
+            continue
+        try:
+            store.record_show(show_name, show_date, parse_job.result(), show_url)
+        except Exception as e:
+            print(f"Error parsing show {show_name} ({show_date}): {e}")
+    return pending
+
+def scrape_all_results(start_year=2007, end_year=None, output_csv="golden_retriever_results.csv",
+                       parse_workers=None, fetch_workers=4, store=None,
+                       output_parquet=None):
     """
-    Scrape Golden Retriever results from all shows between start_year and end_year (inclusive).
-    Writes the results to a CSV file specified by output_csv.
+    Scrape Golden Retriever results from all shows between start_year and end_year (inclusive)
+    into the results history store, then export the whole history to output_csv and to
+    a Parquet dataset partitioned by year (output_parquet, by default beside the CSV).
+
+    Shows whose stored results have settled are skipped, so a re-run only fetches new
+    and recent shows. Pages are fetched on a small thread pool and the raw HTML is
+    handed to a process pool for parsing, so the CPU-bound parse runs on every core
+    while I/O continues; each parsed show is written as soon as it is ready.
     """
     if end_year is None:
         from datetime import datetime
         end_year = datetime.now().year
-    session = requests.Session()
-    session.headers.update({"User-Agent": "Mozilla/5.0"})
+    if parse_workers is None:
+        parse_workers = int(os.getenv("RESULTS_PARSE_WORKERS", 0)) or os.cpu_count() or 1
+    store = store or GOLDEN_STORE
+    settled = store.settled()
+    session = http_client.new_session()
     # Load the initial results page to get hidden form fields
-    resp = session.get(RESULTS_URL)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-    base_viewstate = soup.find("input", {"id": "__VIEWSTATE"})
-    base_eventvalidation = soup.find("input", {"id": "__EVENTVALIDATION"})
-    base_viewstategen = soup.find("input", {"id": "__VIEWSTATEGENERATOR"})
-    base_viewstate = base_viewstate["value"] if base_viewstate else ""
-    base_eventvalidation = base_eventvalidation["value"] if base_eventvalidation else ""
-    base_viewstategen = base_viewstategen["value"] if base_viewstategen else ""
-    all_results = []
-    for year in range(start_year, end_year+1):
-        try:
-            show_list = get_year_show_list(session, year, base_viewstate, base_eventvalidation, base_viewstategen)
-        except Exception as e:
-            print(f"Error retrieving show list for year {year}: {e}")
-            continue
-        for show_name, show_date, show_url in show_list:
+    form, form_cached = _results_form(session)
+    parse_jobs = []
+    skipped = 0
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetchers, \
+            ProcessPoolExecutor(max_workers=parse_workers, mp_context=_parse_context()) as parsers:
+        for year in range(start_year, end_year+1):
             try:
-                show_results = scrape_show_results(session, show_name, show_date, show_url)
+                show_list, listed_from_cache = get_year_show_list(session, year, *form)
+                if form_cached and not listed_from_cache:
+                    # The postback went upstream with a cached page's form state; go again from a live page
+                    form, form_cached = _results_form(session, "no-cache")
+                    show_list, _ = get_year_show_list(session, year, *form)
             except Exception as e:
-                print(f"Error scraping show {show_name} ({show_date}): {e}")
+                print(f"Error retrieving show list for year {year}: {e}")
                 continue
-            if show_results:
-                all_results.extend(show_results)
-    # Write all results to CSV
-    fieldnames = ["Show", "Date", "Breed", "Class/Award", "Placement", "Dog", "Owner(s)", "Entries", "Absentees"]
-    with open(output_csv, "w", newline='', encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in all_results:
-            writer.writerow(row)
+            new_shows = [show for show in show_list if (show[0], show[1]) not in settled]
+            skipped += len(show_list) - len(new_shows)
+            # Each fetch runs in a copy of this context so the caller's run report sees its requests
+            fetch_jobs = [
+                (show_name, show_date, show_url,
+                 fetchers.submit(contextvars.copy_context().run, _fetch_in_thread, show_url, results_max_age(show_date)))
+                for show_name, show_date, show_url in new_shows
+            ]
+            # Hand each page to the parse pool as soon as it arrives; the next year's
+            # fetches overlap with this year's parsing.
+            for show_name, show_date, show_url, fetch_job in fetch_jobs:
+                try:
+                    html = fetch_job.result()
+                except Exception as e:
+                    print(f"Error scraping show {show_name} ({show_date}): {e}")
+                    continue
+                if html is None:
+                    # No Golden Retriever results (yet); recorded so a settled show is not fetched again
+                    store.record_show(show_name, show_date, [], show_url)
+                    continue
+                parse_jobs.append((show_name, show_date, show_url,
+                                   parsers.submit(parse_show_results, html, show_name, show_date)))
+            parse_jobs = _store_parsed(parse_jobs, store)
+        _store_parsed(parse_jobs, store, wait=True)
+    print(f"[INFO] Golden results history holds {store.count()} placings; {skipped} settled shows skipped.")
+    store.export_csv(output_csv)
+    try:
+        columnar.write_history(store.iter_placements(), output_parquet or columnar.parquet_path(output_csv))
+    except Exception as e:
+        print(f"[WARN] Could not write the Parquet history: {e}")
 
 # Constants
-RESULTS_URL = "https://www.fossedata.co.uk/show-results/"
+RESULTS_URL = f"{upstreams.FOSSEDATA}/show-results/"
+GOLDEN_BREED = "Retriever (Golden)"
+RECENT_RESULTS_MAX_AGE = 3600   # Seconds a cached results page of a not yet settled show is reused
+RESULT_FIELDS = CSV_FIELDS
@@ -0,0 +1,169 @@
+# fuel_price.py
+
+import io
+import os
+import csv
+import json
+import time
+import datetime
+import threading
+from collections import deque
+from typing import Optional, Tuple
+from store import atomic_write
+import http_client
+import metrics
+import upstreams
+
+FUEL_PRICE_FILE = "fuel_price.json"   # Last known price, kept across restarts (and synced to Drive)
+FUEL_PRICE_TTL = float(os.getenv("FUEL_PRICE_TTL_DAYS", 7)) * 86400
+FUEL_PRICE_RETRY = 3600              # Seconds between attempts while the source is failing
+FALLBACK_DIESEL_PRICE = 1.57          # Only used before any price has ever been fetched
+FUEL_PRICES_URL = f"{upstreams.GOV_ASSETS}/government/uploads/system/uploads/attachment_data/file/1254009/weekly-road-fuel-prices.csv"
+
+# The CSV grows by one row a week; only its header and its last row are needed
+HEAD_BYTES = 4096
+TAIL_BYTES = 8192
+
+
+def _ranged_get(url: str, byte_range: str):
+    return http_client.get(url, headers={"Range": f"bytes={byte_range}"}, stream=True, timeout=10)
+
+
+def _stream_first_last(resp) -> Tuple[str, str]:
+    # For servers that ignore Range: walks the body line by line, holding only the header and the latest row
+    lines = (line for line in resp.iter_lines(decode_unicode=False) if line.strip())
+    header = next(lines, b"")
+    last = deque(lines, maxlen=1)
+    return header.decode("utf-8-sig"), last[0].decode("utf-8") if last else ""
+
+
+def _row(header: str, line: str) -> dict:
+    return next(csv.DictReader(io.StringIO(f"{header}\n{line}\n")), {})
+
+
+def fetch_latest_row(url: str = FUEL_PRICES_URL) -> dict:
+    # The newest row of the weekly CSV, read from a ranged request for the file's tail
+    with _ranged_get(url, f"-{TAIL_BYTES}") as resp:
+        resp.raise_for_status()
+        if resp.status_code != 206:
+            return _row(*_stream_first_last(resp))
+        lines = [line for line in resp.content.decode("utf-8-sig", errors="replace").splitlines() if line.strip()]
+        whole_file = resp.headers.get("Content-Range", "").startswith("bytes 0-")
+    if whole_file:
+        return _row(lines[0], lines[-1]) if len(lines) > 1 else {}
+    # The tail's first line is usually cut mid-row, so a usable tail holds at least two
+    if len(lines) < 2:
+        raise ValueError(f"No complete row in the last {TAIL_BYTES} bytes of {url}")
+
+    with _ranged_get(url, f"0-{HEAD_BYTES - 1}") as resp:
+        resp.raise_for_status()
+        head = next(resp.iter_content(HEAD_BYTES), b"")
+    return _row(head.decode("utf-8-sig", errors="replace").splitlines()[0], lines[-1])
+
+
+def fetch_gov_diesel_price(url: str = FUEL_PRICES_URL) -> float:
+    diesel_price_ppl = fetch_latest_row(url).get("Diesel", "").replace("p", "").strip()
+    if not diesel_price_ppl:
+        raise ValueError("Latest fuel price row has no Diesel value")
+    return float(diesel_price_ppl) / 100.0
+
+
+class FuelPriceService:
+    """
+    Last known diesel price with the time it was fetched. A price older than the TTL
+    is still served while a background thread fetches the new one; a failed fetch
+    leaves the last value in place.
+    """
+
+    def __init__(self, path: str = FUEL_PRICE_FILE, ttl: float = FUEL_PRICE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._price = None
+        self._fetched_at = 0.0
+        self._refreshing = False
+        self._last_attempt = 0.0
+        self._first_fetch = threading.Lock()
+        self._mtime = None   # Of the file as last loaded; another worker's refresh changes it
+        self.loaded = False
+
+    def load(self):
+        # Picks up the persisted price, e.g. after it has been restored from Drive
+        price, fetched_at = None, 0.0
+        mtime = self._file_mtime()
+        if mtime is not None:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                price, fetched_at = float(data["diesel_price_per_litre"]), float(data["fetched_at"])
+            except Exception as e:
+                print(f"[WARN] Could not load {self.path}: {e}")
+        with self._lock:
+            if price is not None and fetched_at >= self._fetched_at:
+                self._price, self._fetched_at = price, fetched_at
+            self._mtime = mtime
+            self.loaded = True
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _save(self):
+        data = {
+            "diesel_price_per_litre": self._price,
+            "fetched_at": self._fetched_at,
+            "fetched_on": datetime.datetime.fromtimestamp(self._fetched_at).isoformat(timespec="seconds"),
+        }
+        try:
+            atomic_write(self.path, lambda f: json.dump(data, f, indent=2))
+        except Exception as e:
+            print(f"[WARN] Could not save {self.path}: {e}")
+
+    def refresh(self) -> Optional[float]:
+        # Fetches now; returns the new price, or None when the fetch failed
+        self._last_attempt = time.time()
+        try:
+            price = fetch_gov_diesel_price()
+        except Exception as e:
+            print(f"[WARN] Gov fuel price fetch failed, keeping the last known price: {e}")
+            return None
+        finally:
+            self._refreshing = False
+        with self._lock:
+            self._price, self._fetched_at = price, time.time()
+            self._save()
+        print(f"[INFO] Gov diesel price: £{price:.2f} per litre")
+        return price
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing or time.time() - self._last_attempt < FUEL_PRICE_RETRY:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="fuel-price-refresh", daemon=True).start()
+
+    def is_stale(self) -> bool:
+        return time.time() - self._fetched_at > self.ttl
+
+    def price(self) -> float:
+        # Never waits on the network once a price is known
+        if not self.loaded or self._file_mtime() != self._mtime:
+            self.load()
+        if self._price is None:
+            # Nothing to fall back on yet, so the very first fetch is waited for
+            metrics.cache_lookup("fuel_price", hit=False)
+            with self._first_fetch:
+                if self._price is None and self.refresh() is None:
+                    # Served (not saved) until a fetch succeeds; stale, so that is retried
+                    with self._lock:
+                        self._price = FALLBACK_DIESEL_PRICE
+            return self._price
+        metrics.cache_lookup("fuel_price", hit=not self.is_stale())
+        if self.is_stale():
+            self._refresh_in_background()
+        return self._price
+
+
+FUEL_PRICES = FuelPriceService()
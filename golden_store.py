@@ -0,0 +1,347 @@
+# golden_store.py
+
+import os
+import re
+import csv
+import sys
+import json
+import datetime
+import unicodedata
+from typing import Iterator, List, Optional, Sequence
+from dateutil.parser import parse as date_parse
+from store import SQLiteStore, atomic_write
+
+GOLDEN_DB = os.getenv("GOLDEN_DB", "golden_history.db")
+# Results can still change for a while after a show; a show scraped at least this many
+# days after it was held is settled and is not fetched again
+SETTLE_DAYS = int(os.getenv("GOLDEN_SETTLE_DAYS", 30))
+
+BREED = "Retriever (Golden)"
+CSV_FIELDS = ["Show", "Date", "Breed", "Class/Award", "Placement", "Dog", "Owner(s)", "Entries", "Absentees", "Judge"]
+
+
+class ResultRow:
+    """
+    One placing, with the CSV_FIELDS as slots. Its strings are interned, so a show's
+    name, date and judge, the breed and the class and placement labels are each held
+    once however many rows repeat them. Iterates and indexes like the CSV row it
+    stands for, so csv.writer takes it as it is.
+    """
+
+    __slots__ = ("show", "date", "breed", "class_name", "placement", "dog", "owners", "entries", "absentees", "judge")
+
+    def __init__(self, show, date, breed, class_name, placement, dog, owners, entries, absentees, judge=""):
+        self.show = sys.intern(show)
+        self.date = sys.intern(date)
+        self.breed = sys.intern(breed)
+        self.class_name = sys.intern(class_name)
+        self.placement = sys.intern(placement)
+        self.dog = sys.intern(dog or "")
+        self.owners = sys.intern(owners or "")
+        self.entries = sys.intern(str(entries))
+        self.absentees = sys.intern(str(absentees))
+        self.judge = sys.intern(judge or "")
+
+    def __iter__(self):
+        return (getattr(self, slot) for slot in self.__slots__)
+
+    def __getitem__(self, index):
+        return getattr(self, self.__slots__[index])
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __reduce__(self):
+        # Pickled as its values (e.g. back from a parse worker); unpickling interns them again
+        return ResultRow, tuple(self)
+
+    def __repr__(self):
+        return f"ResultRow{tuple(self)!r}"
+
+    def as_dict(self) -> dict:
+        # For csv.DictWriter(fieldnames=CSV_FIELDS)
+        return dict(zip(CSV_FIELDS, self))
+
+SCHEMA = """
+-- A show is identified by its name and the date as the results listing shows it
+CREATE TABLE IF NOT EXISTS shows (
+    id         INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL,
+    date_text  TEXT NOT NULL,
+    show_date  TEXT,            -- ISO date, for ordering and ranges
+    show_url   TEXT,
+    judge      TEXT,            -- Golden Retriever breed judge
+    judge_key  TEXT,            -- normalise_judge(judge)
+    scraped_at TEXT NOT NULL,
+    UNIQUE (name, date_text)
+);
+CREATE INDEX IF NOT EXISTS shows_by_date ON shows (show_date);
+CREATE INDEX IF NOT EXISTS shows_by_judge ON shows (judge COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS dogs (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+
+CREATE TABLE IF NOT EXISTS owners (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS placements (
+    id        INTEGER PRIMARY KEY,
+    show_id   INTEGER NOT NULL REFERENCES shows (id) ON DELETE CASCADE,
+    class     TEXT NOT NULL,    -- class name, or the award (Dog CC, Best of Breed, Gundog Group)
+    placement TEXT NOT NULL,
+    dog_id    INTEGER REFERENCES dogs (id),
+    owner_id  INTEGER REFERENCES owners (id),
+    entries   TEXT NOT NULL,
+    absentees TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS placements_by_show ON placements (show_id);
+CREATE INDEX IF NOT EXISTS placements_by_dog ON placements (dog_id);
+CREATE INDEX IF NOT EXISTS placements_by_class ON placements (class);
+
+-- Per-judge aggregates, kept current as each show is written
+CREATE TABLE IF NOT EXISTS judges (
+    judge_key    TEXT PRIMARY KEY,
+    name         TEXT NOT NULL,     -- spelling at the judge's latest appointment
+    shows_judged INTEGER NOT NULL,
+    entries_seen INTEGER NOT NULL,
+    dogs_placed  INTEGER NOT NULL,
+    cc_winners   TEXT NOT NULL,     -- JSON list of dog names
+    bob_winners  TEXT NOT NULL,     -- JSON list of dog names
+    first_judged TEXT,
+    last_judged  TEXT
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS shows_by_judge_key ON shows (judge_key);
+"""
+
+# Titles and honorifics dropped from judge names before matching
+JUDGE_TITLES = {"mr", "mrs", "ms", "miss", "mx", "dr", "rev", "revd", "prof", "sir", "dame", "lady", "lord",
+                "capt", "col", "maj", "major"}
+
+PLACEMENT_COLUMNS = ["show", "date", "show_date", "judge", "class", "placement", "dog", "owners", "entries", "absentees"]
+PLACEMENTS_QUERY = """
+SELECT s.name AS show, s.date_text AS date, s.show_date, s.judge, p.class, p.placement,
+       d.name AS dog, o.name AS owners, p.entries, p.absentees
+FROM placements p
+JOIN shows s ON s.id = p.show_id
+LEFT JOIN dogs d ON d.id = p.dog_id
+LEFT JOIN owners o ON o.id = p.owner_id
+"""
+
+
+def normalise_judge(name: Optional[str]) -> str:
+    """
+    Matching key for a judge's name as written in schedules and results:
+    "Mrs J. Smith", "Jane Smith" and "MRS JANE A SMITH (Kennelname)" all become "j smith".
+    """
+    if not name:
+        return ""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    name = re.sub(r"\(.*?\)", " ", name)   # affixes and kennel names
+    words = [w for w in re.findall(r"[a-z]+(?:['-][a-z]+)*", name.lower()) if w not in JUDGE_TITLES]
+    if not words:
+        return ""
+    if len(words) == 1:
+        return words[0]
+    return f"{words[0][0]} {words[-1]}"
+
+
+def iso_date(date_text: str) -> Optional[str]:
+    # Listings write dates day first ("01/06/2024", "1 Jun 2024") unless they lead with the year
+    try:
+        return date_parse(date_text, dayfirst=not re.match(r"\s*\d{4}", date_text)).date().isoformat()
+    except (ValueError, OverflowError, TypeError):
+        return None
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class GoldenStore(SQLiteStore):
+    """
+    Golden Retriever results history, normalised into shows, dogs, owners and
+    placements. Each scraped show is written in its own transaction, replacing any
+    placements stored for it before; golden_results.csv is an export.
+    """
+
+    schema = SCHEMA
+    migrations = (("shows", "judge_key", "TEXT"),)
+    indexes = INDEXES
+
+    def __init__(self, path: str = GOLDEN_DB):
+        super().__init__(path)
+
+    def _backfill(self, conn, table: str, column: str):
+        if (table, column) == ("shows", "judge_key"):
+            conn.executemany("UPDATE shows SET judge_key = ? WHERE id = ?",
+                             [(normalise_judge(judge), show_id) for show_id, judge in conn.execute("SELECT id, judge FROM shows")])
+            for (key,) in conn.execute("SELECT DISTINCT judge_key FROM shows WHERE judge_key != ''").fetchall():
+                self._refresh_judge(conn, key)
+
+    def _refresh_judge(self, conn, key: str):
+        # Recomputes one judge's aggregates; the cost follows that judge's history, not the store's
+        if not key:
+            return
+        shows = conn.execute("SELECT COUNT(*), MIN(show_date), MAX(show_date) FROM shows WHERE judge_key = ?", (key,)).fetchone()
+        if not shows[0]:
+            conn.execute("DELETE FROM judges WHERE judge_key = ?", (key,))
+            return
+        name = conn.execute("SELECT judge FROM shows WHERE judge_key = ? ORDER BY show_date DESC LIMIT 1", (key,)).fetchone()[0]
+        judged = "FROM placements p JOIN shows s ON s.id = p.show_id WHERE s.judge_key = ?"
+        # A class's entry count is repeated on each of its placings, so count it once per class
+        entries = conn.execute(
+            f"SELECT COALESCE(SUM(e), 0) FROM (SELECT MAX(CAST(p.entries AS INTEGER)) AS e {judged} "
+            "AND p.entries != '' GROUP BY p.show_id, p.class)", (key,)).fetchone()[0]
+        dogs = conn.execute(f"SELECT COUNT(DISTINCT p.dog_id) {judged}", (key,)).fetchone()[0]
+
+        def winners(award_clause):
+            rows = conn.execute(
+                "SELECT d.name FROM placements p JOIN shows s ON s.id = p.show_id JOIN dogs d ON d.id = p.dog_id "
+                f"WHERE s.judge_key = ? AND {award_clause} GROUP BY d.id ORDER BY MAX(s.show_date) DESC", (key,))
+            return json.dumps([row[0] for row in rows])
+
+        conn.execute(
+            "INSERT OR REPLACE INTO judges (judge_key, name, shows_judged, entries_seen, dogs_placed, cc_winners, "
+            "bob_winners, first_judged, last_judged) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, name, shows[0], entries, dogs, winners("p.class LIKE '%CC' AND p.class NOT LIKE 'Res%'"),
+             winners("p.class LIKE 'Best of Breed%'"), shows[1], shows[2]),
+        )
+
+    def _name_id(self, conn, table: str, name: str) -> Optional[int]:
+        if not name:
+            return None
+        conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+        return conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+
+    def _record(self, conn, name: str, date_text: str, rows: Sequence[Sequence], show_url: Optional[str],
+                judge: Optional[str], scraped_at: str) -> set:
+        # Writes one show; returns the judge keys whose aggregates it changed
+        before = conn.execute("SELECT judge_key FROM shows WHERE name = ? AND date_text = ?", (name, date_text)).fetchone()
+        conn.execute(
+            "INSERT INTO shows (name, date_text, show_date, show_url, judge, judge_key, scraped_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (name, date_text) DO UPDATE SET show_url = coalesce(excluded.show_url, show_url), "
+            "judge = coalesce(excluded.judge, judge), judge_key = coalesce(excluded.judge_key, judge_key), "
+            "scraped_at = excluded.scraped_at",
+            (name, date_text, iso_date(date_text), show_url, judge, normalise_judge(judge) if judge else None, scraped_at),
+        )
+        show_id, judge_key = conn.execute("SELECT id, judge_key FROM shows WHERE name = ? AND date_text = ?",
+                                          (name, date_text)).fetchone()
+        conn.execute("DELETE FROM placements WHERE show_id = ?", (show_id,))
+        conn.executemany(
+            "INSERT INTO placements (show_id, class, placement, dog_id, owner_id, entries, absentees) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(show_id, cls, placement, self._name_id(conn, "dogs", dog), self._name_id(conn, "owners", owners),
+              entries or "", absentees or "")
+             for _, _, _, cls, placement, dog, owners, entries, absentees, *_ in rows],
+        )
+        return {key for key in (judge_key, before[0] if before else None) if key}
+
+    def record_show(self, name: str, date_text: str, rows: Sequence[Sequence], show_url: Optional[str] = None):
+        # rows are parse_show_results ResultRows (or tuples) in CSV_FIELDS order; an empty list records a
+        # show with no Golden Retriever results, so it is not fetched again once settled
+        judge = next((row[9] for row in rows if len(row) > 9 and row[9]), None)
+        with self.connection() as conn, conn:
+            for key in self._record(conn, name, date_text, rows, show_url, judge, _now()):
+                self._refresh_judge(conn, key)
+
+    def settled(self) -> set:
+        # (name, date_text) of shows whose stored results will not change any more
+        with self.connection() as conn:
+            return {(row[0], row[1]) for row in conn.execute(
+                "SELECT name, date_text FROM shows WHERE show_date IS NOT NULL "
+                "AND julianday(scraped_at) - julianday(show_date) >= ?", (SETTLE_DAYS,))}
+
+    def count(self) -> int:
+        with self.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM placements").fetchone()[0]
+
+    def judge_stats(self) -> dict:
+        # judge_key -> aggregates, for judge_index.JudgeIndex
+        with self.connection() as conn:
+            rows = conn.execute("SELECT * FROM judges").fetchall()
+        stats = {}
+        for row in rows:
+            record = dict(row)
+            record["judge"] = record.pop("name")
+            record["cc_winners"] = json.loads(record["cc_winners"])
+            record["bob_winners"] = json.loads(record["bob_winners"])
+            stats[record.pop("judge_key")] = record
+        return stats
+
+    # ===== Queries =====
+    def placings_for_dog(self, dog: str) -> List[dict]:
+        sql = PLACEMENTS_QUERY + " WHERE p.dog_id = (SELECT id FROM dogs WHERE name = ?) ORDER BY s.show_date, p.id"
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(sql, (dog,))]
+
+    def shows_judged_by(self, judge: str) -> List[dict]:
+        with self.connection() as conn:
+            return [dict(row) for row in conn.execute(
+                "SELECT name, date_text, show_date, show_url, judge FROM shows "
+                "WHERE judge = ? COLLATE NOCASE ORDER BY show_date", (judge,))]
+
+    def placements(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   class_name: Optional[str] = None) -> List[dict]:
+        return [dict(zip(PLACEMENT_COLUMNS, row)) for row in self.iter_placements(date_from, date_to, class_name)]
+
+    def iter_placements(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                        class_name: Optional[str] = None) -> Iterator[tuple]:
+        # Streams PLACEMENT_COLUMNS tuples; the store is locked until the iteration ends
+        clauses, params = [], []
+        if date_from:
+            clauses.append("s.show_date >= ?")
+            params.append(date_from)
+        if date_to:
+            clauses.append("s.show_date <= ?")
+            params.append(date_to)
+        if class_name:
+            clauses.append("p.class = ?")
+            params.append(class_name)
+        sql = PLACEMENTS_QUERY + (" WHERE " + " AND ".join(clauses) if clauses else "") + " ORDER BY s.show_date, s.id, p.id"
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            yield from cursor.execute(sql, params)
+
+    def rows(self) -> Iterator[ResultRow]:
+        # The whole history as CSV rows, streamed
+        for show, date_text, _, judge, cls, placement, dog, owners, entries, absentees in self.iter_placements():
+            yield ResultRow(show, date_text, BREED, cls, placement, dog, owners, entries, absentees, judge)
+
+    # ===== CSV =====
+    def export_csv(self, path: str):
+        def write(f):
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            writer.writerows(self.rows())
+        atomic_write(path, write)
+
+    def import_csv(self, path: str):
+        # One-off migration: seeds an empty store from a golden_results.csv export
+        if not os.path.isfile(path) or self.count():
+            return
+        shows = {}
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                shows.setdefault((row["Show"], row["Date"]), []).append(ResultRow(*(row.get(field) or "" for field in CSV_FIELDS)))
+        scraped_at = _now()
+        with self.connection() as conn, conn:
+            judges = set()
+            for (name, date_text), rows in shows.items():
+                judge = next((row[9] for row in rows if row[9]), None)
+                judges |= self._record(conn, name, date_text, rows, None, judge, scraped_at)
+            for key in judges:
+                self._refresh_judge(conn, key)
+        print(f"[INFO] Imported {sum(len(r) for r in shows.values())} results for {len(shows)} shows from {path}.")
+
+
+GOLDEN_STORE = GoldenStore()
@@ -0,0 +1,129 @@
+# http_archive.py
+
+import os
+import json
+import shutil
+import hashlib
+import datetime
+import threading
+from collections import Counter
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+ARCHIVE_MODES = ("record", "replay")
+INDEX_FILE = "index.jsonl"
+BODIES_DIR = "bodies"
+INPUTS_DIR = "inputs"
+INPUTS_MANIFEST = "inputs.json"
+
+# Headers describing the wire encoding; archived bodies are stored already decoded
+UNARCHIVED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+def request_key(method: str, url: str, body=None) -> str:
+    # Identifies an exchange by method, URL (query parameters in sorted order) and request body
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha1()
+    for piece in (method.upper().encode(), f"{parts.scheme}://{parts.netloc}{parts.path}?{query}".encode(), body or b""):
+        digest.update(piece)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class HttpArchive:
+    """
+    Directory of recorded HTTP exchanges: an index.jsonl line per response plus its
+    body under bodies/. A request made several times during the recorded run is
+    replayed with its responses in recorded order, the last one repeating.
+    """
+
+    def __init__(self, path: str, mode: str):
+        if mode not in ARCHIVE_MODES:
+            raise ValueError(f"Unknown archive mode {mode!r}; expected one of {ARCHIVE_MODES}")
+        self.path = path
+        self.mode = mode
+        self._entries = {}   # key -> [index entries]
+        self._served = Counter()
+        self._lock = threading.Lock()
+
+        if mode == "record":
+            # A recording replaces whatever archive was at path
+            for name in (INDEX_FILE, INPUTS_MANIFEST):
+                if os.path.exists(os.path.join(path, name)):
+                    os.remove(os.path.join(path, name))
+            for name in (BODIES_DIR, INPUTS_DIR):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+            os.makedirs(os.path.join(path, BODIES_DIR), exist_ok=True)
+            print(f"[INFO] Recording HTTP exchanges to {path}")
+        else:
+            self._load()
+            print(f"[INFO] Replaying {sum(len(e) for e in self._entries.values())} HTTP exchanges from {path}")
+
+    def _load(self):
+        index = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index):
+            raise FileNotFoundError(f"No HTTP archive at {self.path}")
+        with open(index, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def record(self, method: str, url: str, body, status: int, reason: str, headers: dict, content: bytes):
+        key = request_key(method, url, body)
+        headers = {k: v for k, v in headers.items() if k.lower() not in UNARCHIVED_HEADERS}
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            body_file = f"{BODIES_DIR}/{key}-{len(entries)}"
+            with open(os.path.join(self.path, body_file), "wb") as f:
+                f.write(content or b"")
+            entry = {
+                "key": key,
+                "method": method.upper(),
+                "url": url,
+                "status": status,
+                "reason": reason,
+                "headers": headers,
+                "body": body_file,
+                "recorded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            entries.append(entry)
+            with open(os.path.join(self.path, INDEX_FILE), "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def lookup(self, method: str, url: str, body=None) -> Optional[Tuple[dict, bytes]]:
+        # Returns (entry, content) for the next recorded response to this request, or None
+        key = request_key(method, url, body)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            entry = entries[min(self._served[key], len(entries) - 1)]
+            self._served[key] += 1
+        with open(os.path.join(self.path, entry["body"]), "rb") as f:
+            return entry, f.read()
+
+    def save_inputs(self, files):
+        # Snapshots the state files a recorded run starts from, so a replay starts from the same state
+        os.makedirs(os.path.join(self.path, INPUTS_DIR), exist_ok=True)
+        present = [name for name in files if os.path.isfile(name)]
+        for name in present:
+            shutil.copy2(name, os.path.join(self.path, INPUTS_DIR, os.path.basename(name)))
+        with open(os.path.join(self.path, INPUTS_MANIFEST), "w") as f:
+            json.dump({"present": present, "absent": [n for n in files if n not in present]}, f, indent=2)
+
+    def restore_inputs(self):
+        manifest_path = os.path.join(self.path, INPUTS_MANIFEST)
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        for name in manifest["present"]:
+            shutil.copy2(os.path.join(self.path, INPUTS_DIR, os.path.basename(name)), name)
+        for name in manifest["absent"]:
+            if os.path.exists(name):
+                print(f"[WARN] {name} did not exist when the archive was recorded; the replay may diverge.")
+        print(f"[INFO] Restored {len(manifest['present'])} recorded input files.")
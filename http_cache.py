@@ -0,0 +1,157 @@
+# http_cache.py
+
+import os
+import re
+import json
+import time
+import zlib
+from typing import Optional, Tuple
+from http_archive import request_key, UNARCHIVED_HEADERS
+from store import SQLiteStore
+import upstreams
+
+HTTP_CACHE_DB = os.getenv("HTTP_CACHE_DB", "http_cache.db")
+HTTP_CACHE_MAX_BYTES = int(float(os.getenv("HTTP_CACHE_MAX_MB", 256)) * 1024 * 1024)   # 0 turns the cache off
+COMPRESS_LEVEL = 6
+
+# What may be cached and for how long: (methods, URL pattern, seconds a response stays
+# fresh, None meaning indefinitely). The first matching rule applies; a URL no rule
+# matches is never cached (Maps results have their own travel cache, Drive and the fuel
+# price CSV must be current). A cached page whose form feeds a postback is only good with
+# its postback: callers that post back go again from a live page when the postback misses
+# (see fossedata_results). Show detail pages are not cached at all, as the schedule POST
+# built from them is per session.
+_FOSSEDATA = re.escape(upstreams.FOSSEDATA)
+CACHE_RULES = [
+    # A show's results page and its breed postback; results still settling are fetched
+    # with a shorter max-age by fossedata_results
+    (("GET", "POST"), _FOSSEDATA + r"/show-results/[^/?]+\.aspx$", None),
+    (("GET", "POST"), _FOSSEDATA + r"/show-results/?$", 6 * 3600),          # listings by year
+    (("GET",), _FOSSEDATA + r"/shows/Shows-To-Enter\.aspx$", 10 * 60),
+    (("GET",), re.escape(upstreams.HIGHAM) + r"/shows", 10 * 60),
+    (("GET",), re.escape(upstreams.KENNEL_CLUB) + r"/search/breeds-a-to-z/?$", 30 * 86400),
+]
+_RULES = [(set(methods), re.compile(pattern), max_age) for methods, pattern, max_age in CACHE_RULES]
+
+# Requests carrying these are validated or sliced by their caller, so go straight upstream
+BYPASS_HEADERS = {"range", "if-none-match", "if-modified-since"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,   -- http_archive.request_key: method, URL and request body
+    method      TEXT NOT NULL,
+    url         TEXT NOT NULL,
+    status      INTEGER NOT NULL,
+    reason      TEXT,
+    headers     TEXT NOT NULL,      -- JSON
+    size        INTEGER NOT NULL,   -- bytes on disk, counted against HTTP_CACHE_MAX_MB
+    stored_at   REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    body        BLOB NOT NULL       -- zlib-compressed; last, so the columns above are read without it
+);
+CREATE INDEX IF NOT EXISTS responses_by_access ON responses (accessed_at);
+"""
+
+
+def max_age_for(method: str, url: str) -> Tuple[bool, Optional[float]]:
+    # (cacheable, freshness in seconds or None for indefinitely)
+    for methods, pattern, max_age in _RULES:
+        if method.upper() in methods and pattern.search(url):
+            return True, max_age
+    return False, None
+
+
+def cacheable_url(url: str) -> bool:
+    return any(pattern.search(url) for _, pattern, _ in _RULES)
+
+
+def request_directives(headers) -> dict:
+    # Cache-Control directives of a request: no-store, no-cache, max-age=N
+    directives = {}
+    header = next((v for k, v in headers.items() if k.lower() == "cache-control"), "")
+    for part in header.split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value
+    return directives
+
+
+class ResponseCache(SQLiteStore):
+    """
+    Response bodies stored compressed in SQLite, shared by every session (and by every
+    process using the same file). Entries are kept until HTTP_CACHE_MAX_MB is reached,
+    then the least recently used are evicted.
+    """
+
+    schema = SCHEMA
+
+    def __init__(self, path: str = HTTP_CACHE_DB, max_bytes: int = HTTP_CACHE_MAX_BYTES):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def policy(self, method: str, url: str, headers) -> Tuple[bool, bool, Optional[float]]:
+        # (read from the cache, write to the cache, max age) for a request
+        if not self.enabled or any(name.lower() in BYPASS_HEADERS for name in headers):
+            return False, False, None
+        cacheable, max_age = max_age_for(method, url)
+        directives = request_directives(headers)
+        if not cacheable or "no-store" in directives:
+            return False, False, None
+        if "max-age" in directives:
+            try:
+                requested = float(directives["max-age"])
+                max_age = requested if max_age is None else min(max_age, requested)
+            except ValueError:
+                pass
+        return "no-cache" not in directives, True, max_age
+
+    def get(self, method: str, url: str, body=None, max_age: Optional[float] = None) -> Optional[Tuple[dict, bytes]]:
+        # (entry, content) of a fresh cached response, or None
+        key = request_key(method, url, body)
+        now = time.time()
+        with self.connection() as conn:
+            row = conn.execute("SELECT status, reason, headers, body, stored_at FROM responses WHERE key = ?",
+                               (key,)).fetchone()
+            if row is None or (max_age is not None and now - row["stored_at"] > max_age):
+                return None
+            with conn:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        entry = {"status": row["status"], "reason": row["reason"], "headers": json.loads(row["headers"])}
+        return entry, zlib.decompress(row["body"])
+
+    def put(self, method: str, url: str, body, status: int, reason: str, headers: dict, content: bytes):
+        compressed = zlib.compress(content or b"", COMPRESS_LEVEL)
+        headers = {k: v for k, v in headers.items() if k.lower() not in UNARCHIVED_HEADERS}
+        now = time.time()
+        with self.connection() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, method, url, status, reason, headers, size, stored_at, accessed_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (request_key(method, url, body), method.upper(), url, status, reason, json.dumps(headers),
+                 len(compressed), now, now, compressed),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        # Drops the least recently used entries beyond the size limit
+        if conn.execute("SELECT coalesce(SUM(size), 0) FROM responses").fetchone()[0] <= self.max_bytes:
+            return
+        conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM ("
+            "SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS kept FROM responses"
+            ") WHERE kept > ?)", (self.max_bytes,))
+
+    def size(self) -> int:
+        with self.connection() as conn:
+            return conn.execute("SELECT coalesce(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self.connection() as conn, conn:
+            conn.execute("DELETE FROM responses")
+
+
+HTTP_CACHE = ResponseCache()
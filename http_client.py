@@ -0,0 +1,233 @@
+# http_client.py
+
+import os
+import time
+import datetime
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+from urllib.parse import urlsplit
+from http_archive import HttpArchive
+from http_cache import HTTP_CACHE, cacheable_url
+import metrics
+
+USER_AGENT = "Mozilla/5.0"
+
+# Transient upstream failures are retried with backoff; POST postbacks are not retried
+RETRY = Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504), raise_on_status=False)
+
+# Record/replay switch: HTTP_ARCHIVE_MODE=record captures every exchange of the run into
+# HTTP_ARCHIVE_DIR, HTTP_ARCHIVE_MODE=replay serves the run from it without touching the network
+HTTP_ARCHIVE_DIR = os.getenv("HTTP_ARCHIVE_DIR", "http_archive")
+_archive = None
+
+
+def set_archive_mode(mode, path: str = HTTP_ARCHIVE_DIR):
+    # mode is "record", "replay", or None to go back to the live network
+    global _archive
+    _archive = HttpArchive(path, mode) if mode else None
+    return _archive
+
+
+def archive():
+    return _archive
+
+
+def archive_mode():
+    return _archive.mode if _archive else None
+
+
+def from_cache(resp: requests.Response) -> bool:
+    return getattr(resp, "from_cache", False)
+
+
+def replayed_response(request, entry: dict, content: bytes) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = entry["status"]
+    resp.reason = entry.get("reason")
+    resp.headers = CaseInsensitiveDict(entry["headers"])
+    resp.encoding = get_encoding_from_headers(resp.headers)
+    resp._content = content
+    resp._content_consumed = True
+    resp.url = request.url
+    resp.request = request
+    resp.elapsed = datetime.timedelta(0)
+    return resp
+
+
+class ArchivingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that records each exchange to the active archive, or answers from it
+    when replaying. Outside of an archived run, cacheable requests are served from the
+    shared response cache while fresh; those responses have from_cache set.
+    """
+
+    def send(self, request, **kwargs):
+        if _archive is None:
+            return self._send_cached(request, **kwargs)
+        if _archive.mode == "replay":
+            found = _archive.lookup(request.method, request.url, request.body)
+            if found is None:
+                raise requests.ConnectionError(f"No archived response for {request.method} {request.url}", request=request)
+            return replayed_response(request, *found)
+        request.headers.pop("Cache-Control", None)
+        resp = super().send(request, **kwargs)
+        _archive.record(request.method, request.url, request.body, resp.status_code, resp.reason, dict(resp.headers), resp.content)
+        return resp
+
+    def _send_cached(self, request, **kwargs):
+        # A request's Cache-Control directs the response cache and is not sent upstream.
+        # Streamed bodies are left to the caller to read, so they are not cached.
+        read, write, max_age = HTTP_CACHE.policy(request.method, request.url, request.headers)
+        request.headers.pop("Cache-Control", None)
+        if kwargs.get("stream"):
+            return super().send(request, **kwargs)
+        if read:
+            found = _cache_get(request.method, request.url, request.body, max_age)
+            if found is not None:
+                resp = replayed_response(request, *found)
+                resp.from_cache = True
+                return resp
+        resp = super().send(request, **kwargs)
+        if write and resp.status_code == 200:
+            _cache_put(request.method, request.url, request.body, resp.status_code, resp.reason, dict(resp.headers), resp.content)
+        return resp
+
+
+def _cache_get(method, url, body, max_age):
+    # A cache that cannot be read is a miss, never a failed request
+    try:
+        found = HTTP_CACHE.get(method, url, body, max_age)
+    except Exception as e:
+        print(f"[WARN] HTTP cache lookup failed for {url}: {e}")
+        found = None
+    metrics.cache_lookup("http", hit=found is not None)
+    return found
+
+
+def _cache_put(method, url, body, status, reason, headers, content):
+    try:
+        HTTP_CACHE.put(method, url, body, status, reason, headers, content)
+    except Exception as e:
+        print(f"[WARN] Could not cache {url}: {e}")
+
+
+class InstrumentedSession(requests.Session):
+    """requests.Session that reports latency, outcome and bytes per upstream host."""
+
+    def request(self, method, url, *args, **kwargs):
+        host = urlsplit(url).hostname or "unknown"
+        start = time.perf_counter()
+        try:
+            resp = super().request(method, url, *args, **kwargs)
+        except Exception:
+            elapsed = time.perf_counter() - start
+            metrics.observe_upstream(host, elapsed, outcome="error")
+            metrics.observe_request(method, url, elapsed, None)
+            raise
+        # Streamed bodies are counted from Content-Length so they are not read here
+        if kwargs.get("stream"):
+            nbytes = int(resp.headers.get("Content-Length") or 0)
+        else:
+            nbytes = len(resp.content)
+        outcome = "ok" if resp.status_code < 400 else f"http_{resp.status_code}"
+        elapsed = time.perf_counter() - start
+        retry_state = getattr(resp.raw, "retries", None)
+        retries = len(retry_state.history) if retry_state is not None else 0
+        metrics.observe_upstream(host, elapsed, outcome=outcome, nbytes=nbytes)
+        metrics.observe_request(method, url, elapsed, resp.status_code, retries)
+        return resp
+
+
+def new_session() -> InstrumentedSession:
+    # A fresh session, for flows that need their own cookies (ASP.NET postbacks)
+    session = InstrumentedSession()
+    session.headers.update({"User-Agent": USER_AGENT})
+    adapter = ArchivingAdapter(max_retries=RETRY)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_thread_local = threading.local()
+
+def session() -> InstrumentedSession:
+    # Shared per-thread session for one-off requests
+    s = getattr(_thread_local, "session", None)
+    if s is None:
+        s = _thread_local.session = new_session()
+    return s
+
+
+def get(url, **kwargs):
+    return session().get(url, **kwargs)
+
+
+async def goto(page, url, **kwargs):
+    # Playwright navigation, reported with the same upstream metrics as HTTP requests
+    host = urlsplit(url).hostname or "unknown"
+    start = time.perf_counter()
+    try:
+        response = await page.goto(url, **kwargs)
+    except Exception:
+        elapsed = time.perf_counter() - start
+        metrics.observe_upstream(host, elapsed, outcome="error")
+        metrics.observe_request("NAVIGATE", url, elapsed, None)
+        raise
+    elapsed = time.perf_counter() - start
+    metrics.observe_upstream(host, elapsed)
+    metrics.observe_request("NAVIGATE", url, elapsed, response.status if response else None)
+    return response
+
+
+async def new_context(browser, **kwargs):
+    # Playwright browser context whose traffic goes through the active archive (or the
+    # response cache), like requests does
+    context = await browser.new_context(**kwargs)
+    if _archive is not None:
+        await context.route("**/*", _archive_route)
+    elif HTTP_CACHE.enabled:
+        await context.route(cacheable_url, _cache_route)
+    return context
+
+
+async def _cache_route(route):
+    request = route.request
+    read, write, max_age = HTTP_CACHE.policy(request.method, request.url, request.headers)
+    if not write:
+        await route.continue_()
+        return
+    body = request.post_data_buffer
+    found = _cache_get(request.method, request.url, body, max_age) if read else None
+    if found is not None:
+        entry, content = found
+        await route.fulfill(status=entry["status"], headers=entry["headers"], body=content)
+        return
+    response = await route.fetch()
+    content = await response.body()
+    if response.status == 200:
+        _cache_put(request.method, request.url, body, response.status, response.status_text, response.headers, content)
+    await route.fulfill(response=response, body=content)
+
+
+async def _archive_route(route):
+    request = route.request
+    if _archive.mode == "replay":
+        found = _archive.lookup(request.method, request.url, request.post_data_buffer)
+        if found is None:
+            await route.abort("internetdisconnected")
+            return
+        entry, content = found
+        await route.fulfill(status=entry["status"], headers=entry["headers"], body=content)
+        return
+    response = await route.fetch()
+    body = await response.body()
+    _archive.record(request.method, request.url, request.post_data_buffer, response.status, response.status_text, response.headers, body)
+    await route.fulfill(response=response, body=body)
+
+
+if os.getenv("HTTP_ARCHIVE_MODE"):
+    set_archive_mode(os.getenv("HTTP_ARCHIVE_MODE"))
@@ -0,0 +1,214 @@
+# jobs.py
+
+import os
+import json
+import uuid
+import fcntl
+import asyncio
+import datetime
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+import progress
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+MAX_FINISHED_JOBS = 50  # Finished jobs kept for /jobs lookups
+JOBS_DIR = os.getenv("JOBS_DIR", ".jobs")  # Job status files, shared by every worker process
+LOCK_DIR = os.path.join(JOBS_DIR, "locks")
+
+# What each kind of run touches. Runs whose resources overlap never execute together;
+# a second trigger attaches to the run already in progress.
+RUN_SCOPES = {
+    "full": ("golden", "higham", "shows"),
+    "shows": ("shows",),    # listing, per-show processing, results/processed/travel files
+    "golden": ("golden",),  # golden_results.csv
+    "higham": ("higham",),  # higham_links.txt
+}
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class ResourceLock:
+    """
+    Non-blocking cross-process lock over a set of named resources, one flock'd file
+    each, so it holds across uvicorn workers and CLI runs. The lock files record the
+    owning job ID so other processes can attach to it.
+    """
+
+    def __init__(self, resources, lock_dir: str = LOCK_DIR):
+        self.resources = sorted(set(resources))
+        self.lock_dir = lock_dir
+        self._files = []
+
+    def acquire(self, owner: str) -> Optional[str]:
+        # Returns None once every resource is held, else the ID holding a conflicting one
+        os.makedirs(self.lock_dir, exist_ok=True)
+        for resource in self.resources:
+            f = open(os.path.join(self.lock_dir, f"{resource}.lock"), "a+")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                f.seek(0)
+                holder = f.read().split()
+                f.close()
+                self.release()
+                return holder[0] if holder else "unknown"
+            f.seek(0)
+            f.truncate()
+            f.write(f"{owner} {os.getpid()}\n")
+            f.flush()
+            self._files.append(f)
+        return None
+
+    def release(self):
+        for f in self._files:
+            try:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            finally:
+                f.close()
+        self._files = []
+
+
+class Job:
+    """A long-running operation submitted from an endpoint and run on a worker thread."""
+
+    def __init__(self, name: str, resources=()):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.resources = tuple(sorted(set(resources)))
+        self.pid = os.getpid()
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "name": self.name,
+            "resources": list(self.resources),
+            "pid": self.pid,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        job = cls(data.get("name", ""), data.get("resources", ()))
+        job.id = data["job_id"]
+        for field in ("pid", "status", "created_at", "started_at", "finished_at", "error", "result"):
+            setattr(job, field, data.get(field))
+        return job
+
+    def save(self):
+        # Status file so any worker process can answer /jobs/{id}
+        try:
+            os.makedirs(JOBS_DIR, exist_ok=True)
+            path = os.path.join(JOBS_DIR, f"{self.id}.json")
+            with open(path + ".tmp", "w") as f:
+                json.dump(dict(self.to_dict(), result=self.result), f, default=str)
+            os.replace(path + ".tmp", path)
+        except Exception as e:
+            print(f"[WARN] Could not save status for job {self.id}: {e}")
+
+
+class JobManager:
+    """
+    Runs jobs on a thread pool so the event loop serving the API never blocks.
+    Coroutine functions get their own event loop in the worker thread.
+
+    Jobs that name resources are single-flight: while one holds a resource, any
+    overlapping submission (in this process or another) attaches to it instead.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, fn, *args, resources=(), **kwargs) -> Tuple[Job, bool]:
+        # Returns (job, attached); attached is True when an in-progress job was reused
+        job = Job(name, resources)
+        with self._lock:
+            for active in self._jobs.values():
+                if not active.done and set(active.resources) & set(job.resources):
+                    print(f"[INFO] {name} attached to in-progress job {active.id} ({active.name}).")
+                    return active, True
+
+            lock = ResourceLock(job.resources)
+            holder = lock.acquire(job.id)
+            if holder:
+                print(f"[INFO] {name} attached to job {holder} running in another process.")
+                other = self.get(holder, locked=True) or Job.from_dict({"job_id": holder, "status": "running"})
+                return other, True
+
+            self._jobs[job.id] = job
+            self._prune()
+        job.save()
+        self._executor.submit(self._run, job, lock, fn, args, kwargs)
+        print(f"[INFO] Job {job.id} ({name}) queued.")
+        return job, False
+
+    def get(self, job_id: str, locked: bool = False) -> Optional[Job]:
+        # Looks in this process first, then in the shared status files
+        if locked:
+            job = self._jobs.get(job_id)
+        else:
+            with self._lock:
+                job = self._jobs.get(job_id)
+        if job:
+            return job
+        path = os.path.join(JOBS_DIR, f"{os.path.basename(job_id)}.json")
+        try:
+            with open(path, "r") as f:
+                return Job.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def list(self) -> list:
+        with self._lock:
+            return [job.to_dict() for job in reversed(self._jobs.values())]
+
+    def _run(self, job: Job, lock: ResourceLock, fn, args, kwargs):
+        job.status = "running"
+        job.started_at = _now()
+        job.save()
+        events = progress.start_run(job.id)  # Streamed at /runs/{job_id}/events
+        try:
+            if asyncio.iscoroutinefunction(fn):
+                job.result = asyncio.run(fn(*args, **kwargs))
+            else:
+                job.result = fn(*args, **kwargs)
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            print(f"[ERROR] Job {job.id} ({job.name}) failed: {e}")
+            traceback.print_exc()
+        finally:
+            job.finished_at = _now()
+            job.save()
+            lock.release()
+            progress.finish_run(events, job.status)
+
+    def _prune(self):
+        # Drop the oldest finished jobs beyond MAX_FINISHED_JOBS
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager()
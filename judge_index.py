@@ -0,0 +1,70 @@
+# judge_index.py
+
+import time
+import threading
+from typing import Optional
+from store import VERSION_CHECK_SECONDS
+from golden_store import GOLDEN_STORE, normalise_judge
+
+
+class JudgeIndex:
+    """
+    In-memory map from normalised judge name to that judge's Golden Retriever history:
+    shows judged, entries seen, dogs placed and CC / Best of Breed winners. The
+    aggregates are maintained by the results store as shows are scraped; this holds
+    a snapshot of them for constant-time lookups while shows are processed.
+    """
+
+    def __init__(self, store=GOLDEN_STORE):
+        self.store = store
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._version = None    # store.version() the snapshot was taken at
+        self._checked_at = 0.0  # time.monotonic() of the last version check
+        self.loaded = False
+
+    def load(self):
+        checked_at = time.monotonic()
+        try:
+            version = self.store.version()
+            stats = self.store.judge_stats()
+        except Exception as e:
+            print(f"[WARN] Could not load judge history: {e}")
+            version, stats = None, {}
+        with self._lock:
+            self._by_key = stats
+            self._version = version
+            self._checked_at = checked_at
+            self.loaded = True
+
+    def ensure_loaded(self):
+        # Reloads once another worker process has written to the store
+        if not self.loaded or self._stale():
+            self.load()
+
+    def _stale(self) -> bool:
+        # The store is asked at most every VERSION_CHECK_SECONDS; reads in between never
+        # touch its connection, so they do not wait behind a write holding it
+        now = time.monotonic()
+        if now - self._checked_at < VERSION_CHECK_SECONDS:
+            return False
+        self._checked_at = now
+        try:
+            return self.store.version() != self._version
+        except Exception:
+            return False    # Keep serving what is loaded
+
+    def lookup(self, name: Optional[str]) -> Optional[dict]:
+        self.ensure_loaded()
+        return self._by_key.get(normalise_judge(name))
+
+    def annotate(self, result: dict) -> Optional[dict]:
+        # History of a show's dog and bitch judges, or None when neither has judged Goldens
+        dogs = self.lookup(result.get("judge_dogs"))
+        bitches = self.lookup(result.get("judge_bitches"))
+        if dogs is None and bitches is None:
+            return None
+        return {"dogs": dogs, "bitches": bitches}
+
+
+JUDGE_INDEX = JudgeIndex()
@@ -68,8 +68,11 @@ KC_BREEDS = [
     "Italian Greyhound", "Japanese Chin", "King Charles Spaniel", "Lowchen",
     "Maltese", "Miniature Pinscher", "Papillon", "Pekingese", "Pomeranian", "Pug",
     "Russian Toy", "Yorkshire Terrier", "Chinese Crested", "Coton de Tulear",
+]
 
-    # Broad catchalls
+# Group and catch-all words that mark a breed or group show in a listing name. They are
+# not breed names ("Limited", "Working"), so only the listing filter uses them.
+LISTING_KEYWORDS = [
     "terrier", "hound", "toy", "spaniel", "bulldog", "collie",
     "spitz", "sheepdog", "pastoral", "working", "corgi", "pointer", "setter", "bichon", "basset", "afghan", "heeler","limited", "beauceron"
 ]
@@ -4,8 +4,11 @@ import base64
 import json
 from playwright.async_api import async_playwright
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
+from breed_matcher import refresh_breed_matcher
+from store import atomic_write
+import http_client
+import upstreams
 
 google_service_account_key = os.getenv("GOOGLE_SERVICE_ACCOUNT_BASE64")
 gdrive_folder_id = os.getenv("GDRIVE_FOLDER_ID")
@@ -24,24 +27,24 @@ def get_drive_service():
         service_account_info,
         scopes=SCOPES
     )
-    service = build("drive", "v3", credentials=credentials)
+    service = upstreams.build_drive_service(credentials)
     return service
 
 async def fetch_kc_breeds():
-    url = "https://www.thekennelclub.org.uk/search/breeds-a-to-z/"
+    url = f"{upstreams.KENNEL_CLUB}/search/breeds-a-to-z/"
     async with async_playwright() as p:
         browser = await p.chromium.launch()
-        page = await browser.new_page()
-        await page.goto(url, wait_until="networkidle")
+        context = await http_client.new_context(browser)
+        page = await context.new_page()
+        await http_client.goto(page, url, wait_until="networkidle")
         breeds = await page.eval_on_selector_all(".breed-card__title", "els => els.map(e => e.textContent.trim().toLowerCase())")
         await browser.close()
 
     # Save locally first
     filename = "kc_breeds.txt"
-    with open(filename, "w") as f:
-        for breed in sorted(breeds):
-            f.write(breed + "\n")
+    atomic_write(filename, lambda f: f.writelines(breed + "\n" for breed in sorted(breeds)))
     print(f"[INFO] Saved {len(breeds)} breeds to {filename}")
+    refresh_breed_matcher(filename)
 
     # Upload to Google Drive
     try:
@@ -1,95 +1,272 @@
-from fossedata_core import save_results, upload_to_google_drive, processed_shows
+from fossedata_core import save_results, upload_to_google_drive
 import os
-import subprocess
 import re
+import json
 import asyncio
 import datetime
+import time
 import uvicorn
-from pathlib import Path
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from typing import List
-from fossedata_core import full_run   # <-- make sure this exists!
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Header
+from fastapi.responses import StreamingResponse, Response, PlainTextResponse
+from typing import List, Optional
+from fossedata_core import full_run, run_golden_scrape, run_higham_links, profile_stage, ensure_started
+from jobs import job_manager, RUN_SCOPES
+import blocking
+import progress
+import metrics
+from show_index import SHOW_INDEX
+from work_queue import WORK_QUEUE
 
-# ensure Playwright uses vendored browsers
+# ensure Playwright uses vendored browsers (installed into the image by the Dockerfile)
 os.environ["PLAYWRIGHT_BROWSERS_PATH"] = "0"
 
-# install Chromium if missing (you can also bake this into your Dockerfile)
-CHROMIUM = Path("/opt/render/.cache/ms-playwright/chromium")
-if not CHROMIUM.exists():
-    subprocess.run(["playwright", "install", "chromium"], check=False)
+
+async def warm_up():
+    # Independent startup steps run side by side in the background. Each is safe to call
+    # again, so a request or job that needs one before warm-up finishes just waits for it.
+    steps = {"run_state": ensure_started, "show_index": SHOW_INDEX.ensure_loaded}
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(blocking.run_blocking(step) for step in steps.values()), return_exceptions=True)
+    for name, outcome in zip(steps, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"[WARN] Startup step {name} failed: {outcome}")
+    print(f"[INFO] Startup warm-up finished in {time.perf_counter() - start:.2f}s.")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve at once; Drive state and the show index load behind it.
+    # The API's own loop is watched so anything that blocks it is logged with its stack.
+    async with blocking.monitored_loop("api"):
+        warm_up_task = asyncio.create_task(warm_up())
+        yield
+        warm_up_task.cancel()
+    blocking.shutdown(wait=False)
 
 
 # --- instantiate app BEFORE any @app.<method> ---
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # The default port is 8000, but on Render, the port is assigned dynamically
 port = os.getenv("PORT", 10000)  # Render expects this port, or it will use 10000 by default
 
-if __name__ == "__main__":
-    # Make sure to bind to 0.0.0.0 so it's accessible externally (not just localhost)
-    uvicorn.run(app, host="0.0.0.0", port=int(port))
-
 @app.get("/")
 async def root():
     return {"status": "ok", "message": "FosseData is up"}
 
 
-@app.post("/run")
-async def run_sync():
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
     """
-    Blocks until your full_run() finishes. Returns how many shows processed.
+    Prometheus text exposition: stage and upstream latency histograms, byte counters
+    and cache hit/miss counts for this worker process.
     """
-    try:
-        results = await full_run()
-        return {"processed": len(results)}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def etag_response(request: Request, etag: str, body):
+    # Returns 304 when the client already holds this version, else the body with its ETag
+    tag = f'"{etag}"'
+    headers = {"ETag": tag, "Cache-Control": "no-cache"}
+    # If-None-Match is a comma-separated list of tags, compared whole (weakly, so W/ is ignored), or *
+    sent = {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}
+    if tag in sent or "*" in sent:
+        return Response(status_code=304, headers=headers)
+    return Response(content=json.dumps(body, default=str), media_type="application/json", headers=headers)
+
+
+@app.get("/shows")
+async def list_shows(
+    request: Request,
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    max_distance: Optional[float] = None,
+    max_drive_minutes: Optional[float] = None,
+    type: Optional[str] = None,
+    judge: Optional[str] = None,
+    closes_within_days: Optional[int] = None,
+):
+    """
+    Processed shows from the in-memory index. Dates are YYYY-MM-DD (anything else is a
+    422); judge matches on name words; closes_within_days keeps shows whose entries
+    close in that window.
+    Send If-None-Match with the last ETag to get a 304 when nothing has changed.
+    """
+    # The index may reload from the store first, so it is queried off the event loop
+    shows, etag = await blocking.run_blocking(
+        SHOW_INDEX.query,
+        date_from=date_from and date_from.isoformat(), date_to=date_to and date_to.isoformat(),
+        max_distance=max_distance, max_drive_minutes=max_drive_minutes, show_type=type, judge=judge,
+        closes_within_days=closes_within_days,
+    )
+    if closes_within_days is not None:
+        etag += "-" + datetime.date.today().isoformat()  # the window moves daily
+    return etag_response(request, etag, {"count": len(shows), "shows": shows})
+
+
+@app.get("/shows/{show_id}")
+async def get_show(show_id: str, request: Request):
+    show, etag = await blocking.run_blocking(SHOW_INDEX.get, show_id)
+    if not show:
+        raise HTTPException(status_code=404, detail="Unknown show")
+    return etag_response(request, etag, show)
+
+
+def job_accepted(submitted):
+    # Overlapping triggers share one run: attached=True means an in-progress job was returned
+    job, attached = submitted
+    return {"job_id": job.id, "name": job.name, "status": job.status, "attached": attached,
+            "status_url": f"/jobs/{job.id}"}
+
 
+def run_scope(scope: str):
+    if scope not in ("full", "shows"):
+        raise HTTPException(status_code=400, detail="scope must be 'full' or 'shows'")
+    return RUN_SCOPES[scope]
 
-@app.post("/run_bg")
-async def run_bg(background_tasks: BackgroundTasks):
-    #Kicks off full_run() in the background (non-blocking).
-    # This is an asynchronous task, so let's add it to the background
-    background_tasks.add_task(run_full_run)
-    return {"status": "started", "message": "Background scrape kicked off"}
 
-@app.post("/golden_results")
+@app.post("/run", status_code=202)
+async def run_sync(force: bool = False, scope: str = "full"):
+    """
+    Starts full_run() as a job and returns its ID at once.
+    The job result is how many shows were processed.
+    Pass force=true to process the listing even if it has not changed,
+    and scope=shows to skip the golden results and Higham scrapes.
+    """
+    resources = run_scope(scope)
+    return job_accepted(job_manager.submit("run", run_and_count, force, scope, resources=resources))
+
+
+@app.post("/run_bg", status_code=202)
+async def run_bg(force: bool = False, scope: str = "full"):
+    #Kicks off full_run() plus the final save and upload as a job (non-blocking).
+    resources = run_scope(scope)
+    return job_accepted(job_manager.submit("run_bg", run_full_run, force, scope, resources=resources))
+
+@app.post("/golden_results", status_code=202)
 async def golden_results():
     """
     Scrapes Golden Retriever results from 2007 onward and saves to golden_results.csv
     """
-    try:
-        from fossedata_core import run_golden_scrape
-        run_golden_scrape()
-        return {"status": "ok", "message": "Golden Retriever results scraped and saved."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return job_accepted(job_manager.submit("golden_results", run_golden_scrape, resources=RUN_SCOPES["golden"]))
 
-@app.post("/higham_links")
+@app.post("/higham_links", status_code=202)
 async def higham_links():
     """
     Scrapes Higham breed-specific show links and saves to higham_links.txt
     """
+    return job_accepted(job_manager.submit("higham_links", run_higham_links, resources=RUN_SCOPES["higham"]))
+
+
+@app.get("/jobs")
+async def list_jobs():
+    return job_manager.list()
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if not job.done:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    return {"job_id": job.id, "result": job.result}
+
+
+@app.get("/queue")
+async def queue_status():
+    """
+    Show tasks in the shared work queue by status (pending, leased, done, failed),
+    across every worker pulling from it.
+    """
+    return await blocking.run_blocking(WORK_QUEUE.counts)
+
+
+@app.get("/runs/{run_id}/events")
+async def run_events(run_id: str, request: Request):
+    """
+    Server-sent events for a job: one event per pipeline stage, ending with "finished".
+    Reconnecting clients resume after the Last-Event-ID they send.
+    """
+    run = progress.get_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="No events for this run in this worker")
+    last_id = request.headers.get("last-event-id", "")
+    start = int(last_id) + 1 if last_id.isdigit() else 0
+    return StreamingResponse(
+        progress.sse_stream(run, start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+def debug_profile(
+    stage: str,
+    target: Optional[str] = None,
+    source: str = "cached",
+    seconds: float = 2.0,
+    x_debug_token: Optional[str] = Header(None),
+):
+    """
+    Runs one pipeline stage (listing, schedule, overnight, results) under the sampling
+    profiler and returns folded stacks for flamegraph.pl or speedscope. Only served
+    when DEBUG_TOKEN is set and sent back in the X-Debug-Token header.
+    """
+    token = os.getenv("DEBUG_TOKEN")
+    if not token or x_debug_token != token:
+        raise HTTPException(status_code=404, detail="Not Found")
     try:
-        from fossedata_core import run_higham_links
-        run_higham_links()
-        return {"status": "ok", "message": "Higham links scraped and saved."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        profile = profile_stage(stage, target, source, seconds)
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {
+        "X-Profile-Runs": str(profile["runs"]),
+        "X-Profile-Ms-Per-Run": str(profile["ms_per_run"]),
+        "X-Profile-Samples": str(profile["samples"]),
+    }
+    return PlainTextResponse(profile["collapsed"], headers=headers)
+
+
+def full_run_for_scope(force: bool, scope: str):
+    everything = scope == "full"
+    return full_run(force, include_golden=everything, include_higham=everything)
 
-async def run_full_run():
+async def run_and_count(force: bool = False, scope: str = "full"):
+    results = await full_run_for_scope(force, scope)
+    return {"processed": len(results)}
+
+async def run_full_run(force: bool = False, scope: str = "full"):
     # This function will run the full_run() and handle all steps in the background.
     try:
         print("Starting background process...")
         # Await the results from the full_run coroutine
-        results = await full_run()
+        results = await full_run_for_scope(force, scope)
 
         # Handle other processes
-        save_results(results, processed_shows)
+        save_results(results)
 
         # Upload to Google Drive
         upload_to_google_drive()
 
         print("Processing complete.")
+        return {"processed": len(results)}
     except Exception as e:
         print(f"Error during background run: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    # Make sure to bind to 0.0.0.0 so it's accessible externally (not just localhost)
+    uvicorn.run(app, host="0.0.0.0", port=int(port))
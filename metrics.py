@@ -0,0 +1,142 @@
+# metrics.py
+
+import time
+import threading
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a cached page parse up to a full golden crawl
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key, (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("fossedata_stage_seconds", "Wall-clock time per pipeline stage.")
+STAGE_RUNS = Counter("fossedata_stage_runs_total", "Pipeline stage executions by outcome.")
+UPSTREAM_SECONDS = Histogram("fossedata_upstream_request_seconds", "Latency of requests and page loads per upstream host.")
+UPSTREAM_REQUESTS = Counter("fossedata_upstream_requests_total", "Requests per upstream host by outcome.")
+BYTES_DOWNLOADED = Counter("fossedata_bytes_downloaded_total", "Response bytes received per upstream host.")
+BYTES_UPLOADED = Counter("fossedata_bytes_uploaded_total", "Bytes uploaded per destination.")
+CACHE_LOOKUPS = Counter("fossedata_cache_lookups_total", "Cache lookups by cache and result (hit/miss).")
+LOOP_LAG_SECONDS = Histogram("fossedata_event_loop_lag_seconds", "How late event loop heartbeats wake up.",
+                             buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+LOOP_STALLS = Counter("fossedata_event_loop_stalls_total", "Times an event loop was held past the lag threshold.")
+
+REGISTRY = [STAGE_SECONDS, STAGE_RUNS, UPSTREAM_SECONDS, UPSTREAM_REQUESTS, BYTES_DOWNLOADED, BYTES_UPLOADED, CACHE_LOOKUPS,
+            LOOP_LAG_SECONDS, LOOP_STALLS]
+
+# Callbacks for per-run consumers (run_report) that need more detail than the series carry:
+# stage listeners get (stage, seconds, show), request listeners get (method, url, seconds, status, retries)
+STAGE_LISTENERS = []
+REQUEST_LISTENERS = []
+
+
+@contextmanager
+def timed(stage: str, show: str = None):
+    # Times the enclosed block as one execution of a pipeline stage; show (a URL)
+    # goes to the listeners only, never into metric labels
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        STAGE_RUNS.inc(stage=stage, outcome=outcome)
+        for listener in STAGE_LISTENERS:
+            listener(stage, elapsed, show)
+
+
+def observe_upstream(host: str, seconds: float, outcome: str = "ok", nbytes: int = 0):
+    UPSTREAM_SECONDS.observe(seconds, host=host)
+    UPSTREAM_REQUESTS.inc(host=host, outcome=outcome)
+    if nbytes:
+        BYTES_DOWNLOADED.inc(nbytes, host=host)
+
+
+def observe_request(method: str, url: str, seconds: float, status, retries: int = 0):
+    for listener in REQUEST_LISTENERS:
+        listener(method, url, seconds, status, retries)
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,76 @@
+# profiling.py
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+DEFAULT_INTERVAL = 0.005   # 200 samples a second
+MAX_PROFILE_SECONDS = 30
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack from a background thread at a fixed interval
+    and counts identical stacks. The thread being profiled runs uninstrumented, so
+    the overhead is the sampling thread's share of the GIL.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL, stop_at=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stop_at = stop_at      # code object whose frame (and callers) are left out of stacks
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and frame.f_code is not self.stop_at:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        # One "root;...;leaf count" line per stack, as read by flamegraph.pl, speedscope and inferno
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def profile_call(fn, seconds: float = 2.0, interval: float = DEFAULT_INTERVAL) -> dict:
+    # Calls fn repeatedly for at least `seconds` (and at least once) under the sampler
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    sampler = StackSampler(threading.get_ident(), interval, stop_at=profile_call.__code__)
+    runs = 0
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        while runs == 0 or time.perf_counter() - start < seconds:
+            fn()
+            runs += 1
+    finally:
+        sampler.stop()
+    elapsed = time.perf_counter() - start
+    return {
+        "runs": runs,
+        "elapsed": round(elapsed, 3),
+        "ms_per_run": round(elapsed / runs * 1000, 3),
+        "samples": sampler.samples,
+        "collapsed": sampler.collapsed(),
+    }
@@ -0,0 +1,86 @@
+# progress.py
+
+import json
+import time
+import asyncio
+import datetime
+import threading
+import contextvars
+from collections import OrderedDict
+from typing import Optional
+
+MAX_RUNS = 20            # Event logs kept for /runs/{id}/events
+POLL_SECONDS = 0.5       # How often a stream checks for new events
+HEARTBEAT_SECONDS = 15   # Comment lines keep idle proxies from closing the stream
+
+_current_run = contextvars.ContextVar("current_run", default=None)
+_runs = OrderedDict()
+_runs_lock = threading.Lock()
+
+
+class RunEvents:
+    """
+    Append-only event log for one run. Producers only append a tuple, so emitting
+    from the pipeline's hot loop costs next to nothing; streams poll the list.
+    """
+
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        self.events = []
+        self.finished = False
+
+    def emit(self, stage: str, **fields):
+        self.events.append((time.time(), stage, fields))
+
+
+def start_run(run_id: str) -> RunEvents:
+    # Creates the event log for run_id and makes it current for this context
+    run = RunEvents(run_id)
+    with _runs_lock:
+        _runs[run_id] = run
+        while len(_runs) > MAX_RUNS:
+            _runs.popitem(last=False)
+    _current_run.set(run)
+    return run
+
+
+def finish_run(run: RunEvents, status: str):
+    run.emit("finished", status=status)
+    run.finished = True
+
+
+def get_run(run_id: str) -> Optional[RunEvents]:
+    with _runs_lock:
+        return _runs.get(run_id)
+
+
+def emit(stage: str, **fields):
+    # Records a pipeline event on the current run; a no-op outside a run
+    run = _current_run.get()
+    if run is not None:
+        run.events.append((time.time(), stage, fields))
+
+
+def format_event(index: int, event) -> str:
+    ts, stage, fields = event
+    data = {"ts": datetime.datetime.fromtimestamp(ts).isoformat(timespec="milliseconds"), "stage": stage, **fields}
+    return f"id: {index}\nevent: {stage}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def sse_stream(run: RunEvents, start: int = 0):
+    # Yields Server-Sent Events for run from index start until the run finishes
+    index = start
+    idle = 0.0
+    while True:
+        events = run.events
+        while index < len(events):
+            yield format_event(index, events[index])
+            index += 1
+            idle = 0.0
+        if run.finished and index >= len(run.events):
+            return
+        await asyncio.sleep(POLL_SECONDS)
+        idle += POLL_SECONDS
+        if idle >= HEARTBEAT_SECONDS:
+            yield ": keep-alive\n\n"
+            idle = 0.0
@@ -0,0 +1,131 @@
+# run_report.py
+
+import re
+import json
+import time
+import datetime
+import threading
+import contextvars
+from collections import Counter, defaultdict
+from urllib.parse import urlsplit
+from typing import Optional
+from store import atomic_write
+import metrics
+
+RUN_REPORT_FILE = "run_report.json"
+SLOWEST_N = 10
+SHOW_STAGES = ("close_date", "pdf_download", "parse", "travel")
+
+_current_report = contextvars.ContextVar("current_report", default=None)
+
+
+def endpoint_name(method: str, url: str) -> str:
+    # Groups requests by endpoint: individual show pages collapse to {page}.aspx
+    parts = urlsplit(url)
+    path = re.sub(r"/[^/]+\.aspx$", "/{page}.aspx", parts.path) if parts.path.count("/") > 1 else parts.path
+    return f"{method.upper()} {parts.hostname}{path}"
+
+
+class RunReport:
+    """Timings collected over one full_run, written out as run_report.json."""
+
+    def __init__(self):
+        self.started_at = datetime.datetime.now()
+        self._start = time.perf_counter()
+        self.wall_seconds = None
+        self.status = "running"
+        self.stages = defaultdict(float)
+        self.shows = {}        # show URL -> {"name", "pdf", stage timings...}
+        self.pdf_pages = {}    # PDF path -> page count
+        self.api_calls = Counter()
+        self.retries = Counter()
+        self.failed_calls = Counter()
+        self._lock = threading.Lock()
+
+    def record_stage(self, stage: str, seconds: float, show: Optional[str] = None):
+        with self._lock:
+            self.stages[stage] += seconds
+            if show:
+                timings = self.shows.setdefault(show, {})
+                timings[stage] = round(timings.get(stage, 0) + seconds, 3)
+
+    def record_request(self, method: str, url: str, seconds: float, status, retries: int):
+        endpoint = endpoint_name(method, url)
+        with self._lock:
+            self.api_calls[endpoint] += 1
+            if retries:
+                self.retries[endpoint] += retries
+            if status is None or status >= 400:
+                self.failed_calls[endpoint] += 1
+
+    def record_pdf(self, pdf_path: str, pages: int):
+        with self._lock:
+            self.pdf_pages[pdf_path] = pages
+
+    def note_show(self, show_url: str, **fields):
+        with self._lock:
+            self.shows.setdefault(show_url, {}).update(fields)
+
+    def finish(self, status: str):
+        self.status = status
+        self.wall_seconds = round(time.perf_counter() - self._start, 3)
+
+    def to_dict(self, slowest_n: int = SLOWEST_N) -> dict:
+        with self._lock:
+            shows = []
+            for url, timings in self.shows.items():
+                entry = {"show_url": url, **timings}
+                if timings.get("pdf") in self.pdf_pages:
+                    entry["pdf_pages"] = self.pdf_pages[timings["pdf"]]
+                entry["total_seconds"] = round(sum(timings.get(stage, 0) for stage in SHOW_STAGES), 3)
+                shows.append(entry)
+            pdfs = [s for s in shows if "pdf_pages" in s or "parse" in s]
+            return {
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "status": self.status,
+                "wall_seconds": self.wall_seconds,
+                "stages": {stage: round(seconds, 3) for stage, seconds in self.stages.items()},
+                "shows_processed": len(shows),
+                "slowest_shows": sorted(shows, key=lambda s: s["total_seconds"], reverse=True)[:slowest_n],
+                "largest_pdfs": sorted(pdfs, key=lambda s: s.get("pdf_pages", 0), reverse=True)[:slowest_n],
+                "slowest_pdf_parses": sorted(pdfs, key=lambda s: s.get("parse", 0), reverse=True)[:slowest_n],
+                "api_calls": dict(self.api_calls.most_common()),
+                "retries": dict(self.retries.most_common()),
+                "failed_calls": dict(self.failed_calls.most_common()),
+                "shows": shows,
+            }
+
+    def write(self, path: str = RUN_REPORT_FILE):
+        try:
+            report = self.to_dict()
+            atomic_write(path, lambda f: json.dump(report, f, indent=2, default=str))
+            print(f"[INFO] Run report written to {path}")
+        except Exception as e:
+            print(f"[ERROR] Failed to write run report: {e}")
+
+
+def start_report() -> RunReport:
+    # Starts a report for the current context; stages and requests made in it are recorded
+    report = RunReport()
+    _current_report.set(report)
+    return report
+
+
+def current_report() -> Optional[RunReport]:
+    return _current_report.get()
+
+
+def _on_stage(stage, seconds, show):
+    report = _current_report.get()
+    if report is not None:
+        report.record_stage(stage, seconds, show)
+
+
+def _on_request(method, url, seconds, status, retries):
+    report = _current_report.get()
+    if report is not None:
+        report.record_request(method, url, seconds, status, retries)
+
+
+metrics.STAGE_LISTENERS.append(_on_stage)
+metrics.REQUEST_LISTENERS.append(_on_request)
@@ -0,0 +1,164 @@
+# show_index.py
+
+import re
+import json
+import bisect
+import hashlib
+import datetime
+import time
+import threading
+from typing import List, Optional, Tuple
+from store import STORE, VERSION_CHECK_SECONDS
+
+
+def show_key(show_url: str) -> str:
+    # Short stable ID for a show: the .aspx page name from its URL
+    name = show_url.rstrip("/").split("/")[-1]
+    return re.sub(r"\.aspx$", "", name, flags=re.IGNORECASE)
+
+
+def judge_tokens(name: Optional[str]) -> set:
+    return set(re.findall(r"[a-z]+", (name or "").lower())) - {"mr", "mrs", "ms", "miss", "dr"}
+
+
+def drive_minutes(record: dict) -> Optional[float]:
+    if record.get("drive_time_minutes") is not None:
+        return record["drive_time_minutes"]
+    if record.get("duration_hours") is not None:
+        return record["duration_hours"] * 60
+    return None
+
+
+class ShowIndex:
+    """
+    In-memory index over processed show results, kept current by the pipeline.
+    Shows are held sorted by date for range queries, with lookups by show type and
+    judge name token. The etag changes whenever the indexed content changes; get and
+    query return it with their answer, read under the same lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_url = {}
+        self._by_key = {}
+        self._sorted = []   # records ordered by show_date
+        self._dates = []    # parallel list of show_date strings for bisect
+        self._by_type = {}
+        self._by_judge_token = {}
+        self.etag = ""
+        self.loaded = False
+        self._version = None    # STORE.version() the index was loaded at
+        self._checked_at = 0.0  # time.monotonic() of the last version check
+
+    def load(self):
+        # (Re)builds the index from the results store
+        records, version = [], None
+        checked_at = time.monotonic()
+        try:
+            version = STORE.version()
+            records = STORE.results()
+        except Exception as e:
+            print(f"[WARN] Could not load the results store into the show index: {e}")
+        with self._lock:
+            self._by_url = {}
+            self._upsert(records)
+            self._version = version
+            self._checked_at = checked_at
+            self.loaded = True
+
+    def ensure_loaded(self):
+        # Reloads once another worker process has written to the store
+        if not self.loaded or self._stale():
+            self.load()
+
+    def _stale(self) -> bool:
+        # The store is asked at most every VERSION_CHECK_SECONDS; reads in between never
+        # touch its connection, so they do not wait behind a write holding it
+        now = time.monotonic()
+        if now - self._checked_at < VERSION_CHECK_SECONDS:
+            return False
+        self._checked_at = now
+        try:
+            return STORE.version() != self._version
+        except Exception:
+            return False    # Keep serving what is loaded
+
+    def update(self, results: List[dict]):
+        # Upserts pipeline results by show_url
+        with self._lock:
+            self._upsert(results)
+
+    def _upsert(self, results: List[dict]):
+        for r in results:
+            if r.get("show_url"):
+                self._by_url[r["show_url"]] = {k: v for k, v in r.items() if not k.startswith("_")}
+        self._rebuild()
+
+    def _rebuild(self):
+        self._sorted = sorted(self._by_url.values(), key=lambda r: str(r.get("show_date") or "9999-12-31"))
+        self._dates = [str(r.get("show_date") or "9999-12-31") for r in self._sorted]
+        self._by_key = {show_key(r["show_url"]): r for r in self._sorted}
+        self._by_type = {}
+        self._by_judge_token = {}
+        for r in self._sorted:
+            self._by_type.setdefault((r.get("type") or "").lower(), set()).add(r["show_url"])
+            for token in judge_tokens(r.get("judge_dogs")) | judge_tokens(r.get("judge_bitches")):
+                self._by_judge_token.setdefault(token, set()).add(r["show_url"])
+        digest = hashlib.sha1(json.dumps(self._sorted, sort_keys=True, default=str).encode("utf-8"))
+        self.etag = digest.hexdigest()[:20]
+
+    def get(self, key: str) -> Tuple[Optional[dict], str]:
+        self.ensure_loaded()
+        with self._lock:
+            return self._by_key.get(key), self.etag
+
+    def query(
+        self,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        max_distance: Optional[float] = None,
+        max_drive_minutes: Optional[float] = None,
+        show_type: Optional[str] = None,
+        judge: Optional[str] = None,
+        closes_within_days: Optional[int] = None,
+        today: Optional[datetime.date] = None,
+    ) -> Tuple[List[dict], str]:
+        self.ensure_loaded()
+        with self._lock:
+            etag = self.etag
+            lo = bisect.bisect_left(self._dates, date_from) if date_from else 0
+            hi = bisect.bisect_right(self._dates, date_to) if date_to else len(self._dates)
+            candidates = self._sorted[lo:hi]
+
+            allowed = None
+            if show_type:
+                allowed = self._by_type.get(show_type.lower(), set())
+            if judge:
+                for token in judge_tokens(judge):
+                    matches = self._by_judge_token.get(token, set())
+                    allowed = matches if allowed is None else allowed & matches
+
+        if closes_within_days is not None:
+            today = today or datetime.date.today()
+            close_from = today.isoformat()
+            close_to = (today + datetime.timedelta(days=closes_within_days)).isoformat()
+
+        shows = []
+        for r in candidates:
+            if allowed is not None and r["show_url"] not in allowed:
+                continue
+            if max_distance is not None and (r.get("distance_miles") is None or r["distance_miles"] > max_distance):
+                continue
+            if max_drive_minutes is not None:
+                minutes = drive_minutes(r)
+                if minutes is None or minutes > max_drive_minutes:
+                    continue
+            if closes_within_days is not None:
+                close = r.get("entry_close")
+                if not close or not (close_from <= close <= close_to):
+                    continue
+            shows.append(r)
+        return shows, etag
+
+
+SHOW_INDEX = ShowIndex()
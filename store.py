@@ -0,0 +1,419 @@
+# store.py
+
+import os
+import csv
+import json
+import fcntl
+import sqlite3
+import datetime
+import threading
+from contextlib import contextmanager
+from typing import Iterable, List, Optional
+
+STORE_DB = os.getenv("STORE_DB", "fossedata.db")
+VERSION_CHECK_SECONDS = float(os.getenv("VERSION_CHECK_SECONDS", 2))  # How often in-memory caches ask version()
+
+# Column order of a result row, as written to results.json and results.csv
+RESULT_FIELDS = [
+    "show_url", "show_name", "show_date", "type", "judge_dogs", "judge_bitches", "venue", "postcode",
+    "first_entry_fee", "subsequent_entry_fee", "catalogue_fee", "entry_close", "distance_miles",
+    "duration_hours", "estimated_cost", "overnight_required", "overnight_cost", "drive_time_minutes",
+    "judge_history",
+]
+SHOW_FIELDS = ["show_name", "show_date", "type", "venue", "postcode", "entry_close"]
+INFO_FIELDS = ["judge_dogs", "judge_bitches", "first_entry_fee", "subsequent_entry_fee", "catalogue_fee",
+               "judge_history"]
+JSON_FIELDS = {"judge_history"}
+TRAVEL_FIELDS = ["distance_miles", "duration_hours", "drive_time_minutes", "estimated_cost",
+                 "overnight_required", "overnight_cost"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shows (
+    show_url    TEXT PRIMARY KEY,
+    show_name   TEXT,
+    show_date   TEXT,
+    type        TEXT,
+    venue       TEXT,
+    postcode    TEXT,
+    entry_close TEXT,
+    updated_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shows_by_date ON shows (show_date);
+CREATE INDEX IF NOT EXISTS shows_by_postcode ON shows (postcode);
+CREATE INDEX IF NOT EXISTS shows_by_entry_close ON shows (entry_close);
+
+-- Read from the show's schedule PDF
+CREATE TABLE IF NOT EXISTS show_info (
+    show_url             TEXT PRIMARY KEY REFERENCES shows (show_url) ON DELETE CASCADE,
+    judge_dogs           TEXT,
+    judge_bitches        TEXT,
+    first_entry_fee      REAL,
+    subsequent_entry_fee REAL,
+    catalogue_fee        REAL,
+    judge_history        TEXT      -- JSON: the judges' past Golden Retriever results (judge_index.py)
+);
+
+-- Drive from home to a venue postcode, shared by every show held there
+CREATE TABLE IF NOT EXISTS travel (
+    postcode           TEXT PRIMARY KEY,
+    distance_miles     REAL,
+    duration_hours     REAL,
+    drive_time_minutes INTEGER,
+    estimated_cost     REAL,
+    overnight_required INTEGER,
+    overnight_cost     REAL,
+    updated_at         TEXT NOT NULL
+);
+
+-- Drive between two venue postcodes on consecutive days (overnight chains). Failed
+-- lookups are kept too, as unreachable, so they are not retried
+CREATE TABLE IF NOT EXISTS between_travel (
+    origin             TEXT NOT NULL,
+    destination        TEXT NOT NULL,
+    distance_miles     REAL,
+    drive_time_minutes INTEGER,
+    updated_at         TEXT NOT NULL,
+    PRIMARY KEY (origin, destination)
+);
+
+-- Shows the pipeline has finished with and will skip on later runs
+CREATE TABLE IF NOT EXISTS processed (
+    show_url     TEXT PRIMARY KEY,
+    processed_at TEXT NOT NULL
+);
+"""
+
+RESULTS_QUERY = """
+SELECT s.show_url, s.show_name, s.show_date, s.type, i.judge_dogs, i.judge_bitches, s.venue, s.postcode,
+       i.first_entry_fee, i.subsequent_entry_fee, i.catalogue_fee, s.entry_close, t.distance_miles,
+       t.duration_hours, t.estimated_cost, t.overnight_required, t.overnight_cost, t.drive_time_minutes,
+       i.judge_history
+FROM shows s
+LEFT JOIN show_info i ON i.show_url = s.show_url
+LEFT JOIN travel t ON t.postcode = s.postcode
+"""
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def _upsert_sql(table: str, key: str, fields: List[str]) -> str:
+    columns = [key] + fields + (["updated_at"] if table != "show_info" else [])
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates}")
+
+
+def _column_value(record: dict, field: str):
+    value = record.get(field)
+    if field in JSON_FIELDS and value is not None:
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def _travel_info(row) -> dict:
+    info = {k: row[k] for k in TRAVEL_FIELDS if row[k] is not None}
+    if "overnight_required" in info:
+        info["overnight_required"] = bool(info["overnight_required"])
+    return info
+
+
+def atomic_write(path: str, write, mode: str = "w"):
+    # Writes beside the target and renames over it, so readers in any process see the old
+    # file or the new one, never a partial one; the temporary name is unique to the writer
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, mode, **({} if "b" in mode else {"newline": ""})) as f:
+            write(f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+@contextmanager
+def file_lock(path: str):
+    # Blocking exclusive lock held across processes (uvicorn workers, CLI runs) for the duration
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class SQLiteStore:
+    """
+    One SQLite database file behind a single connection shared by every thread (with
+    a lock), in WAL mode so readers in other processes are never blocked by a write.
+    """
+
+    schema = ""
+    migrations = ()     # (table, column, declaration): columns added since the schema was first released
+    indexes = ""        # Created once the migrations have run, so they may cover migrated columns
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._generation = 0    # Bumped each time the file is (re)opened, e.g. after restore()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(self.schema)
+        for table, column, declaration in self.migrations:
+            if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                with conn:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+                    self._backfill(conn, table, column)
+        conn.executescript(self.indexes)
+        self._generation += 1
+        return conn
+
+    def _backfill(self, conn, table: str, column: str):
+        # Fills a column just added to an existing database; new columns start out NULL
+        pass
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._open()
+            yield self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def version(self) -> tuple:
+        # Changes whenever another connection (another worker process) commits, or the file
+        # is reopened; in-memory caches built from the store compare it to know to reload
+        with self.connection() as conn:
+            return self._generation, conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def checkpoint(self):
+        # Folds the WAL into the main file, so copying or uploading the .db alone is complete
+        with self.connection() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def is_empty(self) -> bool:
+        # True when the database is missing or holds no rows yet (e.g. just created by an early open)
+        if not os.path.exists(self.path):
+            return True
+        with self.connection() as conn:
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+            return not any(conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() for table in tables)
+
+    def restore(self, path: str):
+        # Loads the database file at path (e.g. the copy downloaded from Drive). A database
+        # that already exists is never swapped out, since other processes may hold it open:
+        # the copy is written into it page by page with SQLite's backup API instead.
+        with self._lock:
+            if not os.path.exists(self.path):
+                self.close()
+                for suffix in ("-wal", "-shm"):
+                    if os.path.exists(self.path + suffix):
+                        os.remove(self.path + suffix)
+                os.replace(path, self.path)
+                return
+            source = sqlite3.connect(path)
+            try:
+                with self.connection() as conn:
+                    source.backup(conn)
+            finally:
+                source.close()
+            self.close()    # Reopened on next use, running any migrations the copy lacks
+            os.remove(path)
+
+
+class ShowStore(SQLiteStore):
+    """
+    Processed shows: listing fields, schedule-derived info, travel per venue postcode
+    and processed markers. Writes are per show, so a run's cost does not grow with
+    history; the JSON and CSV files are exports of it.
+    """
+
+    schema = SCHEMA
+    migrations = (("show_info", "judge_history", "TEXT"),)
+
+    def __init__(self, path: str = STORE_DB):
+        super().__init__(path)
+
+    # ===== Processed markers =====
+    def is_processed(self, show_url: str) -> bool:
+        with self.connection() as conn:
+            return conn.execute("SELECT 1 FROM processed WHERE show_url = ?", (show_url,)).fetchone() is not None
+
+    def mark_processed(self, show_urls: Iterable[str]):
+        with self.connection() as conn, conn:
+            conn.executemany("INSERT OR IGNORE INTO processed (show_url, processed_at) VALUES (?, ?)",
+                             [(url, _now()) for url in show_urls])
+
+    def processed_urls(self) -> List[str]:
+        with self.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT show_url FROM processed ORDER BY show_url")]
+
+    # ===== Results =====
+    def save_show(self, result: dict):
+        self.save_shows([result])
+
+    def save_shows(self, results: Iterable[dict]):
+        # Upserts each result across the tables and marks it processed, in one transaction
+        now = _now()
+        with self.connection() as conn, conn:
+            for r in results:
+                url = r.get("show_url")
+                if not url:
+                    continue
+                conn.execute(_upsert_sql("shows", "show_url", SHOW_FIELDS),
+                             [url] + [r.get(f) for f in SHOW_FIELDS] + [now])
+                conn.execute(_upsert_sql("show_info", "show_url", INFO_FIELDS),
+                             [url] + [_column_value(r, f) for f in INFO_FIELDS])
+                # A failed travel lookup must not wipe what is known about the postcode
+                if r.get("postcode") and r.get("distance_miles") is not None:
+                    conn.execute(_upsert_sql("travel", "postcode", TRAVEL_FIELDS),
+                                 [r["postcode"]] + [r.get(f) for f in TRAVEL_FIELDS] + [now])
+                conn.execute("INSERT OR IGNORE INTO processed (show_url, processed_at) VALUES (?, ?)", (url, now))
+
+    def results(self, date_from: Optional[str] = None) -> List[dict]:
+        # Result rows ordered by show date, undated shows last
+        sql = RESULTS_QUERY
+        params = []
+        if date_from:
+            sql += " WHERE s.show_date >= ?"
+            params.append(date_from)
+        sql += " ORDER BY s.show_date IS NULL, s.show_date, s.show_url"
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        results = []
+        for row in rows:
+            r = dict(row)
+            if r["overnight_required"] is not None:
+                r["overnight_required"] = bool(r["overnight_required"])
+            for field in JSON_FIELDS:
+                if r[field] is not None:
+                    r[field] = json.loads(r[field])
+            results.append(r)
+        return results
+
+    def count(self) -> int:
+        with self.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM shows").fetchone()[0]
+
+    # ===== Travel =====
+    def travel(self, postcode: str) -> Optional[dict]:
+        # Drive from home to a postcode, if it has been looked up (by any worker)
+        with self.connection() as conn:
+            row = conn.execute(f"SELECT {', '.join(TRAVEL_FIELDS)} FROM travel WHERE postcode = ?",
+                               (postcode,)).fetchone()
+        if row is None or row["distance_miles"] is None:
+            return None
+        return _travel_info(row)
+
+    def save_travel(self, postcode: str, info: dict):
+        with self.connection() as conn, conn:
+            conn.execute(_upsert_sql("travel", "postcode", TRAVEL_FIELDS),
+                         [postcode] + [info.get(f) for f in TRAVEL_FIELDS] + [_now()])
+
+    def between(self, origin: str, destination: str) -> Optional[dict]:
+        with self.connection() as conn:
+            row = conn.execute("SELECT distance_miles, drive_time_minutes FROM between_travel "
+                               "WHERE origin = ? AND destination = ?", (origin, destination)).fetchone()
+        return dict(row) if row else None
+
+    def save_between(self, origin: str, destination: str, info: dict):
+        with self.connection() as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO between_travel (origin, destination, distance_miles, "
+                         "drive_time_minutes, updated_at) VALUES (?, ?, ?, ?, ?)",
+                         (origin, destination, info.get("distance_miles"), info.get("drive_time_minutes"), _now()))
+
+    def travel_cache(self) -> dict:
+        # Every known drive, in the layout of the old travel_cache.json:
+        # {postcode: travel info, ..., "between": {"origin||destination": {...}}}
+        with self.connection() as conn:
+            rows = conn.execute(f"SELECT postcode, {', '.join(TRAVEL_FIELDS)} FROM travel "
+                                "WHERE distance_miles IS NOT NULL ORDER BY postcode").fetchall()
+            pairs = conn.execute("SELECT origin, destination, distance_miles, drive_time_minutes "
+                                 "FROM between_travel ORDER BY origin, destination").fetchall()
+        cache = {row["postcode"]: _travel_info(row) for row in rows}
+        cache["between"] = {f"{r['origin']}||{r['destination']}": {"distance_miles": r["distance_miles"],
+                                                                    "drive_time_minutes": r["drive_time_minutes"]}
+                            for r in pairs}
+        return cache
+
+    def import_travel_cache(self, travel_json: str):
+        # One-off migration of travel_cache.json; postcodes already known are left alone
+        with self.connection() as conn:
+            if conn.execute("SELECT COUNT(*) FROM between_travel").fetchone()[0] or not os.path.isfile(travel_json):
+                return
+        try:
+            with open(travel_json, "r") as f:
+                cache = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Could not read {travel_json}: {e}")
+            return
+        now = _now()
+        pairs = [key.split("||", 1) + [info.get("distance_miles"), info.get("drive_time_minutes"), now]
+                 for key, info in (cache.pop("between", None) or {}).items() if "||" in key]
+        with self.connection() as conn, conn:
+            conn.executemany(f"INSERT OR IGNORE INTO travel (postcode, {', '.join(TRAVEL_FIELDS)}, updated_at) "
+                             f"VALUES ({', '.join('?' * (len(TRAVEL_FIELDS) + 2))})",
+                             [[postcode] + [info.get(f) for f in TRAVEL_FIELDS] + [now]
+                              for postcode, info in cache.items() if isinstance(info, dict)])
+            conn.executemany("INSERT OR IGNORE INTO between_travel (origin, destination, distance_miles, "
+                             "drive_time_minutes, updated_at) VALUES (?, ?, ?, ?, ?)", pairs)
+        print(f"[INFO] Imported {len(cache)} travel lookups and {len(pairs)} between-venue drives into {self.path}.")
+
+    # ===== Exports =====
+    def export_views(self, results_json: str, results_csv: str, processed_json: str,
+                     travel_json: Optional[str] = None) -> List[dict]:
+        # Regenerates the flat-file views from the database; returns the exported results
+        results = self.results()
+        atomic_write(results_json, lambda f: json.dump(results, f, indent=2, default=str))
+
+        def write_csv(f):
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows({k: _column_value(r, k) for k in RESULT_FIELDS} for r in results)
+        atomic_write(results_csv, write_csv)
+
+        processed = self.processed_urls()
+        atomic_write(processed_json, lambda f: json.dump(processed, f, indent=2))
+        if travel_json:
+            travel = self.travel_cache()
+            atomic_write(travel_json, lambda f: json.dump(travel, f, indent=2))
+        return results
+
+    def import_legacy(self, results_json: str, processed_json: str):
+        # One-off migration: seeds an empty database from the flat files it replaces
+        with self.connection() as conn:
+            empty = conn.execute("SELECT (SELECT COUNT(*) FROM shows) + (SELECT COUNT(*) FROM processed)").fetchone()[0] == 0
+        if not empty:
+            return
+        results, processed = [], []
+        try:
+            if os.path.isfile(results_json):
+                with open(results_json, "r") as f:
+                    results = json.load(f)
+            if os.path.isfile(processed_json):
+                with open(processed_json, "r") as f:
+                    data = json.load(f)
+                processed = data if isinstance(data, list) else list(data.keys())
+        except Exception as e:
+            print(f"[WARN] Could not read the legacy state files: {e}")
+        if results or processed:
+            self.save_shows(results)
+            self.mark_processed(processed)
+            print(f"[INFO] Imported {len(results)} results and {len(processed)} processed shows into {self.path}.")
+
+
+STORE = ShowStore()
@@ -0,0 +1,14 @@
+# conftest.py
+
+import os
+import sys
+import tempfile
+
+# The modules open their stores at import time; keep those out of the working tree
+_STATE_DIR = tempfile.mkdtemp(prefix="fossedata-tests-")
+for _name, _file in (("STORE_DB", "fossedata.db"), ("GOLDEN_DB", "golden_history.db"),
+                     ("HTTP_CACHE_DB", "http_cache.db"), ("WORK_QUEUE_DB", "work_queue.db"),
+                     ("HTTP_ARCHIVE_DIR", "http_archive"), ("JOBS_DIR", ".jobs")):
+    os.environ.setdefault(_name, os.path.join(_STATE_DIR, _file))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,65 @@
+# test_etag.py
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+import main
+from main import etag_response
+from store import STORE
+
+SHOW = {"show_url": "https://www.fossedata.co.uk/shows/Test-Open-Show.aspx", "show_name": "Test Open Show",
+        "show_date": "2026-11-07", "type": "Open", "judge_dogs": "Mr A Smith", "judge_bitches": "Mrs B Jones"}
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.parametrize("sent", ['"abc"', 'W/"abc"', '"xyz", "abc"', '"xyz",W/"abc"', "*"])
+def test_matching_tag_gets_304(sent):
+    response = etag_response(_request(sent), "abc", {"x": 1})
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"abc"'
+
+
+@pytest.mark.parametrize("sent", [None, "", '"ab"', '"abcd"', '"xabcx"', 'abc'])
+def test_other_tags_get_the_body(sent):
+    response = etag_response(_request(sent), "abc", {"x": 1})
+    assert response.status_code == 200
+    assert response.body == b'{"x": 1}'
+    assert response.headers["etag"] == '"abc"'
+
+
+@pytest.fixture(scope="module")
+def client():
+    STORE.save_show(SHOW)
+    return TestClient(main.app)
+
+
+def test_shows_etag_round_trip(client):
+    first = client.get("/shows")
+    assert first.status_code == 200
+    assert SHOW["show_url"] in [s["show_url"] for s in first.json()["shows"]]
+    again = client.get("/shows", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_show_by_key(client):
+    response = client.get("/shows/Test-Open-Show")
+    assert response.status_code == 200
+    assert response.json()["judge_dogs"] == "Mr A Smith"
+    assert client.get("/shows/Test-Open-Show", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get("/shows/No-Such-Show").status_code == 404
+
+
+def test_shows_date_range(client):
+    assert len(client.get("/shows", params={"date_from": "2026-11-07", "date_to": "2026-11-07"}).json()["shows"]) == 1
+    assert client.get("/shows", params={"date_from": "2026-11-08"}).json()["shows"] == []
+
+
+@pytest.mark.parametrize("bad", ["7 Nov 2026", "2026-13-01", "yesterday"])
+def test_shows_rejects_malformed_dates(client, bad):
+    assert client.get("/shows", params={"date_from": bad}).status_code == 422
+    assert client.get("/shows", params={"date_to": bad}).status_code == 422
@@ -0,0 +1,10 @@
+# test_extract_judges.py
+
+from fossedata_core import extract_judges
+
+
+def test_golden_club_schedule_with_group_keywords_is_single_breed():
+    # "Limited" is a listing keyword, not a breed, so the show stays single-breed
+    lines = ["Northern Golden Retriever Association", "Open Show (Limited to members)",
+             "Dogs: Mr A Smith", "Bitches: Mrs B Jones"]
+    assert extract_judges(lines, "Northern Golden Retriever Association") == ("Mr A Smith", "Mrs B Jones")
@@ -0,0 +1,74 @@
+# test_http_cache.py
+
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+import http_client
+import upstreams
+from fossedata_results import fetch_show_results_html
+from http_cache import HTTP_CACHE, max_age_for
+
+RESULTS_PAGE = f"{upstreams.FOSSEDATA}/show-results/Test-Show.aspx"
+FORM = """<html><body>Retriever (Golden)
+<input id="__VIEWSTATE" value="{state}"/>
+<select name="ctl00$breed" id="ctl00_breed"><option value="1">Retriever (Labrador)</option>
+<option value="2">Retriever (Golden)</option></select></body></html>"""
+
+
+class Upstream:
+    # Stands in for the live site: each GET hands out a new view state
+    def __init__(self):
+        self.requests = []
+        self.states = 0
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        resp = requests.Response()
+        resp.status_code, resp.reason, resp.url, resp.request = 200, "OK", request.url, request
+        resp.headers["Content-Type"] = "text/html; charset=utf-8"
+        if request.method == "GET":
+            self.states += 1
+            resp._content = FORM.format(state=f"state-{self.states}").encode()
+        else:
+            state = parse_qs(request.body)["__VIEWSTATE"][0]
+            resp._content = f"Golden results for {state}".encode()
+        return resp
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    HTTP_CACHE.clear()
+    site = Upstream()
+    monkeypatch.setattr(HTTPAdapter, "send", site.send)
+    return site
+
+
+def test_show_detail_pages_are_not_cached():
+    assert max_age_for("GET", f"{upstreams.FOSSEDATA}/shows/Some-Show.aspx") == (False, None)
+    assert max_age_for("POST", f"{upstreams.FOSSEDATA}/shows/Some-Show.aspx") == (False, None)
+    assert max_age_for("GET", RESULTS_PAGE)[0]
+
+
+def test_cache_control_stays_with_the_cache(upstream):
+    session = http_client.new_session()
+    first = session.get(RESULTS_PAGE, headers={"Cache-Control": "max-age=60"})
+    again = session.get(RESULTS_PAGE, headers={"Cache-Control": "max-age=60"})
+    assert not http_client.from_cache(first) and http_client.from_cache(again)
+    assert again.text == first.text
+    assert len(upstream.requests) == 1
+    assert "Cache-Control" not in upstream.requests[0].headers
+
+
+def test_postback_missing_from_cache_starts_from_a_live_page(upstream):
+    assert fetch_show_results_html(http_client.new_session(), RESULTS_PAGE) == "Golden results for state-1"
+    with HTTP_CACHE.connection() as conn, conn:
+        conn.execute("DELETE FROM responses WHERE method = 'POST'")
+    upstream.requests.clear()
+
+    assert fetch_show_results_html(http_client.new_session(), RESULTS_PAGE) == "Golden results for state-2"
+    # The cached page's postback, then a live page and its own postback
+    assert [r.method for r in upstream.requests] == ["POST", "GET", "POST"]
+    assert all("Cache-Control" not in r.headers for r in upstream.requests)
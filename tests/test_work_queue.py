@@ -0,0 +1,98 @@
+# test_work_queue.py
+
+import time
+
+import pytest
+
+import work_queue
+from work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return WorkQueue(str(tmp_path / "queue.db"), lease_seconds=60, max_attempts=2)
+
+
+def _expire(queue, key):
+    with queue.connection() as conn, conn:
+        conn.execute("UPDATE tasks SET lease_expires = ? WHERE key = ?", (time.time() - 1, key))
+
+
+def _make_due(queue, key):
+    with queue.connection() as conn, conn:
+        conn.execute("UPDATE tasks SET available_at = ? WHERE key = ?", (time.time() - 1, key))
+
+
+def test_lease_hands_out_each_task_once_in_order(queue):
+    assert queue.enqueue([("a", {"n": 1}), ("b", {"n": 2})]) == 2
+    first, second = queue.lease("w1"), queue.lease("w2")
+    assert (first.key, first.payload, first.attempts) == ("a", {"n": 1}, 1)
+    assert second.key == "b"
+    assert queue.lease("w3") is None
+    assert queue.outstanding() == 2
+
+
+def test_enqueue_leaves_open_tasks_alone(queue):
+    queue.enqueue([("a", {})])
+    task = queue.lease("w1")
+    assert queue.enqueue([("a", {"changed": True})]) == 0
+    assert queue.heartbeat(task)
+
+
+def test_complete_records_the_result(queue):
+    queue.enqueue([("a", {})])
+    task = queue.lease("w1")
+    assert queue.complete(task, {"ok": True})
+    assert queue.results(["a"]) == [("a", "done", {"ok": True})]
+    assert queue.outstanding(["a"]) == 0
+
+
+def test_expired_lease_is_leased_again(queue):
+    queue.enqueue([("a", {})])
+    stale = queue.lease("w1")
+    _expire(queue, "a")
+    fresh = queue.lease("w2")
+    assert (fresh.key, fresh.attempts) == ("a", 2)
+    # The worker that lost its lease can no longer heartbeat or complete it
+    assert not queue.heartbeat(stale)
+    assert not queue.complete(stale)
+    assert queue.complete(fresh)
+
+
+def test_fail_retries_with_backoff_until_max_attempts(queue, monkeypatch):
+    monkeypatch.setattr(work_queue, "RETRY_BACKOFF_SECONDS", 30)
+    queue.enqueue([("a", {})])
+    assert queue.fail(queue.lease("w1"), "boom")
+    assert queue.counts() == {"pending": 1}
+    assert queue.lease("w1") is None  # Backing off
+    _make_due(queue, "a")
+    task = queue.lease("w1")
+    assert task.attempts == 2
+    assert queue.fail(task, "boom again")
+    assert queue.results(["a"]) == [("a", "failed", None)]
+    assert queue.lease("w1") is None
+
+
+def test_expired_lease_on_last_attempt_fails(queue):
+    queue.enqueue([("a", {})])
+    queue.fail(queue.lease("w1"), "boom")
+    _make_due(queue, "a")
+    queue.lease("w1")
+    _expire(queue, "a")
+    assert queue.lease("w2") is None
+    assert queue.counts() == {"failed": 1}
+
+
+def test_enqueue_requeues_done_and_failed_tasks(queue):
+    queue.enqueue([("a", {}), ("b", {})])
+    queue.complete(queue.lease("w1"))
+    task = queue.lease("w1")
+    queue.fail(task, "boom")
+    _make_due(queue, "b")
+    queue.fail(queue.lease("w1"), "boom")
+    assert queue.counts() == {"done": 1, "failed": 1}
+
+    assert queue.enqueue([("a", {}), ("b", {})]) == 2
+    task = queue.lease("w1")
+    assert (task.key, task.attempts) == ("a", 1)
+    assert queue.outstanding(["a", "b"]) == 2
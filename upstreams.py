@@ -0,0 +1,59 @@
+# upstreams.py
+
+import os
+import json
+
+# Base URL of every external service the pipeline talks to. Each can be pointed
+# elsewhere with <NAME>_BASE_URL, or all at once with UPSTREAM_BASE_URL, under which
+# each service lives at its own path prefix (as bench/fake_upstream.py serves them).
+DEFAULT_BASE_URLS = {
+    "FOSSEDATA": "https://www.fossedata.co.uk",
+    "HIGHAM": "https://www.highampress.co.uk",
+    "GOOGLE_MAPS": "https://maps.googleapis.com",
+    "GOV_ASSETS": "https://assets.publishing.service.gov.uk",
+    "KENNEL_CLUB": "https://www.thekennelclub.org.uk",
+    "GOOGLE_DRIVE": "https://www.googleapis.com",
+}
+PATH_PREFIXES = {
+    "FOSSEDATA": "fossedata",
+    "HIGHAM": "higham",
+    "GOOGLE_MAPS": "maps",
+    "GOV_ASSETS": "gov",
+    "KENNEL_CLUB": "kc",
+    "GOOGLE_DRIVE": "drive",
+}
+
+
+def base_url(name: str) -> str:
+    override = os.getenv(f"{name}_BASE_URL")
+    if override:
+        return override.rstrip("/")
+    shared = os.getenv("UPSTREAM_BASE_URL")
+    if shared:
+        return f"{shared.rstrip('/')}/{PATH_PREFIXES[name]}"
+    return DEFAULT_BASE_URLS[name]
+
+
+def is_overridden(name: str) -> bool:
+    return base_url(name) != DEFAULT_BASE_URLS[name]
+
+
+def build_drive_service(credentials):
+    # Drive v3 client for the configured base URL. Media uploads ignore client_options'
+    # api_endpoint, so an override rewrites the discovery document's rootUrl instead.
+    from googleapiclient.discovery import build, build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+
+    if not is_overridden("GOOGLE_DRIVE"):
+        return build("drive", "v3", credentials=credentials)
+    document = json.loads(get_static_doc("drive", "v3"))
+    document["rootUrl"] = f"{GOOGLE_DRIVE}/"
+    return build_from_document(document, credentials=credentials)
+
+
+FOSSEDATA = base_url("FOSSEDATA")
+HIGHAM = base_url("HIGHAM")
+GOOGLE_MAPS = base_url("GOOGLE_MAPS")
+GOV_ASSETS = base_url("GOV_ASSETS")
+KENNEL_CLUB = base_url("KENNEL_CLUB")
+GOOGLE_DRIVE = base_url("GOOGLE_DRIVE")
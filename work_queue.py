@@ -0,0 +1,171 @@
+# work_queue.py
+
+import os
+import json
+import time
+import socket
+from typing import Iterable, List, Optional, Tuple
+from store import SQLiteStore
+
+WORK_QUEUE_DB = os.getenv("WORK_QUEUE_DB", "work_queue.db")
+LEASE_SECONDS = float(os.getenv("WORK_LEASE_SECONDS", 120))    # A task whose worker stops heartbeating is re-leased after this
+MAX_ATTEMPTS = int(os.getenv("WORK_MAX_ATTEMPTS", 3))
+RETRY_BACKOFF_SECONDS = 30          # Doubled for each further attempt
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    key           TEXT PRIMARY KEY,     -- one task per key (the show URL); enqueueing it again is a no-op while it is open
+    position      INTEGER NOT NULL,     -- order within its batch; tasks are leased in this order
+    payload       TEXT NOT NULL,        -- JSON
+    status        TEXT NOT NULL,        -- pending -> leased -> done | failed (after MAX_ATTEMPTS)
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    available_at  REAL NOT NULL,        -- not leased before this (retry backoff)
+    lease_owner   TEXT,
+    lease_expires REAL,
+    result        TEXT,                 -- JSON, once done
+    error         TEXT,                 -- the last attempt's
+    enqueued_at   REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (status, position);
+"""
+
+# Pending tasks that are due, and leased ones whose worker has stopped heartbeating
+_LEASABLE = "(status = 'pending' AND available_at <= :now) OR (status = 'leased' AND lease_expires < :now)"
+
+
+def worker_id(name: str = "worker") -> str:
+    # Unique across hosts and processes; an owner string only identifies who holds a lease
+    return f"{socket.gethostname()}:{os.getpid()}:{name}"
+
+
+class Task:
+    __slots__ = ("key", "payload", "attempts", "owner")
+
+    def __init__(self, key: str, payload, attempts: int, owner: str):
+        self.key = key
+        self.payload = payload
+        self.attempts = attempts
+        self.owner = owner
+
+    def __repr__(self) -> str:
+        return f"Task({self.key!r}, attempt {self.attempts}, owner {self.owner!r})"
+
+
+class WorkQueue(SQLiteStore):
+    """
+    Durable task queue in SQLite that any number of worker processes pull from. A
+    worker leases a task for LEASE_SECONDS and heartbeats to keep it; a lease that
+    runs out (the worker died or hung) makes the task leasable again. Failed attempts
+    are retried with backoff, up to MAX_ATTEMPTS. Leasing is a single UPDATE, so two
+    workers never hold the same task; a worker that lost its lease can still finish,
+    so what a task does must be safe to repeat.
+    """
+
+    schema = SCHEMA
+
+    def __init__(self, path: str = WORK_QUEUE_DB, lease_seconds: float = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS):
+        super().__init__(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def enqueue(self, tasks: Iterable[Tuple[str, dict]]) -> int:
+        # (key, payload) pairs; a key already done or failed is queued afresh (open ones are left
+        # as they are). Returns how many were queued.
+        now = time.time()
+        with self.connection() as conn, conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT INTO tasks (key, position, payload, status, available_at, enqueued_at, updated_at) "
+                "VALUES (?, ?, ?, 'pending', ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET position = excluded.position, payload = excluded.payload, "
+                "status = 'pending', attempts = 0, available_at = excluded.available_at, lease_owner = NULL, "
+                "lease_expires = NULL, result = NULL, error = NULL, enqueued_at = excluded.enqueued_at, "
+                "updated_at = excluded.updated_at "
+                "WHERE status IN ('done', 'failed')",
+                [(key, position, json.dumps(payload, default=str), now, now, now)
+                 for position, (key, payload) in enumerate(tasks)],
+            )
+            return conn.total_changes - before
+
+    def lease(self, owner: str) -> Optional[Task]:
+        # Claims the next leasable task for owner, or returns None when there is none right now
+        now = time.time()
+        with self.connection() as conn, conn:
+            # Expired leases that have used up their attempts are failed rather than handed out again
+            conn.execute("UPDATE tasks SET status = 'failed', lease_owner = NULL, updated_at = :now, "
+                         "error = coalesce(error, 'lease expired') "
+                         "WHERE status = 'leased' AND lease_expires < :now AND attempts >= :max",
+                         {"now": now, "max": self.max_attempts})
+            row = conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = :owner, lease_expires = :expires, "
+                "attempts = attempts + 1, updated_at = :now "
+                f"WHERE key = (SELECT key FROM tasks WHERE {_LEASABLE} ORDER BY position, enqueued_at LIMIT 1) "
+                "RETURNING key, payload, attempts",
+                {"owner": owner, "expires": now + self.lease_seconds, "now": now},
+            ).fetchone()
+        if row is None:
+            return None
+        return Task(row["key"], json.loads(row["payload"]), row["attempts"], owner)
+
+    def heartbeat(self, task: Task) -> bool:
+        # Extends the lease; False when the task is no longer leased to this worker
+        now = time.time()
+        with self.connection() as conn, conn:
+            return conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE key = ? AND lease_owner = ? AND status = 'leased'",
+                (now + self.lease_seconds, now, task.key, task.owner),
+            ).rowcount == 1
+
+    def complete(self, task: Task, result=None) -> bool:
+        with self.connection() as conn, conn:
+            return conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE key = ? AND lease_owner = ? AND status = 'leased'",
+                (json.dumps(result, default=str), time.time(), task.key, task.owner),
+            ).rowcount == 1
+
+    def fail(self, task: Task, error: str) -> bool:
+        # Puts the task back with backoff, or marks it failed once its attempts are used up
+        now = time.time()
+        retry = task.attempts < self.max_attempts
+        with self.connection() as conn, conn:
+            return conn.execute(
+                "UPDATE tasks SET status = ?, available_at = ?, error = ?, lease_owner = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE key = ? AND lease_owner = ? AND status = 'leased'",
+                ("pending" if retry else "failed", now + RETRY_BACKOFF_SECONDS * 2 ** (task.attempts - 1),
+                 error, now, task.key, task.owner),
+            ).rowcount == 1
+
+    def outstanding(self, keys: Optional[List[str]] = None) -> int:
+        # Tasks (of keys, or in all) still pending or leased
+        sql = "SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'leased')"
+        with self.connection() as conn:
+            if keys is None:
+                return conn.execute(sql).fetchone()[0]
+            return sum(conn.execute(sql + f" AND key IN ({', '.join('?' * len(chunk))})", chunk).fetchone()[0]
+                       for chunk in _chunks(keys))
+
+    def results(self, keys: List[str]) -> List[Tuple[str, str, object]]:
+        # (key, status, result) of each of keys, in the order given
+        found = {}
+        with self.connection() as conn:
+            for chunk in _chunks(keys):
+                for row in conn.execute(f"SELECT key, status, result FROM tasks WHERE key IN ({', '.join('?' * len(chunk))})",
+                                        chunk):
+                    found[row["key"]] = (row["status"], json.loads(row["result"]) if row["result"] else None)
+        return [(key,) + found[key] for key in keys if key in found]
+
+    def counts(self) -> dict:
+        with self.connection() as conn:
+            return {row[0]: row[1] for row in conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status")}
+
+
+def _chunks(keys: List[str], size: int = 500):
+    # SQLite caps the number of bound parameters in a statement
+    for i in range(0, len(keys), size):
+        yield keys[i:i + size]
+
+
+WORK_QUEUE = WorkQueue()